@@ -1,2 +1,8 @@
-from .crawler import Crawler
-from .version import version
\ No newline at end of file
+from .version import version
+
+# Crawler is imported lazily so that the thin daemon client does not pay for importing requests
+def __getattr__(name):
+    if name == "Crawler":
+        from .crawler import Crawler
+        return Crawler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,69 @@
+import hashlib
+import math
+import os
+import struct
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+
+        # Check if capacity is an integer and positive
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError("Invalid value for 'capacity'. It must be a positive integer.")
+
+        # Check if error_rate is a number between 0 and 1
+        if not isinstance(error_rate, float) or not 0 < error_rate < 1:
+            raise ValueError("Invalid value for 'error_rate'. It must be a float between 0 and 1.")
+
+        # Optimal number of bits and hash functions for the expected capacity and false positive rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            size, hash_count = struct.unpack('<QI', f.read(12))
+            bits = bytearray(f.read())
+
+        if len(bits) != (size + 7) // 8:
+            raise ValueError(f"Invalid Bloom filter file {path}.")
+
+        bloom = cls.__new__(cls)
+        bloom.size = size
+        bloom.hash_count = hash_count
+        bloom.bits = bits
+        return bloom
+
+    def save(self, path):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(struct.pack('<QI', self.size, self.hash_count))
+            f.write(self.bits)
+        os.replace(temp_path, path)
+
+    def _positions(self, key):
+        if isinstance(key, str):
+            key = key.encode('utf-8')
+
+        # Double hashing: derive all positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        # Returns True if the key was not (probably) present before
+        added = False
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        return added
+
+    def __contains__(self, key):
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                return False
+        return True
@@ -0,0 +1,95 @@
+import re
+import time
+
+# Endpoint families used by Crawler methods
+ENDPOINTS = ['peers', 'activity', 'rules', 'blocks', 'trends', 'directory', 'timeline', 'tag', 'accounts', 'statuses']
+
+# Instance endpoints crawled together by instance_endpoints, and those crawled by default (the directory and timeline can be very large)
+INSTANCE_ENDPOINTS = ['node-info', 'info', 'peers', 'activity', 'rules', 'blocks', 'trends', 'directory', 'timeline']
+DEFAULT_INSTANCE_ENDPOINTS = ['node-info', 'info', 'peers', 'activity', 'rules', 'blocks', 'trends']
+
+# Page sizes used when nothing is known about the instance (Mastodon defaults)
+DEFAULT_PAGE_SIZES = {'statuses': 40, 'accounts': 80, 'trends': 20}
+
+# Largest page sizes accepted by server software implementing the Mastodon API
+PAGE_SIZES = {
+    'mastodon': {'statuses': 40, 'accounts': 80, 'trends': 20},
+    'pleroma': {'statuses': 40, 'accounts': 40, 'trends': 20},
+    'akkoma': {'statuses': 40, 'accounts': 40, 'trends': 20},
+    'gotosocial': {'statuses': 40, 'accounts': 80, 'trends': 20},
+}
+
+# Endpoints that server software implementing the Mastodon API is known not to provide
+UNSUPPORTED_ENDPOINTS = {
+    'pleroma': ['activity', 'blocks', 'trends'],
+    'akkoma': ['activity', 'blocks'],
+    'gotosocial': ['activity', 'directory', 'trends'],
+}
+
+# Server software that does not implement the Mastodon API at all
+NON_MASTODON_API_SOFTWARE = ['misskey', 'lemmy', 'peertube', 'writefreely', 'plume', 'bookwyrm', 'owncast', 'funkwhale', 'kbin', 'mbin']
+
+# Server software whose status IDs are Mastodon snowflakes (None: not probed, assumed to be Mastodon)
+SNOWFLAKE_ID_SOFTWARE = [None, 'mastodon', 'hometown']
+
+# Mastodon version in which each endpoint became available
+MASTODON_MIN_VERSIONS = {'directory': (3, 0), 'rules': (3, 4), 'trends': (3, 5), 'blocks': (4, 0)}
+
+def parse_version(version):
+    # Extract the leading numeric part e.g. '4.2.1+glitch' -> (4, 2, 1)
+    match = re.match(r'(\d+)(?:\.(\d+))?(?:\.(\d+))?', version or '')
+    if not match:
+        return None
+    return tuple(int(part or 0) for part in match.groups())
+
+def build_capabilities(nodeinfo=None, instance=None):
+    software = None
+    version = None
+
+    if nodeinfo and isinstance(nodeinfo.get('software'), dict):
+        software = (nodeinfo['software'].get('name') or '').lower() or None
+        version = nodeinfo['software'].get('version')
+
+    if instance and instance.get('version'):
+        # Mastodon-compatible servers report e.g. '2.7.2 (compatible; Pleroma 2.5.0)'
+        compatible = re.search(r'compatible; (\w+) ([^)\s]+)', instance['version'])
+        if software is None and compatible:
+            software = compatible.group(1).lower()
+            version = compatible.group(2)
+        elif software is None:
+            software = 'mastodon'
+            version = instance['version']
+
+    unsupported = set()
+
+    if software in NON_MASTODON_API_SOFTWARE:
+        unsupported.update(ENDPOINTS)
+    else:
+        unsupported.update(UNSUPPORTED_ENDPOINTS.get(software, []))
+
+    if software == 'mastodon':
+        parsed_version = parse_version(version)
+        if parsed_version is not None:
+            for endpoint, min_version in MASTODON_MIN_VERSIONS.items():
+                if parsed_version[:2] < min_version:
+                    unsupported.add(endpoint)
+
+    # Mastodon 4.4+ reports whether unauthenticated users may read the public timelines
+    if instance:
+        timelines_access = (instance.get('configuration') or {}).get('timelines_access') or {}
+
+        live_feeds = timelines_access.get('live_feeds') or {}
+        if live_feeds and all(access != 'public' for access in live_feeds.values()):
+            unsupported.add('timeline')
+
+        hashtag_feeds = timelines_access.get('hashtag_feeds') or {}
+        if hashtag_feeds and all(access != 'public' for access in hashtag_feeds.values()):
+            unsupported.add('tag')
+
+    return {
+        'software': software,
+        'version': version,
+        'page_sizes': dict(PAGE_SIZES.get(software, DEFAULT_PAGE_SIZES)),
+        'unsupported': sorted(unsupported),
+        'probed_at': time.time(),
+    }
@@ -1,40 +1,144 @@
 import codecs
 import json
+import os
 import sys
 import argparse
 import signal
-from mastodoner.crawler import Crawler
+from datetime import datetime
+from mastodoner.client import CrawlClient, DEFAULT_SOCKET_PATH
+from mastodoner.capabilities import INSTANCE_ENDPOINTS
 from mastodoner.version import version
 
+# Options of the crawler itself, which a daemon started with 'mastodoner serve' takes when it starts
+DAEMON_FLAGS = ['--no-probe', '--connect-timeout', '--read-timeout', '--health-file', '--dedup-index', '--dedup-references', '--media-dir', '--media-workers', '--media-bandwidth', '--snapshot-dir', '--keywords-file', '--languages', '--visibility', '--with-media', '--http2', '--trace-file']
+
 def validate_output_file(value):
     if not value.endswith(".jsonl"):
         raise argparse.ArgumentTypeError("Output file must have a .jsonl extension")
     return value
 
+def parse_fields(value):
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    if not fields:
+        raise argparse.ArgumentTypeError("Fields must be a comma-separated list of field paths e.g. id,created_at,account.acct")
+    return fields
+
+def parse_list(value):
+    values = [item.strip() for item in value.split(',') if item.strip()]
+    if not values:
+        raise argparse.ArgumentTypeError("Value must be a comma-separated list e.g. en,de")
+    return values
+
+def parse_date(value):
+    # Accepts a date e.g. 2024-05-01 or a datetime e.g. 2024-05-01T12:00:00+02:00 (naive values are UTC)
+    try:
+        return datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}'. It must be in ISO format e.g. 2024-05-01 or 2024-05-01T12:00:00")
+
+def parse_endpoints(value):
+    endpoints = [endpoint.strip() for endpoint in value.split(',') if endpoint.strip()]
+    if not endpoints or not all(endpoint in INSTANCE_ENDPOINTS for endpoint in endpoints):
+        raise argparse.ArgumentTypeError(f"Endpoints must be a comma-separated list of {', '.join(INSTANCE_ENDPOINTS)}")
+    return endpoints
+
 def write_output_file(output_file, items):
     with codecs.open(output_file, 'wb', encoding='utf-8') as f:
         for item in items:
             f.write(json.dumps(item, ensure_ascii=False) + '\n')
 
+def write_normalized_output_files(output_file, items, normalizer):
+    # Statuses go to the output file, the accounts they reference to e.g. output-accounts.jsonl
+    statuses, accounts = normalizer.normalize_items(items)
+    write_output_file(output_file, statuses)
+
+    accounts_file = f"{output_file[:-len('.jsonl')]}-accounts.jsonl"
+    if len(accounts) > 0:
+        write_output_file(accounts_file, accounts)
+    return accounts_file
+
 def main():
     
     # Create the parser
     parser = argparse.ArgumentParser(description="Crawl public data from Mastodon instance and save to a JSON Lines file.")
+    parser.add_argument("--socket", help=f"Unix socket of a running 'mastodoner serve' daemon. When given (or set via the 'MASTODONER_SOCKET' environment variable), jobs are submitted to the daemon instead of crawled in this process. Used with serve to choose where the daemon listens (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--no-probe", action="store_true", help="Do not probe instance capabilities (server software, page sizes, supported endpoints) before crawling")
+    parser.add_argument("--connect-timeout", type=float, default=5, help="Seconds to wait for a connection to an instance (default: 5)")
+    parser.add_argument("--read-timeout", type=float, default=60, help="Seconds to wait for an instance to send data (default: 60)")
+    parser.add_argument("--health-file", help="JSON file in which the health of each instance is persisted across runs so that recently dead instances are skipped")
+    parser.add_argument("--dedup-index", help="SQLite file indexing the canonical URI of every crawled status so that statuses seen in earlier runs or on other instances are skipped")
+    parser.add_argument("--dedup-references", action="store_true", help="Optional argument used with --dedup-index to save already seen statuses as references (id, uri, instance) instead of skipping them")
+    parser.add_argument("--media-dir", help="Directory in which media attachments of crawled statuses are downloaded, stored once per content hash")
+    parser.add_argument("--media-workers", type=int, default=8, help="Optional argument used with --media-dir to specify the number of concurrent downloads (default: 8)")
+    parser.add_argument("--media-bandwidth", type=int, help="Optional argument used with --media-dir to cap the download bandwidth in bytes per second")
+    parser.add_argument("--snapshot-dir", help="Directory in which delta-encoded snapshots of instance peers, blocks and activity are kept (a base per instance, then only added and removed entries)")
+    parser.add_argument("--normalize", action="store_true", help="Save statuses with references (account_id, reblog_id) instead of embedded accounts and boosted statuses. Boosted statuses are saved as statuses of their own and each account is saved once to a second output file e.g. output-accounts.jsonl")
+    parser.add_argument("--keywords-file", help="File with one keyword or phrase per line. Only statuses whose text (HTML tags stripped, case-insensitive, whole words) or content warning contains one of them are kept while crawling")
+    parser.add_argument("--languages", type=parse_list, help="Only keep statuses in the given comma-separated languages while crawling e.g. en,de")
+    parser.add_argument("--visibility", type=parse_list, help="Only keep statuses with the given comma-separated visibilities while crawling e.g. public,unlisted")
+    parser.add_argument("--with-media", action="store_true", help="Only keep statuses with media attachments while crawling (also for boosts and on endpoints without an only_media parameter)")
+    parser.add_argument("--http2", action="store_true", help="Multiplex concurrent requests to each instance over one HTTP/2 connection (falls back to HTTP/1.1). Requires the optional dependency: pip install mastodoner[http2]. HTTPS requests then bypass the DNS cache and traces do not time their DNS and connect phases")
+    parser.add_argument("--trace-file", help="JSON Lines file to which a timing span (DNS, connect, time to first byte, body, JSON decode, rate-limit wait) of every request is appended. Summarize it with trace-report")
     subparsers = parser.add_subparsers(dest="command")
 
     # Create the version subparser
     version_parser = subparsers.add_parser("version", help="Check mastodoner version")
 
+    # Create the trace-report subparser
+    trace_report_parser = subparsers.add_parser("trace-report", help="Print latency percentiles per host and endpoint from a trace file")
+    trace_report_parser.add_argument("trace_file", help="Trace file written with --trace-file")
+
+    # Create the summarize subparser
+    summarize_parser = subparsers.add_parser("summarize", help="Print aggregate tables (weekly activity, user counts, software versions) of instance activity, node information and information output files")
+    summarize_parser.add_argument("--top", type=int, default=20, help="Number of software versions printed (default: 20)")
+    summarize_parser.add_argument("--output", help="JSON Lines file to which the rows of the summary tables are also written, each tagged with its table")
+    summarize_parser.add_argument("input_files", nargs="+", help="JSON Lines output files of instance --activity, --node-info or --info. --activity outputs can be mixed with either, --node-info and --info outputs are summarized in separate runs. Requires the optional dependency: pip install mastodoner[summary]")
+
+    # Create the index subparser
+    index_parser = subparsers.add_parser("index", help="Build an offset index over a JSON Lines output file for fast lookup by ID")
+    index_parser.add_argument("--host", help="Instance the records of the file were crawled from e.g. mastodon.online (records naming their instance keep it)")
+    index_parser.add_argument("jsonl_file", help="JSON Lines file to index (the index is written next to it with an .idx extension)")
+
+    # Create the lookup subparser
+    lookup_parser = subparsers.add_parser("lookup", help="Print the records with the given ID from an indexed JSON Lines output file")
+    lookup_parser.add_argument("--id", required=True, action="append", help="ID of the record, can be repeated")
+    lookup_parser.add_argument("--host", help="Instance the record was crawled from, as given when the file was indexed")
+    lookup_parser.add_argument("jsonl_file", help="JSON Lines file indexed with the index command")
+
+    # Create the compact subparser
+    compact_parser = subparsers.add_parser("compact", help="Merge JSON Lines output files into sorted shards, keeping only the newest record of each (host, ID)")
+    compact_parser.add_argument("--output-prefix", required=True, help="Prefix of the output shards e.g. archive/statuses writes archive/statuses-00000.jsonl, ...")
+    compact_parser.add_argument("--host", action="append", help="Instance the records were crawled from e.g. mastodon.online, or FILE=HOST for the records of one input file, can be repeated. Needed when compacting several files, for records that do not name their instance")
+    compact_parser.add_argument("--chunk-size", type=int, default=500000, help="Number of records sorted in memory at a time, bounding memory use (default: 500000)")
+    compact_parser.add_argument("--shard-size", type=int, default=1000000, help="Maximum number of records per output shard (default: 1000000)")
+    compact_parser.add_argument("--temp-dir", help="Directory for the temporary sorted runs (default: system temporary directory)")
+    compact_parser.add_argument("input_files", nargs="+", help="JSON Lines files to compact, oldest first. Records in later files replace those in earlier ones")
+
+    # Create the serve subparser
+    serve_parser = subparsers.add_parser("serve", help="Run a long-lived daemon that keeps a warm crawler and accepts jobs over a Unix socket")
+
+    # Create the schedule subparser
+    schedule_parser = subparsers.add_parser("schedule", help="Run crawls periodically, spread over time with jitter and spacing between runs on the same instance")
+    schedule_parser.add_argument("--workers", type=int, default=4, help="Number of scheduled runs executed concurrently (default: 4)")
+    schedule_parser.add_argument("--host-spacing", type=float, default=5, help="Minimum seconds between the starts of two runs on the same instance (default: 5)")
+    schedule_parser.add_argument("--jitter", type=float, default=0.1, help="Random variation of each interval, as a fraction of it (default: 0.1)")
+    schedule_parser.add_argument("specs_file", help="JSON file with a list of crawl specs e.g. [{\"method\": \"instance_trends_all\", \"args\": [\"mastodon.social\"], \"interval\": 3600, \"output_file\": \"trends-{run_at:%%Y%%m%%d}.jsonl\"}]")
+
     # Create the instance subparser
     instance_parser = subparsers.add_parser("instance", help="Crawl instance endpoints")
     instance_parser.add_argument("--instance-url", required=True, help="Base URL of the Mastodon instance e.g. mastodon.online")
     instance_parser.add_argument("--node-info", action="store_true", help="Crawl node information of the instance")
     instance_parser.add_argument("--info", action="store_true", help="Crawl general information about the instance")
+    instance_parser.add_argument("--all", action="store_true", help="Crawl node information, information, peers, activity, rules, blocks and trends of the instance concurrently, each saved to its own output file e.g. output-peers.jsonl")
+    instance_parser.add_argument("--endpoints", type=parse_endpoints, help="Crawl the given comma-separated endpoints of the instance concurrently, each saved to its own output file e.g. peers,rules,timeline. Endpoints: " + ", ".join(INSTANCE_ENDPOINTS))
+    instance_parser.add_argument("--capabilities", action="store_true", help="Probe server software, page sizes and supported endpoints of the instance")
     instance_parser.add_argument("--peers", action="store_true", help="Crawl list of instance(s) that given instance is aware of")
     instance_parser.add_argument("--activity", action="store_true", help="Crawl instance activity over the last 3 months (binned weekly)")
     instance_parser.add_argument("--rules", action="store_true", help="Crawl rules that the users of given instance should follow")
     instance_parser.add_argument("--blocks", action="store_true", help="Crawl list of instance(s) blocked by given instance")
     instance_parser.add_argument("--trends", action="store_true", help="Crawl (hash)tags, statuses or links that trended within the past week on given instance. Use --type to specify the trend type (default: tags)")
+    instance_parser.add_argument("--snapshot", action="store_true", help="Optional argument used with --peers, --blocks or --activity and --snapshot-dir (or a daemon started with --snapshot-dir) to save a snapshot of the response and write only its summary (entries added and removed since the last snapshot) to the output file")
+    instance_parser.add_argument("--as-of", type=parse_date, help="Optional argument used with --peers, --blocks or --activity and --snapshot-dir (or a daemon started with --snapshot-dir) to rebuild the full response as of the given date from the snapshots instead of crawling it e.g. 2024-05-01")
     instance_parser.add_argument("--trend-type", choices=["tags", "statuses", "links"], help="Optional argument used with --trends to specify the type of trend (default: tags)")
     instance_parser.add_argument("--directory", action="store_true", help="Crawl instance directory i.e. user profiles")
     instance_parser.add_argument("--order", choices=["new", "active"], help="Optional argument used with --directory to specify the order of response (default: active)")
@@ -43,7 +147,14 @@ def main():
     instance_parser.add_argument("--only-local", action="store_true", help="Optional argument used with --timeline to crawl only local statuses")
     instance_parser.add_argument("--only-remote", action="store_true", help="Optional argument used with --timeline to crawl only remote statuses")
     instance_parser.add_argument("--only-media", action="store_true", help="Optional argument used with --timeline to filter out statuses without attachments")
+    instance_parser.add_argument("--since", type=parse_date, help="Optional argument used with --timeline to crawl only statuses created at or after the given date/time (UTC unless specified) e.g. 2024-05-01")
+    instance_parser.add_argument("--until", type=parse_date, help="Optional argument used with --timeline to crawl only statuses created before the given date/time (UTC unless specified) e.g. 2024-05-08")
+    instance_parser.add_argument("--pipeline", action="store_true", help="Optional argument used with --timeline to fetch, decode and write pages concurrently in separate stages, streaming statuses to the output file as they are crawled")
+    instance_parser.add_argument("--slices", type=int, help="Optional argument used with --timeline and --since to split the time range into the given number of slices crawled concurrently")
+    instance_parser.add_argument("--sample", type=int, help="Optional argument used with --timeline and --since to crawl a random sample of about the given number of statuses, each with a sample_weight (the number of statuses in the time range it stands for)")
+    instance_parser.add_argument("--probe-size", type=int, help="Optional argument used with --sample to specify the number of statuses fetched per random probe (default: the largest page size of the instance)")
     instance_parser.add_argument("--limit", type=int, help="Optional argument used with --trends, --directory or --timeline to limit the response")
+    instance_parser.add_argument("--fields", type=parse_fields, help="Optional argument used with --directory or --timeline to keep only the given comma-separated field paths of each item e.g. id,created_at,account.acct")
     instance_parser.add_argument("output_file", type=validate_output_file, help="Output file (JSON Lines format)")
 
     # Create the user subparser
@@ -58,6 +169,12 @@ def main():
     user_parser.add_argument("--exclude-replies", action="store_true", help="Optional argument used with --statuses to filter out statuses in reply to a different user")
     user_parser.add_argument("--exclude-reblogs", action="store_true", help="Optional argument used with --statuses to filter out reblogs (reposts)")
     user_parser.add_argument("--only-pinned", action="store_true", help="Optional argument used with --statuses to filter pinned statuses only")
+    user_parser.add_argument("--since", type=parse_date, help="Optional argument used with --statuses to crawl only statuses created at or after the given date/time (UTC unless specified) e.g. 2024-05-01")
+    user_parser.add_argument("--until", type=parse_date, help="Optional argument used with --statuses to crawl only statuses created before the given date/time (UTC unless specified) e.g. 2024-05-08")
+    user_parser.add_argument("--pipeline", action="store_true", help="Optional argument used with --statuses to fetch, decode and write pages concurrently in separate stages, streaming statuses to the output file as they are crawled")
+    user_parser.add_argument("--slices", type=int, help="Optional argument used with --statuses and --since to split the time range into the given number of slices crawled concurrently")
+    user_parser.add_argument("--fields", type=parse_fields, help="Optional argument used with --statuses, --followers or --following to keep only the given comma-separated field paths of each item e.g. id,created_at,account.acct")
+    user_parser.add_argument("--edge-store", help="Optional argument used with --followers or --following to save only the follow edges to a compact edge store at the given path (with .nodes and .edges files) instead of saving the accounts to the output file")
     user_parser.add_argument("output_file", type=validate_output_file, help="Output file (JSON Lines format)")
 
     # Create the status subparser
@@ -67,6 +184,19 @@ def main():
     status_parser.add_argument("--info", action="store_true", required=True, help="Crawl information about the status")
     status_parser.add_argument("output_file", type=validate_output_file, help="Output file (JSON Lines format)")
 
+    # Create the tag subparser
+    tag_parser = subparsers.add_parser("tag", help="Crawl hashtag timelines")
+    tag_parser.add_argument("--hashtag", required=True, help="Hashtag to crawl, with or without the leading # e.g. mastodon")
+    tag_parser.add_argument("--instance-url", required=True, action="append", help="Base URL of a Mastodon instance e.g. mastodon.online. Can be repeated to crawl the hashtag on many instances concurrently")
+    tag_parser.add_argument("--only-local", action="store_true", help="Crawl only statuses local to each instance")
+    tag_parser.add_argument("--only-media", action="store_true", help="Filter out statuses without attachments")
+    tag_parser.add_argument("--since", type=parse_date, help="Crawl only statuses created at or after the given date/time (UTC unless specified) e.g. 2024-05-01")
+    tag_parser.add_argument("--until", type=parse_date, help="Crawl only statuses created before the given date/time (UTC unless specified) e.g. 2024-05-08")
+    tag_parser.add_argument("--limit", type=int, help="Limit the number of statuses crawled from each instance")
+    tag_parser.add_argument("--workers", type=int, default=16, help="Number of instances crawled concurrently (default: 16)")
+    tag_parser.add_argument("--fields", type=parse_fields, help="Keep only the given comma-separated field paths of each status e.g. id,created_at,account.acct")
+    tag_parser.add_argument("output_file", type=validate_output_file, help="Output file (JSON Lines format)")
+
     # Create the discover subparser
     discover_parser = subparsers.add_parser("discover", help="Discover instances")
     discover_parser.add_argument("--bearer-token", help="Bearer token for the 'instances.social' API. Alternatively, bearer token can also be provided by setting the 'INSTANCES_SOCIAL_TOKEN' environment variable. You can get the token from 'https://instances.social/api/doc/'")
@@ -76,14 +206,103 @@ def main():
     discover_parser.add_argument("--include-closed", action="store_true", help="Include instances with closed registrations")
     discover_parser.add_argument("--min-users", type=int, help="Minimum users discovered instances must have. Value greater than or equal to 1")
     discover_parser.add_argument("--max-users", type=int, help="Maximum users discovered instances must have. Value greater than or equal to 1")
+    discover_parser.add_argument("--via-peers", action="store_true", help="Discover instances without the 'instances.social' API by crawling peers of seed instances breadth-first")
+    discover_parser.add_argument("--seed", action="append", help="Optional argument used with --via-peers to add a seed instance, can be repeated (default: mastodon.social)")
+    discover_parser.add_argument("--max-depth", type=int, help="Optional argument used with --via-peers to specify how many levels of peers to crawl (default: 1 i.e. only peers of the seeds)")
+    discover_parser.add_argument("--max-instances", type=int, help="Optional argument used with --via-peers to stop after discovering the given number of instances (default: 0 i.e. no limit)")
+    discover_parser.add_argument("--workers", type=int, help="Optional argument used with --via-peers to specify the number of instances crawled concurrently (default: 16)")
+    discover_parser.add_argument("--bloom-capacity", type=int, help="Optional argument used with --via-peers to deduplicate instances with a Bloom filter sized for the given number of instances instead of an exact set. Uses far less memory but may rarely skip an instance")
+    discover_parser.add_argument("--edges-file", type=validate_output_file, help="Optional argument used with --via-peers to save the peers of every crawled instance (JSON Lines format)")
     discover_parser.add_argument("output_file", type=validate_output_file, help="Output file (JSON Lines format)")
     
     args = parser.parse_args()
 
-    crawler = Crawler()
+    # Summarizing a trace needs no crawler
+    if args.command == "trace-report":
+        from mastodoner.trace import format_summary, summarize_trace
+        print(format_summary(summarize_trace(args.trace_file)))
+        sys.exit(0)
+
+    # Nor does summarizing instance outputs
+    if args.command == "summarize":
+        from mastodoner.summary import format_tables, summarize_outputs
+        try:
+            summary = summarize_outputs(args.input_files)
+        except (ImportError, ValueError) as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
+        print(format_tables(summary, args.top))
+        if args.output:
+            write_output_file(args.output, [{'table': table, **row} for table, rows in summary.items() for row in rows])
+        sys.exit(0)
+
+    # Neither does indexing and reading output files
+    if args.command == "index":
+        from mastodoner.offsets import build_offset_index
+        count = build_offset_index(args.jsonl_file, host=args.host)
+        print(f"Indexed {count} records of {args.jsonl_file}")
+        sys.exit(0)
+
+    if args.command == "compact":
+        from mastodoner.compact import compact_outputs
+        # One host for every input file, or FILE=HOST per input file
+        host = None
+        if args.host:
+            if len(args.host) == 1 and '=' not in args.host[0]:
+                host = args.host[0]
+            elif all('=' in value for value in args.host):
+                host = dict(value.rsplit('=', 1) for value in args.host)
+            else:
+                parser.error("--host must be given once as HOST or for each input file as FILE=HOST")
+        try:
+            summary = compact_outputs(args.input_files, args.output_prefix, host, args.chunk_size, args.shard_size, temp_dir=args.temp_dir)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
+        print(f"Compacted {summary['records']} records into {summary['unique']} unique records in {len(summary['shards'])} shards")
+        sys.exit(0)
+
+    if args.command == "lookup":
+        from mastodoner.offsets import OffsetIndexReader
+        reader = OffsetIndexReader(args.jsonl_file, host=args.host)
+        for item_id in args.id:
+            for item in reader.get(item_id):
+                print(json.dumps(item, ensure_ascii=False))
+        reader.close()
+        sys.exit(0)
+
+    # Submit jobs to a running daemon if one is configured, otherwise crawl in this process
+    socket_path = args.socket or os.getenv('MASTODONER_SOCKET')
+
+    if socket_path and args.command not in ("serve", "schedule"):
+        # The daemon crawls with its own settings: options of the local crawler would be silently ignored
+        ignored = [flag for flag in DAEMON_FLAGS if getattr(args, flag[2:].replace('-', '_')) != parser.get_default(flag[2:].replace('-', '_'))]
+        if ignored:
+            parser.error(f"{', '.join(ignored)} cannot be used when submitting jobs to a daemon (--socket or MASTODONER_SOCKET). Pass them to 'mastodoner serve' instead")
+        crawler = CrawlClient(socket_path)
+    else:
+        from mastodoner.crawler import Crawler
+
+        # Filter statuses while crawling so only matching ones are kept and written
+        status_filter = None
+        if args.keywords_file or args.languages or args.visibility or args.with_media:
+            from mastodoner.filters import StatusFilter
+            keywords = None
+            if args.keywords_file:
+                with open(args.keywords_file, 'r', encoding='utf-8') as f:
+                    keywords = [line.strip() for line in f if line.strip()]
+            status_filter = StatusFilter(keywords, args.languages, args.with_media, args.visibility)
+
+        crawler = Crawler(probe_capabilities=not args.no_probe, connect_timeout=args.connect_timeout, read_timeout=args.read_timeout, health_file=args.health_file, status_index_file=args.dedup_index, status_references=args.dedup_references, media_dir=args.media_dir, media_workers=args.media_workers, media_bandwidth=args.media_bandwidth, snapshot_dir=args.snapshot_dir, trace_file=args.trace_file, http2=args.http2, status_filter=status_filter)
 
     items = []
 
+    # Accounts emitted once across all output files of this run
+    normalizer = None
+    if args.normalize:
+        from mastodoner.normalize import StatusNormalizer
+        normalizer = StatusNormalizer()
+
     # log and stop when process receives SIGINT
     def stop(signal, frame):
         crawler.logger.warn("Process received SIGINT, stopping")
@@ -91,6 +310,10 @@ def main():
 
     signal.signal(signal.SIGINT, stop)
 
+    if args.dedup_references and not args.dedup_index:
+        crawler.logger.error("--dedup-references can only be used with --dedup-index")
+        sys.exit(1)
+
     if not args.command:
         parser.print_help()
         sys.exit(1)
@@ -99,38 +322,101 @@ def main():
         print(f"mastodoner {version}")
         sys.exit(0)
 
+    if args.command == "serve":
+        from mastodoner.server import serve
+        serve(socket_path or DEFAULT_SOCKET_PATH, crawler)
+        sys.exit(0)
+
+    if args.command == "schedule":
+        from mastodoner.scheduler import Scheduler
+        with open(args.specs_file, 'r', encoding='utf-8') as f:
+            specs = json.load(f)
+        Scheduler(specs, crawler, args.workers, args.host_spacing, args.jitter).run()
+        sys.exit(0)
+
     if args.command == "instance":
 
-        if sum([args.node_info, args.info, args.peers, args.activity, args.rules, args.blocks, args.trends, args.directory, args.timeline]) != 1:
-            crawler.logger.error("Exactly one of --node-info, --info, --peers, --activity, --rules, --blocks, --trends, --directory, --timeline must be specified")
+        if sum([args.all, args.endpoints is not None, args.node_info, args.info, args.capabilities, args.peers, args.activity, args.rules, args.blocks, args.trends, args.directory, args.timeline]) != 1:
+            crawler.logger.error("Exactly one of --all, --endpoints, --node-info, --info, --capabilities, --peers, --activity, --rules, --blocks, --trends, --directory, --timeline must be specified")
+            sys.exit(1)
+
+        if args.limit is not None and not (args.trends or args.directory or args.timeline or args.all or args.endpoints):
+            crawler.logger.error("--limit can only be used with --trends, --directory, --timeline, --all or --endpoints")
             sys.exit(1)
 
-        if args.limit is not None and not (args.trends or args.directory or args.timeline):
-            crawler.logger.error("--limit can only be used with --trends, --directory, or --timeline")
+        if args.fields is not None and not (args.directory or args.timeline or args.endpoints):
+            crawler.logger.error("--fields can only be used with --directory, --timeline or --endpoints")
             sys.exit(1)
 
-        if (args.trend_type is not None) and not args.trends:
-            crawler.logger.error("--trend-type can only be used with --trends")
+        if (args.trend_type is not None) and not (args.trends or args.all or args.endpoints):
+            crawler.logger.error("--trend-type can only be used with --trends, --all or --endpoints")
             sys.exit(1)
 
         if (args.order is not None or args.include_remote) and not args.directory:
             crawler.logger.error("--order and --include-remote can only be used with --directory")
             sys.exit(1)
 
-        if (args.only_local or args.only_remote or args.only_media) and not args.timeline:
-            crawler.logger.error("--only-local, --only-remote and --only-media can only be used with --timeline")
+        if (args.only_local or args.only_remote or args.only_media or args.since or args.until) and not args.timeline:
+            crawler.logger.error("--only-local, --only-remote, --only-media, --since and --until can only be used with --timeline")
+            sys.exit(1)
+
+        if args.slices is not None and (not args.timeline or args.since is None or args.limit is not None):
+            crawler.logger.error("--slices can only be used with --timeline and --since, and not with --limit")
+            sys.exit(1)
+
+        if args.sample is not None and (not args.timeline or args.since is None or args.limit is not None or args.slices is not None):
+            crawler.logger.error("--sample can only be used with --timeline and --since, and not with --limit or --slices")
+            sys.exit(1)
+
+        if args.probe_size is not None and args.sample is None:
+            crawler.logger.error("--probe-size can only be used with --sample")
             sys.exit(1)
 
         if args.only_local and args.only_remote:
             crawler.logger.error("Only one of --only-local, --only-remote can be specified")
             sys.exit(1)
 
-        if args.node_info:
+        if args.pipeline and (not args.timeline or args.limit is not None or args.slices is not None or args.sample is not None or args.normalize):
+            crawler.logger.error("--pipeline can only be used with --timeline, and not with --limit, --slices, --sample or --normalize")
+            sys.exit(1)
+
+        # A daemon keeps the snapshot store itself, and reports when it has none
+        if (args.snapshot or args.as_of) and not ((args.peers or args.blocks or args.activity) and (args.snapshot_dir or isinstance(crawler, CrawlClient))):
+            crawler.logger.error("--snapshot and --as-of can only be used with --peers, --blocks or --activity and --snapshot-dir (or a daemon started with --snapshot-dir)")
+            sys.exit(1)
+
+        if args.snapshot and args.as_of:
+            crawler.logger.error("Only one of --snapshot, --as-of can be specified")
+            sys.exit(1)
+
+        snapshot_kind = 'peers' if args.peers else 'blocks' if args.blocks else 'activity'
+
+        if args.all or args.endpoints:
+            # Each endpoint is saved to its own output file as soon as it is crawled e.g. output-peers.jsonl
+            stem = args.output_file[:-len(".jsonl")]
+            for result in crawler.instance_endpoints(args.instance_url, args.endpoints, args.limit, args.trend_type or "tags", args.fields):
+                if len(result['items']) > 0 and normalizer is not None and result['endpoint'] == 'timeline':
+                    accounts_file = write_normalized_output_files(f"{stem}-timeline.jsonl", result['items'], normalizer)
+                    crawler.logger.info(f"Output of timeline saved to {stem}-timeline.jsonl and {accounts_file}")
+                elif len(result['items']) > 0:
+                    write_output_file(f"{stem}-{result['endpoint']}.jsonl", result['items'])
+                    crawler.logger.info(f"Output of {result['endpoint']} saved to {stem}-{result['endpoint']}.jsonl")
+
+        elif args.node_info:
             items = crawler.instance_nodeinfo(args.instance_url)
 
         elif args.info:
             items = crawler.instance_lookup(args.instance_url)
 
+        elif args.capabilities:
+            items = crawler.instance_capabilities(args.instance_url)
+
+        elif args.snapshot:
+            items = crawler.instance_snapshot(args.instance_url, snapshot_kind)
+
+        elif args.as_of:
+            items = crawler.instance_snapshot_at(args.instance_url, snapshot_kind, args.as_of.date())
+
         elif args.peers:
             items = crawler.instance_peers(args.instance_url)
 
@@ -165,9 +451,9 @@ def main():
                 order = args.order
             
             if args.limit is not None:
-                items = crawler.instance_directory(args.instance_url, args.limit, order, include_remote)
+                items = crawler.instance_directory(args.instance_url, args.limit, order, include_remote, fields=args.fields)
             else:
-                items = crawler.instance_directory_all(args.instance_url, order, include_remote)
+                items = crawler.instance_directory_all(args.instance_url, order, include_remote, fields=args.fields)
 
         elif args.timeline:
             only_local=False
@@ -181,10 +467,16 @@ def main():
             if args.only_media:
                 only_media = True
             
-            if args.limit is not None:
-                items = crawler.instance_timeline(args.instance_url, args.limit, only_local, only_remote, only_media)
+            if args.pipeline:
+                crawler.instance_timeline_to_file(args.instance_url, os.path.abspath(args.output_file), only_local, only_remote, only_media, fields=args.fields, since=args.since, until=args.until)
+            elif args.slices is not None:
+                items = crawler.instance_timeline_sliced(args.instance_url, args.since, args.until, args.slices, only_local, only_remote, only_media, fields=args.fields)
+            elif args.sample is not None:
+                items = crawler.instance_timeline_sample(args.instance_url, args.sample, args.since, args.until, only_local, only_remote, only_media, fields=args.fields, probe_size=args.probe_size)
+            elif args.limit is not None:
+                items = crawler.instance_timeline(args.instance_url, args.limit, only_local, only_remote, only_media, fields=args.fields, since=args.since, until=args.until)
             else:
-                items = crawler.instance_timeline_all(args.instance_url, only_local, only_remote, only_media)
+                items = crawler.instance_timeline_all(args.instance_url, only_local, only_remote, only_media, fields=args.fields, since=args.since, until=args.until)
 
     elif args.command == "user":
         
@@ -196,10 +488,26 @@ def main():
             crawler.logger.error("--limit can only be used with --statuses, --followers, or --following")
             sys.exit(1)
 
-        if (args.only_media or args.exclude_replies or args.exclude_reblogs or args.only_pinned) and not args.statuses:
-            crawler.logger.error("--only-media, --exclude-replies, --exclude-reblogs, and --only-pinned can only be used with --statuses")
+        if args.fields is not None and not (args.statuses or args.followers or args.following):
+            crawler.logger.error("--fields can only be used with --statuses, --followers, or --following")
+            sys.exit(1)
+
+        if args.pipeline and (not args.statuses or args.limit is not None or args.slices is not None or args.only_pinned or args.normalize):
+            crawler.logger.error("--pipeline can only be used with --statuses, and not with --limit, --slices, --only-pinned or --normalize")
+            sys.exit(1)
+
+        if args.edge_store and not (args.followers or args.following):
+            crawler.logger.error("--edge-store can only be used with --followers or --following")
+            sys.exit(1)
+
+        if (args.only_media or args.exclude_replies or args.exclude_reblogs or args.only_pinned or args.since or args.until) and not args.statuses:
+            crawler.logger.error("--only-media, --exclude-replies, --exclude-reblogs, --only-pinned, --since and --until can only be used with --statuses")
             sys.exit(1)
             
+        if args.slices is not None and (not args.statuses or args.since is None or args.limit is not None or args.only_pinned):
+            crawler.logger.error("--slices can only be used with --statuses and --since, and not with --limit or --only-pinned")
+            sys.exit(1)
+
         if args.info:
             items = crawler.user_lookup(args.username)
 
@@ -218,30 +526,90 @@ def main():
             if args.only_pinned:
                 only_pinned = True
                 
-            if args.limit is not None:
-                items = crawler.user_statuses(args.username, args.limit, only_media, exclude_replies, exclude_reblogs, only_pinned)
+            if args.pipeline:
+                crawler.user_statuses_to_file(args.username, os.path.abspath(args.output_file), only_media, exclude_replies, exclude_reblogs, fields=args.fields, since=args.since, until=args.until)
+            elif args.slices is not None:
+                items = crawler.user_statuses_sliced(args.username, args.since, args.until, args.slices, only_media, exclude_replies, exclude_reblogs, fields=args.fields)
+            elif args.limit is not None:
+                items = crawler.user_statuses(args.username, args.limit, only_media, exclude_replies, exclude_reblogs, only_pinned, fields=args.fields, since=args.since, until=args.until)
             else:
-                items = crawler.user_statuses_all(args.username, only_media, exclude_replies, exclude_reblogs, only_pinned)
-
-        elif args.followers:
-            if args.limit is not None:
-                items = crawler.user_followers(args.username, args.limit)
+                items = crawler.user_statuses_all(args.username, only_media, exclude_replies, exclude_reblogs, only_pinned, fields=args.fields, since=args.since, until=args.until)
+
+        elif args.followers or args.following:
+            # The daemon may run in another working directory
+            edge_store = os.path.abspath(args.edge_store) if args.edge_store else None
+
+            if args.followers and args.limit is not None:
+                items = crawler.user_followers(args.username, args.limit, fields=args.fields, edge_store=edge_store)
+            elif args.followers:
+                items = crawler.user_followers_all(args.username, fields=args.fields, edge_store=edge_store)
+            elif args.limit is not None:
+                items = crawler.user_following(args.username, args.limit, fields=args.fields, edge_store=edge_store)
             else:
-                items = crawler.user_followers_all(args.username)
+                items = crawler.user_following_all(args.username, fields=args.fields, edge_store=edge_store)
 
-        elif args.following:
-            if args.limit is not None:
-                items = crawler.user_following(args.username, args.limit)
-            else:
-                items = crawler.user_following_all(args.username)
+            if edge_store:
+                crawler.logger.info(f"Edges saved to {args.edge_store}")
 
     elif args.command == "status":
 
         if args.info:
             items = crawler.status_lookup(args.instance_url, args.status_id)
             
+    elif args.command == "tag":
+
+        items = crawler.tag_timeline_instances(args.instance_url, args.hashtag, args.limit, args.only_local, args.only_media, args.fields, args.since, args.until, args.workers)
+
+    elif args.command == "discover" and args.via_peers:
+
+        if args.bearer_token or args.count or args.include_dead or args.include_down or args.include_closed or args.min_users or args.max_users:
+            crawler.logger.error("--bearer-token, --count, --include-dead, --include-down, --include-closed, --min-users and --max-users cannot be used with --via-peers")
+            sys.exit(1)
+
+        seeds = ['mastodon.social']
+        max_depth = 1
+        max_instances = 0
+        workers = 16
+        bloom_capacity = 0
+
+        if args.seed:
+            seeds = args.seed
+
+        if args.max_depth is not None:
+            max_depth = args.max_depth
+
+        if args.max_instances is not None:
+            max_instances = args.max_instances
+
+        if args.workers is not None:
+            workers = args.workers
+
+        if args.bloom_capacity is not None:
+            bloom_capacity = args.bloom_capacity
+
+        # Stream discovered instances (and peer edges) to disk as they are found
+        records = crawler.discover_instances_via_peers(seeds, max_depth, max_instances, workers, bloom_capacity)
+        edges_file = codecs.open(args.edges_file, 'wb', encoding='utf-8') if args.edges_file else None
+
+        with codecs.open(args.output_file, 'wb', encoding='utf-8') as f:
+            for record in records:
+                if record['type'] == 'instance':
+                    f.write(json.dumps({'instance': record['instance'], 'depth': record['depth']}, ensure_ascii=False) + '\n')
+                elif edges_file is not None:
+                    edges_file.write(json.dumps({'instance': record['instance'], 'peers': record['peers']}, ensure_ascii=False) + '\n')
+
+        if edges_file is not None:
+            edges_file.close()
+            crawler.logger.info(f"Peers saved to {args.edges_file}")
+
+        crawler.logger.info(f"Output saved to {args.output_file}")
+
     elif args.command == "discover":
 
+        if args.seed or args.max_depth is not None or args.max_instances is not None or args.workers is not None or args.bloom_capacity is not None or args.edges_file:
+            crawler.logger.error("--seed, --max-depth, --max-instances, --workers, --bloom-capacity and --edges-file can only be used with --via-peers")
+            sys.exit(1)
+
         instance_social_bearer_token=None
         count=0
         include_dead=False
@@ -274,9 +642,21 @@ def main():
         items = crawler.discover_instances(instance_social_bearer_token, count, include_dead, include_down, include_closed, min_users, max_users)
 
     # Write output to the output file
-    if len(items) > 0:
+    if len(items) > 0 and normalizer is not None:
+        accounts_file = write_normalized_output_files(args.output_file, items, normalizer)
+        crawler.logger.info(f"Output saved to {args.output_file} and {accounts_file}")
+    elif len(items) > 0:
         write_output_file(args.output_file, items)
         crawler.logger.info(f"Output saved to {args.output_file}")
+
+    # Statuses are recorded as seen only once they have been saved, so an interrupted run does not lose them
+    if args.dedup_index and not isinstance(crawler, CrawlClient):
+        crawler.status_index.flush()
+
+    # Wait for media downloads started during the crawl
+    if args.media_dir and not isinstance(crawler, CrawlClient):
+        crawler.media.close()
+        crawler.logger.info(f"Media saved to {args.media_dir}")
         
 
 if __name__ == "__main__":
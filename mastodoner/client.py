@@ -0,0 +1,71 @@
+import json
+import logging
+import os
+import socket
+from datetime import date, datetime
+
+DEFAULT_SOCKET_PATH = os.getenv('MASTODONER_SOCKET', os.path.join(os.path.expanduser("~"), ".mastodoner.sock"))
+
+def encode_value(value):
+    # Datetimes and dates (e.g. since, until, as-of) cross the socket as tagged ISO-8601 strings
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} cannot be sent to the daemon")
+
+def decode_value(value):
+    if len(value) == 1 and '$datetime' in value:
+        return datetime.fromisoformat(value['$datetime'])
+    if len(value) == 1 and '$date' in value:
+        return date.fromisoformat(value['$date'])
+    return value
+
+class CrawlClient:
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH):
+        # Configure logging
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
+        # Check if socket_path is a string
+        if not isinstance(socket_path, str):
+            raise ValueError("Invalid value for 'socket_path'. It must be a string.")
+
+        self.socket_path = socket_path
+
+    def submit(self, method, *args, **kwargs):
+
+        # Check if method is a string
+        if not isinstance(method, str) or method.startswith('_'):
+            raise ValueError("Invalid value for 'method'. It must be the name of a public Crawler method.")
+
+        # Arguments are checked when called; the job is sent as the results are iterated
+        return self._submit(method, {'method': method, 'args': list(args), 'kwargs': kwargs})
+
+    def _submit(self, method, job):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(job, ensure_ascii=False, default=encode_value) + '\n').encode('utf-8'))
+
+            with sock.makefile('r', encoding='utf-8') as stream:
+                for line in stream:
+                    message = json.loads(line)
+
+                    if 'item' in message:
+                        yield message['item']
+                    elif 'error' in message:
+                        raise ValueError(message['error'])
+                    elif 'done' in message:
+                        return
+
+        raise ConnectionError(f"Connection to mastodoner daemon at {self.socket_path} closed before job {method} finished")
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        # Proxy Crawler methods to the daemon so callers can use the client as a drop-in Crawler
+        def call(*args, **kwargs):
+            return list(self.submit(name, *args, **kwargs))
+
+        return call
@@ -0,0 +1,133 @@
+import hashlib
+import heapq
+import json
+import logging
+import os
+import shutil
+import tempfile
+from mastodoner.offsets import record_host as _record_host
+
+logger = logging.getLogger(__name__)
+
+def _sort_key(record, host, line):
+    # (host, id) with numeric IDs in numeric order; records without an ID are deduplicated by content
+    if isinstance(record, dict) and 'id' in record:
+        item_id = str(record['id'])
+        return _record_host(record, host), f"{len(item_id):04d}{item_id}"
+    return '', hashlib.blake2b(line, digest_size=16).hexdigest()
+
+def _write_run(entries, temp_dir):
+    # Sorted by key, newest (highest sequence number) first among duplicates
+    entries.sort(key=lambda entry: (entry[0], entry[1], -entry[2]))
+    fd, path = tempfile.mkstemp(suffix='.run', dir=temp_dir)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        for host, key, sequence, line in entries:
+            f.write(f"{host}\t{key}\t{sequence}\t{line}\n")
+    return path
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            host, key, sequence, record = line.rstrip('\n').split('\t', 3)
+            yield host, key, -int(sequence), record
+
+def _merge_runs(paths):
+    return heapq.merge(*[_read_run(path) for path in paths])
+
+def compact_outputs(input_files, output_prefix, host=None, chunk_size=500000, shard_size=1000000, fan_in=64, temp_dir=None):
+
+    # Check if input_files is a list of strings
+    if not isinstance(input_files, list) or not input_files or not all(isinstance(input_file, str) for input_file in input_files):
+        raise ValueError("Invalid value for 'input_files'. It must be a non-empty list of strings.")
+
+    # Check if host is a string or a dict mapping input files to hosts
+    if host is not None and not isinstance(host, (str, dict)):
+        raise ValueError("Invalid value for 'host'. It must be a string or a dict mapping input files to hosts.")
+
+    # Check if output_prefix is a string
+    if not isinstance(output_prefix, str):
+        raise ValueError("Invalid value for 'output_prefix'. It must be a string.")
+
+    # Check if chunk_size is an integer and positive
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError("Invalid value for 'chunk_size'. It must be a positive integer.")
+
+    # Check if shard_size is an integer and positive
+    if not isinstance(shard_size, int) or shard_size < 1:
+        raise ValueError("Invalid value for 'shard_size'. It must be a positive integer.")
+
+    # Check if fan_in is an integer greater than 1
+    if not isinstance(fan_in, int) or fan_in < 2:
+        raise ValueError("Invalid value for 'fan_in'. It must be an integer greater than 1.")
+
+    work_dir = tempfile.mkdtemp(prefix='mastodoner-compact-', dir=temp_dir)
+    try:
+        # Split the inputs into sorted runs of at most chunk_size records. Later files and lines are newer
+        runs = []
+        entries = []
+        records = 0
+        for input_file in input_files:
+            file_host = host.get(input_file) if isinstance(host, dict) else host
+            with open(input_file, 'rb') as f:
+                for line in f:
+                    line = line.rstrip(b'\r\n')
+                    if not line:
+                        continue
+                    record_host, key = _sort_key(json.loads(line), file_host, line)
+
+                    # Records of different instances can share an ID, so they can only be merged when their instance is known
+                    if record_host is None:
+                        if len(input_files) > 1:
+                            raise ValueError(f"Cannot tell which instance the records of {input_file} were crawled from. Pass the host of each input file.")
+                        record_host = ''
+                    entries.append((record_host, key, records, line.decode('utf-8')))
+                    records += 1
+                    if len(entries) >= chunk_size:
+                        runs.append(_write_run(entries, work_dir))
+                        entries = []
+            logger.info(f"Read {records} records from {input_file}")
+
+        if entries:
+            runs.append(_write_run(entries, work_dir))
+            entries = []
+
+        # Merge runs fan_in at a time until a single merge can produce the output
+        while len(runs) > fan_in:
+            merged = []
+            for i in range(0, len(runs), fan_in):
+                fd, path = tempfile.mkstemp(suffix='.run', dir=work_dir)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    for record_host, key, sequence, record in _merge_runs(runs[i:i + fan_in]):
+                        f.write(f"{record_host}\t{key}\t{-sequence}\t{record}\n")
+                for run in runs[i:i + fan_in]:
+                    os.remove(run)
+                merged.append(path)
+            runs = merged
+
+        # Keep the newest record of each key, writing shards of at most shard_size records
+        shards = []
+        unique = 0
+        shard = None
+        previous = None
+        for record_host, key, sequence, record in _merge_runs(runs):
+            if (record_host, key) == previous:
+                continue
+            previous = (record_host, key)
+
+            if unique % shard_size == 0:
+                if shard is not None:
+                    shard.close()
+                shards.append(f"{output_prefix}-{len(shards):05d}.jsonl")
+                shard = open(shards[-1], 'w', encoding='utf-8')
+
+            shard.write(record + '\n')
+            unique += 1
+
+        if shard is not None:
+            shard.close()
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    logger.info(f"Compacted {records} records into {unique} unique records in {len(shards)} shards")
+    return {'records': records, 'unique': unique, 'shards': shards}
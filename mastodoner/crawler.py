@@ -1,17 +1,115 @@
+import itertools
 import logging
+import random
+import threading
 import time
-import requests
 import os
-from datetime import datetime
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, quote, urlsplit
+from mastodoner.capabilities import DEFAULT_INSTANCE_ENDPOINTS, DEFAULT_PAGE_SIZES, INSTANCE_ENDPOINTS, SNOWFLAKE_ID_SOFTWARE, build_capabilities
+from mastodoner.dedup import StatusIndex
+from mastodoner.discovery import DomainSet, normalize_domain
+from mastodoner.edges import EdgeStore
+from mastodoner.filters import StatusFilter
+from mastodoner.media import MediaDownloader
+from mastodoner.pipeline import Pipeline
+from mastodoner.projection import compile_fields, project, project_items
+from mastodoner.snapshots import SNAPSHOT_KINDS, SnapshotStore
+from mastodoner.snowflake import datetime_to_snowflake, parse_created_at, snowflake_to_datetime, to_utc, within_window
+from mastodoner.trace import Tracer
+from mastodoner.health import HealthCheckedSession, HostHealth
+from mastodoner.http2 import HTTP2Adapter
+from mastodoner.resolver import Resolver, ResolvingAdapter
+
+# Concurrent slices per host. The rate-limit check pauses when fewer than 5 requests remain, so this many in-flight requests cannot exhaust the budget
+MAX_SLICE_WORKERS = 4
 
 class Crawler:
-    def __init__(self):
+    def __init__(self, probe_capabilities=True, capability_ttl=86400, connect_timeout=5, read_timeout=60, health_file=None, failure_threshold=3, recovery_timeout=300, status_index_file=None, status_references=False, media_dir=None, media_workers=8, media_bandwidth=None, snapshot_dir=None, trace_file=None, http2=False, status_filter=None):
         # Configure logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
+        # Check if probe_capabilities is a boolean
+        if not isinstance(probe_capabilities, bool):
+            raise ValueError("Invalid value for 'probe_capabilities'. It must be a boolean.")
+
+        # Check if capability_ttl is a number and non-negative
+        if not isinstance(capability_ttl, (int, float)) or capability_ttl < 0:
+            raise ValueError("Invalid value for 'capability_ttl'. It must be a non-negative number.")
+
+        # Check if connect_timeout is a number and positive
+        if not isinstance(connect_timeout, (int, float)) or connect_timeout <= 0:
+            raise ValueError("Invalid value for 'connect_timeout'. It must be a positive number.")
+
+        # Check if read_timeout is a number and positive
+        if not isinstance(read_timeout, (int, float)) or read_timeout <= 0:
+            raise ValueError("Invalid value for 'read_timeout'. It must be a positive number.")
+
+        # Check if http2 is a boolean
+        if not isinstance(http2, bool):
+            raise ValueError("Invalid value for 'http2'. It must be a boolean.")
+
+        # Check if status_filter is a StatusFilter
+        if status_filter is not None and not isinstance(status_filter, StatusFilter):
+            raise ValueError("Invalid value for 'status_filter'. It must be a StatusFilter.")
+
+        # Rate-limit state and capabilities are shared by every thread using the crawler
+        self.lock = threading.Lock()
+        self.probe_locks = {}
         self.rate_limits = {}
 
+        # Capabilities (software, page sizes, unsupported endpoints) of each instance, probed once per capability_ttl seconds
+        self.probe_capabilities = probe_capabilities
+        self.capability_ttl = capability_ttl
+        self.capabilities = {}
+
+        # Check if status_references is a boolean
+        if not isinstance(status_references, bool):
+            raise ValueError("Invalid value for 'status_references'. It must be a boolean.")
+
+        # Unreachable hosts fail on the short connect timeout, hanging hosts on the read timeout
+        self.timeout = (connect_timeout, read_timeout)
+
+        # Per-host circuit breaker, optionally persisted so later runs skip recently dead hosts
+        self.health = HostHealth(health_file, failure_threshold, recovery_timeout)
+
+        # Keep each status (identified by its canonical URI) once across runs and instances, optionally replacing later copies by references
+        self.status_index = StatusIndex(status_index_file) if status_index_file is not None else None
+        self.status_references = status_references
+
+        # Optionally drop statuses not matching the keywords, languages, media or visibility while crawling, before they are kept or written
+        self.status_filter = status_filter
+
+        # Cache DNS answers (including failures) so each host is resolved once per TTL
+        self.resolver = Resolver()
+
+        # Delta-encoded daily snapshots of instance peers, blocks and activity
+        self.snapshots = SnapshotStore(snapshot_dir) if snapshot_dir is not None else None
+
+        # Optionally record a timing span (DNS, connect, time to first byte, body, JSON decode, rate-limit wait) for every request
+        self.tracer = Tracer(trace_file) if trace_file is not None else None
+
+        # Reuse pooled connections across requests to the same instance
+        self.session = HealthCheckedSession(self.health, self.tracer)
+        self.session.mount('https://', ResolvingAdapter(self.resolver))
+        self.session.mount('http://', ResolvingAdapter(self.resolver))
+
+        # Optionally multiplex concurrent requests to each instance over one HTTP/2 connection, falling back to HTTP/1.1 without httpx
+        if http2:
+            try:
+                self.session.mount('https://', HTTP2Adapter())
+
+                # httpx resolves and connects on its own: the DNS cache and the dns and connect phases of traces only cover plain HTTP
+                self.logger.warning("HTTP/2 is enabled: HTTPS requests bypass the DNS cache and traces do not time their dns and connect phases")
+            except ImportError:
+                self.logger.warning("HTTP/2 requires the optional 'httpx[http2]' dependency (pip install mastodoner[http2]), falling back to HTTP/1.1")
+
+        # Download media attachments of crawled statuses in the background, stored once per content hash
+        self.media = MediaDownloader(media_dir, self.session, self.timeout, media_workers, media_bandwidth) if media_dir is not None else None
+
     def discover_instances(self, instance_social_bearer_token=None, count=0, include_dead=False, include_down=False, include_closed=False, min_users=0, max_users=0):
 
         bearer_token = None
@@ -58,7 +156,7 @@ class Crawler:
 
         try:
             headers = {"Authorization": "Bearer " + bearer_token}
-            response = requests.get(f"https://instances.social/api/1.0/instances/list?count={count}&include_dead={include_dead}&include_down={include_down}&include_closed={include_closed}&min_users={min_users}&max_users={max_users}", headers=headers, timeout=120)
+            response = self.session.get(f"https://instances.social/api/1.0/instances/list?count={count}&include_dead={include_dead}&include_down={include_down}&include_closed={include_closed}&min_users={min_users}&max_users={max_users}", headers=headers, timeout=self.timeout)
 
             if response.status_code == 200:
                 instances = response.json()['instances']
@@ -73,6 +171,103 @@ class Crawler:
             self.logger.error(f"Error occurred while discovering instances: {str(e)}")
             return []
 
+    def discover_instances_via_peers(self, seed_urls, max_depth=1, max_instances=0, workers=16, bloom_capacity=0):
+
+        # Check if seed_urls is a list of strings
+        if not isinstance(seed_urls, list) or not seed_urls or not all(isinstance(seed_url, str) for seed_url in seed_urls):
+            raise ValueError("Invalid value for 'seed_urls'. It must be a non-empty list of strings.")
+
+        # Check if max_depth is an integer and positive
+        if not isinstance(max_depth, int) or max_depth < 1:
+            raise ValueError("Invalid value for 'max_depth'. It must be a positive integer.")
+
+        # Check if max_instances is an integer and non-negative
+        if not isinstance(max_instances, int) or max_instances < 0:
+            raise ValueError("Invalid value for 'max_instances'. It must be a non-negative integer.")
+
+        # Check if workers is an integer and positive
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("Invalid value for 'workers'. It must be a positive integer.")
+
+        # Arguments are checked when called; the crawl itself runs as the results are iterated
+        return self._discover_instances_via_peers(seed_urls, max_depth, max_instances, workers, DomainSet(bloom_capacity))
+
+    def _discover_instances_via_peers(self, seed_urls, max_depth, max_instances, workers, seen):
+        frontier = []
+
+        for seed_url in seed_urls:
+            domain = normalize_domain(seed_url)
+            if domain is not None and seen.add(domain):
+                frontier.append(domain)
+                yield {'type': 'instance', 'instance': domain, 'depth': 0}
+
+        depth = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while frontier and depth < max_depth:
+                next_frontier = []
+                hosts = iter(frontier)
+                resolved = deque()
+                in_flight = {}
+
+                while True:
+                    # Keep a bounded number of requests in flight, resolving hosts in chunks just ahead of them
+                    while len(in_flight) < workers * 2:
+                        if not resolved:
+                            chunk = list(itertools.islice(hosts, 1000))
+                            if not chunk:
+                                break
+                            # Dead hosts last, so their timeouts do not hold up healthy ones
+                            resolved.extend(self.health.prioritize(self.resolve_instances(chunk, workers)))
+                            continue
+
+                        # Probing every new host would cost two extra requests each: a host without peers answers 404 and is remembered instead
+                        host = resolved.popleft()
+                        in_flight[executor.submit(self.instance_peers, host, False)] = host
+
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        host = in_flight.pop(future)
+                        result = future.result()
+
+                        peers = []
+                        if result and isinstance(result[0]['peers'], list):
+                            for peer in result[0]['peers']:
+                                domain = normalize_domain(peer)
+                                if domain is None:
+                                    continue
+                                peers.append(domain)
+
+                                if max_instances > 0 and len(seen) >= max_instances:
+                                    continue
+
+                                if seen.add(domain):
+                                    yield {'type': 'instance', 'instance': domain, 'depth': depth + 1}
+                                    # Hosts on the last level are only recorded, never crawled
+                                    if depth + 1 < max_depth:
+                                        next_frontier.append(domain)
+
+                        yield {'type': 'peers', 'instance': host, 'peers': peers}
+
+                self.logger.info(f"Discovered {len(seen)} instances after crawling peers up to depth {depth + 1}.")
+                frontier = next_frontier
+                depth += 1
+
+    def resolve_instances(self, instance_urls, workers=64, timeout=None):
+
+        # Check if instance_urls is a list of strings
+        if not isinstance(instance_urls, list) or not all(isinstance(instance_url, str) for instance_url in instance_urls):
+            raise ValueError("Invalid value for 'instance_urls'. It must be a list of strings.")
+
+        # Resolve all instances concurrently and keep only those that resolve
+        addresses = self.resolver.resolve_many(instance_urls, workers, timeout)
+        resolvable = [instance_url for instance_url in instance_urls if addresses[instance_url.lower().rstrip('.')]]
+
+        self.logger.info(f"Resolved {len(resolvable)} of {len(instance_urls)} instances, dropped {len(instance_urls) - len(resolvable)} unresolvable instances.")
+        return resolvable
+
     def instance_nodeinfo(self, instance_url):
 
         # Check if instance_url is a string
@@ -80,7 +275,7 @@ class Crawler:
             raise ValueError("Invalid value for 'instance_url'. It must be a string.")
         
         try:
-            response = requests.get(f"https://{instance_url}/nodeinfo/2.0", timeout=120)
+            response = self.session.get(f"https://{instance_url}/nodeinfo/2.0", timeout=self.timeout)
     
             if response.status_code == 200:
                 self.logger.info(f"Crawled node information of instance {instance_url}.")
@@ -101,19 +296,11 @@ class Crawler:
         
         try:            
             # Check rate limit for this instance
-            remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-            if remaining_requests is not None and remaining_requests < 5:
-                wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                if wait_time > 0:
-                    self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                    time.sleep(wait_time)
+            self._wait_for_rate_limit(instance_url)
     
-            response = requests.get(f"https://{instance_url}/api/v2/instance", timeout=120)
+            response = self.session.get(f"https://{instance_url}/api/v2/instance", timeout=self.timeout)
                 
-            remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-            reset_time_str = response.headers.get('X-RateLimit-Reset')
-            reset_time = datetime.fromisoformat(reset_time_str[:-1])
-            self.rate_limits[instance_url] = (remaining_requests, reset_time)
+            self._record_rate_limit(instance_url, response)
     
             if response.status_code == 200:
                 self.logger.info(f"Crawled information of instance {instance_url}.")
@@ -126,33 +313,62 @@ class Crawler:
             self.logger.error(f"Error occurred while crawling information of instance {instance_url}: {str(e)}")
             return []    
 
-    def instance_peers(self, instance_url):
+    def instance_capabilities(self, instance_url, refresh=False):
+
+        # Check if instance_url is a string
+        if not isinstance(instance_url, str):
+            raise ValueError("Invalid value for 'instance_url'. It must be a string.")
+
+        # Check if refresh is a boolean
+        if not isinstance(refresh, bool):
+            raise ValueError("Invalid value for 'refresh'. It must be a boolean.")
+
+        # Threads crawling the same instance wait for a single probe
+        with self.lock:
+            probe_lock = self.probe_locks.setdefault(instance_url, threading.Lock())
+
+        with probe_lock:
+            # Reuse cached capabilities until they expire
+            capabilities = self.capabilities.get(instance_url)
+            if capabilities is not None and not refresh and time.time() - capabilities['probed_at'] < self.capability_ttl:
+                return [capabilities]
+
+            nodeinfo = self.instance_nodeinfo(instance_url)
+            instance = self.instance_lookup(instance_url)
+
+            capabilities = build_capabilities(nodeinfo[0] if nodeinfo else None, instance[0] if instance else None)
+            self.capabilities[instance_url] = capabilities
+            self.logger.info(f"Probed capabilities of instance {instance_url}: software {capabilities['software']} {capabilities['version']}")
+            return [capabilities]
+
+    def instance_peers(self, instance_url, probe=True):
 
         # Check if instance_url is a string
         if not isinstance(instance_url, str):
             raise ValueError("Invalid value for 'instance_url'. It must be a string.")
+
+        # Check if probe is a boolean
+        if not isinstance(probe, bool):
+            raise ValueError("Invalid value for 'probe'. It must be a boolean.")
         
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'peers', probe):
+            return []
+
         try:            
             # Check rate limit for this instance
-            remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-            if remaining_requests is not None and remaining_requests < 5:
-                wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                if wait_time > 0:
-                    self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                    time.sleep(wait_time)
+            self._wait_for_rate_limit(instance_url)
     
-            response = requests.get(f"https://{instance_url}/api/v1/instance/peers", timeout=120)
+            response = self.session.get(f"https://{instance_url}/api/v1/instance/peers", timeout=self.timeout)
                 
-            remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-            reset_time_str = response.headers.get('X-RateLimit-Reset')
-            reset_time = datetime.fromisoformat(reset_time_str[:-1])
-            self.rate_limits[instance_url] = (remaining_requests, reset_time)
+            self._record_rate_limit(instance_url, response)
     
             if response.status_code == 200:
                 self.logger.info(f"Crawled peers of instance {instance_url}.")
                 return [{'peers': response.json()}]
             else:
                 self.logger.error(f"Failed to fetch peers of instance {instance_url}. Status code: {response.status_code}")
+                self._endpoint_failed(instance_url, 'peers', response.status_code)
                 return []
     
         except Exception as e:
@@ -165,60 +381,95 @@ class Crawler:
         if not isinstance(instance_url, str):
             raise ValueError("Invalid value for 'instance_url'. It must be a string.")
         
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'activity'):
+            return []
+
         try:            
             # Check rate limit for this instance
-            remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-            if remaining_requests is not None and remaining_requests < 5:
-                wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                if wait_time > 0:
-                    self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                    time.sleep(wait_time)
+            self._wait_for_rate_limit(instance_url)
     
-            response = requests.get(f"https://{instance_url}/api/v1/instance/activity", timeout=120)
+            response = self.session.get(f"https://{instance_url}/api/v1/instance/activity", timeout=self.timeout)
                 
-            remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-            reset_time_str = response.headers.get('X-RateLimit-Reset')
-            reset_time = datetime.fromisoformat(reset_time_str[:-1])
-            self.rate_limits[instance_url] = (remaining_requests, reset_time)
+            self._record_rate_limit(instance_url, response)
     
             if response.status_code == 200:
                 self.logger.info(f"Crawled activity of instance {instance_url}.")
                 return response.json()
             else:
                 self.logger.error(f"Failed to fetch activity of instance {instance_url}. Status code: {response.status_code}")
+                self._endpoint_failed(instance_url, 'activity', response.status_code)
                 return []
     
         except Exception as e:
             self.logger.error(f"Error occurred while crawling activity of instance {instance_url}: {str(e)}")
             return []
 
+    def instance_snapshot(self, instance_url, kind, date=None):
+
+        # Check if a snapshot store is configured
+        if self.snapshots is None:
+            raise ValueError("Snapshots require a snapshot directory. Pass 'snapshot_dir' to the Crawler.")
+
+        # Check if kind is a valid snapshot kind
+        if kind not in SNAPSHOT_KINDS:
+            raise ValueError(f"Invalid value for 'kind'. It must be one of {', '.join(SNAPSHOT_KINDS)}.")
+
+        if kind == 'peers':
+            peers = self.instance_peers(instance_url)
+            entries = peers[0]['peers'] if peers else []
+        elif kind == 'blocks':
+            entries = self.instance_blocks(instance_url)
+        else:
+            entries = self.instance_activity(instance_url)
+
+        # An empty response cannot be told apart from a failed crawl, and saving it would remove every entry
+        if not entries:
+            self.logger.error(f"No {kind} crawled for instance {instance_url}, snapshot not saved.")
+            return []
+
+        summary = self.snapshots.save(kind, instance_url, entries, date)
+        self.logger.info(f"Saved {kind} snapshot of instance {instance_url}: {summary['added']} added, {summary['removed']} removed")
+        return [summary]
+
+    def instance_snapshot_at(self, instance_url, kind, date=None):
+
+        # Check if a snapshot store is configured
+        if self.snapshots is None:
+            raise ValueError("Snapshots require a snapshot directory. Pass 'snapshot_dir' to the Crawler.")
+
+        entries = self.snapshots.load(kind, instance_url, date)
+        self.logger.info(f"Rebuilt {kind} of instance {instance_url} from snapshots ({len(entries)} entries)")
+
+        # Same shape as the crawled response
+        if kind == 'peers':
+            return [{'peers': entries}] if entries else []
+        return entries
+
     def instance_rules(self, instance_url):
 
         # Check if instance_url is a string
         if not isinstance(instance_url, str):
             raise ValueError("Invalid value for 'instance_url'. It must be a string.")
         
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'rules'):
+            return []
+
         try:            
             # Check rate limit for this instance
-            remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-            if remaining_requests is not None and remaining_requests < 5:
-                wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                if wait_time > 0:
-                    self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                    time.sleep(wait_time)
+            self._wait_for_rate_limit(instance_url)
     
-            response = requests.get(f"https://{instance_url}/api/v1/instance/rules", timeout=120)
+            response = self.session.get(f"https://{instance_url}/api/v1/instance/rules", timeout=self.timeout)
                 
-            remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-            reset_time_str = response.headers.get('X-RateLimit-Reset')
-            reset_time = datetime.fromisoformat(reset_time_str[:-1])
-            self.rate_limits[instance_url] = (remaining_requests, reset_time)
+            self._record_rate_limit(instance_url, response)
     
             if response.status_code == 200:
                 self.logger.info(f"Crawled rules of instance {instance_url}.")
                 return response.json()
             else:
                 self.logger.error(f"Failed to fetch rules of instance {instance_url}. Status code: {response.status_code}")
+                self._endpoint_failed(instance_url, 'rules', response.status_code)
                 return []
     
         except Exception as e:
@@ -231,33 +482,74 @@ class Crawler:
         if not isinstance(instance_url, str):
             raise ValueError("Invalid value for 'instance_url'. It must be a string.")
         
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'blocks'):
+            return []
+
         try:            
             # Check rate limit for this instance
-            remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-            if remaining_requests is not None and remaining_requests < 5:
-                wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                if wait_time > 0:
-                    self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                    time.sleep(wait_time)
+            self._wait_for_rate_limit(instance_url)
     
-            response = requests.get(f"https://{instance_url}/api/v1/instance/domain_blocks", timeout=120)
+            response = self.session.get(f"https://{instance_url}/api/v1/instance/domain_blocks", timeout=self.timeout)
                 
-            remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-            reset_time_str = response.headers.get('X-RateLimit-Reset')
-            reset_time = datetime.fromisoformat(reset_time_str[:-1])
-            self.rate_limits[instance_url] = (remaining_requests, reset_time)
+            self._record_rate_limit(instance_url, response)
     
             if response.status_code == 200:
                 self.logger.info(f"Crawled instance(s) blocked by instance {instance_url}.")
                 return response.json()
             else:
                 self.logger.error(f"Failed to fetch instance(s) blocked by instance {instance_url}. Status code: {response.status_code}")
+                self._endpoint_failed(instance_url, 'blocks', response.status_code)
                 return []
     
         except Exception as e:
             self.logger.error(f"Error occurred while crawling instance(s) blocked by instance {instance_url}: {str(e)}")
             return []    
 
+    def instance_endpoints(self, instance_url, endpoints=None, max_limit=None, trend_type='tags', fields=None):
+
+        # Check if instance_url is a string
+        if not isinstance(instance_url, str):
+            raise ValueError("Invalid value for 'instance_url'. It must be a string.")
+
+        # Check if endpoints is a list of instance endpoints
+        if endpoints is not None and (not isinstance(endpoints, list) or not endpoints or not all(endpoint in INSTANCE_ENDPOINTS for endpoint in endpoints)):
+            raise ValueError(f"Invalid value for 'endpoints'. It must be a non-empty list of {', '.join(INSTANCE_ENDPOINTS)}.")
+
+        # Check if max_limit is an integer and positive
+        if max_limit is not None and (not isinstance(max_limit, int) or max_limit < 1):
+            raise ValueError("Invalid value for 'max_limit'. It must be a positive integer.")
+
+        endpoints = list(dict.fromkeys(endpoints or DEFAULT_INSTANCE_ENDPOINTS))
+
+        # Arguments are checked when called; the endpoints are crawled as the results are iterated
+        return self._instance_endpoints(instance_url, endpoints, max_limit, trend_type, fields)
+
+    def _instance_endpoints(self, instance_url, endpoints, max_limit, trend_type, fields):
+        crawls = {
+            'node-info': lambda: self.instance_nodeinfo(instance_url),
+            'info': lambda: self.instance_lookup(instance_url),
+            'peers': lambda: self.instance_peers(instance_url),
+            'activity': lambda: self.instance_activity(instance_url),
+            'rules': lambda: self.instance_rules(instance_url),
+            'blocks': lambda: self.instance_blocks(instance_url),
+            'trends': lambda: self.instance_trends(instance_url, max_limit, trend_type) if max_limit is not None else self.instance_trends_all(instance_url, trend_type),
+            'directory': lambda: self.instance_directory(instance_url, max_limit, fields=fields) if max_limit is not None else self.instance_directory_all(instance_url, fields=fields),
+            'timeline': lambda: self.instance_timeline(instance_url, max_limit, fields=fields) if max_limit is not None else self.instance_timeline_all(instance_url, fields=fields),
+        }
+
+        # Probe the instance once before the endpoints run concurrently
+        if self.probe_capabilities:
+            self.instance_capabilities(instance_url)
+
+        # All endpoints share the pooled session and rate-limit state; each result is yielded as soon as it is complete
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+            futures = {executor.submit(self._bind(crawls[endpoint])): endpoint for endpoint in endpoints}
+            for future in as_completed(futures):
+                yield {'endpoint': futures[future], 'items': future.result()}
+
+        self.logger.info(f"Crawled {len(endpoints)} endpoints of instance {instance_url}")
+
     def instance_trends_all(self, instance_url, trend_type='tags'):
 
         # Check if instance_url is a string
@@ -268,36 +560,35 @@ class Crawler:
         if trend_type not in ['tags', 'statuses', 'links']:
             raise ValueError("Invalid value for 'trend_type'. It must be 'tags', 'statuses' or 'links'.")
         
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'trends'):
+            return []
+
+        page_size = self._page_size(instance_url, 'trends')
+
         instance_tags = []
         offset = 0
         while True:
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
-
-                response = requests.get(f"https://{instance_url}/api/v1/trends/{trend_type}?limit=20&offset={offset}", timeout=120)
+                self._wait_for_rate_limit(instance_url)
+
+                response = self.session.get(f"https://{instance_url}/api/v1/trends/{trend_type}?limit={page_size}&offset={offset}", timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
 
                 if response.status_code == 200:
                     tags = response.json()
                     instance_tags.extend(tags)
-                    if len(tags) < 20:
+                    if len(tags) < page_size:
                         self.logger.info(f"Crawled {len(instance_tags)} trending {trend_type} from the instance {instance_url}")
                         return instance_tags
                     else:
                         self.logger.info(f"Crawled {len(instance_tags)} trending {trend_type} from the instance {instance_url}")
-                        offset += 20
+                        offset += page_size
                 else:
                     self.logger.error(f"Failed to fetch trending {trend_type} from the instance {instance_url}. Status code: {response.status_code}")
+                    self._endpoint_failed(instance_url, 'trends', response.status_code)
                     return instance_tags
 
             except Exception as e:
@@ -318,26 +609,24 @@ class Crawler:
         if trend_type not in ['tags', 'statuses', 'links']:
             raise ValueError("Invalid value for 'trend_type'. It must be 'tags', 'statuses' or 'links'.")
         
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'trends'):
+            return []
+
+        page_size = self._page_size(instance_url, 'trends')
+
         instance_tags = []
         offset = 0
         items_crawled = 0
         while items_crawled < max_limit:
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
-
-                limit = min((max_limit - items_crawled), 20)
-                response = requests.get(f"https://{instance_url}/api/v1/trends/{trend_type}?limit={limit}&offset={offset}", timeout=120)
+                self._wait_for_rate_limit(instance_url)
+
+                limit = min((max_limit - items_crawled), page_size)
+                response = self.session.get(f"https://{instance_url}/api/v1/trends/{trend_type}?limit={limit}&offset={offset}", timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
 
                 if response.status_code == 200:
                     tags = response.json()
@@ -351,6 +640,7 @@ class Crawler:
                         offset += limit
                 else:
                     self.logger.error(f"Failed to fetch trending {trend_type} from the instance {instance_url}. Status code: {response.status_code}")
+                    self._endpoint_failed(instance_url, 'trends', response.status_code)
                     return instance_tags
 
             except Exception as e:
@@ -359,7 +649,7 @@ class Crawler:
         
         return instance_tags    
                 
-    def instance_directory_all(self, instance_url, order='active', include_remote=False):
+    def instance_directory_all(self, instance_url, order='active', include_remote=False, fields=None):
 
         # Check if instance_url is a string
         if not isinstance(instance_url, str):
@@ -373,6 +663,15 @@ class Crawler:
         if not isinstance(include_remote, bool):
             raise ValueError("Invalid value for 'include_remote'. It must be a boolean.")
         
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'directory'):
+            return []
+
+        page_size = self._page_size(instance_url, 'accounts')
+
         local='true'
         if include_remote:
             local='false'
@@ -382,38 +681,31 @@ class Crawler:
         while True:
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
-
-                response = requests.get(f"https://{instance_url}/api/v1/directory?local={local}&order={order}&limit=80&offset={offset}", timeout=120)
+                self._wait_for_rate_limit(instance_url)
+
+                response = self.session.get(f"https://{instance_url}/api/v1/directory?local={local}&order={order}&limit={page_size}&offset={offset}", timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
 
                 if response.status_code == 200:
                     users = response.json()
-                    instance_directory.extend(users)
-                    if len(users) < 80:
+                    instance_directory.extend(project_items(users, fields))
+                    if len(users) < page_size:
                         self.logger.info(f"Crawled {len(instance_directory)} users from the directory of instance {instance_url}")
                         return instance_directory
                     else:
                         self.logger.info(f"Crawled {len(instance_directory)} users from the directory of instance {instance_url}")
-                        offset += 80
+                        offset += page_size
                 else:
                     self.logger.error(f"Failed to fetch directory of instance {instance_url}. Status code: {response.status_code}")
+                    self._endpoint_failed(instance_url, 'directory', response.status_code)
                     return instance_directory
 
             except Exception as e:
                 self.logger.error(f"Error occurred while crawling directory of instance {instance_url}: {str(e)}")
                 return instance_directory
 
-    def instance_directory(self, instance_url, max_limit, order='active', include_remote=False):
+    def instance_directory(self, instance_url, max_limit, order='active', include_remote=False, fields=None):
 
         # Check if instance_url is a string
         if not isinstance(instance_url, str):
@@ -431,6 +723,15 @@ class Crawler:
         if not isinstance(include_remote, bool):
             raise ValueError("Invalid value for 'include_remote'. It must be a boolean.")
         
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'directory'):
+            return []
+
+        page_size = self._page_size(instance_url, 'accounts')
+
         local='true'
         if include_remote:
             local='false'
@@ -441,24 +742,16 @@ class Crawler:
         while items_crawled < max_limit:
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
-
-                limit = min((max_limit - items_crawled), 80)
-                response = requests.get(f"https://{instance_url}/api/v1/directory?local={local}&order={order}&limit={limit}&offset={offset}", timeout=120)
+                self._wait_for_rate_limit(instance_url)
+
+                limit = min((max_limit - items_crawled), page_size)
+                response = self.session.get(f"https://{instance_url}/api/v1/directory?local={local}&order={order}&limit={limit}&offset={offset}", timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
 
                 if response.status_code == 200:
                     users = response.json()
-                    instance_directory.extend(users)
+                    instance_directory.extend(project_items(users, fields))
                     items_crawled += len(users)
                     if len(users) < limit:
                         self.logger.info(f"Crawled {len(instance_directory)} users from the directory of instance {instance_url}")
@@ -468,6 +761,7 @@ class Crawler:
                         offset += limit
                 else:
                     self.logger.error(f"Failed to fetch directory of instance {instance_url}. Status code: {response.status_code}")
+                    self._endpoint_failed(instance_url, 'directory', response.status_code)
                     return instance_directory
 
             except Exception as e:
@@ -476,7 +770,7 @@ class Crawler:
         
         return instance_directory
 
-    def instance_timeline_all(self, instance_url, only_local=False, only_remote=False, only_media=False):
+    def instance_timeline_all(self, instance_url, only_local=False, only_remote=False, only_media=False, fields=None, since=None, until=None):
 
         # Check if instance_url is a string
         if not isinstance(instance_url, str):
@@ -498,33 +792,47 @@ class Crawler:
         if only_local and only_remote:
             raise ValueError("only_local and only_remote cannot be True at the same time.")
 
+        # Check if since and until are datetimes
+        if (since is not None and not isinstance(since, datetime)) or (until is not None and not isinstance(until, datetime)):
+            raise ValueError("Invalid value for 'since' or 'until'. They must be datetimes.")
+
+        since = to_utc(since) if since is not None else None
+        until = to_utc(until) if until is not None else None
+
+        # Check if since is before until
+        if since is not None and until is not None and since >= until:
+            raise ValueError("Invalid value for 'since'. It must be earlier than 'until'.")
+
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'timeline'):
+            return []
+
+        page_size = self._page_size(instance_url, 'statuses')
+
         only_local = str(only_local).lower()
         only_remote = str(only_remote).lower()
         only_media = str(only_media).lower()
         
         items = []
-        url = f"https://{instance_url}/api/v1/timelines/public?local={only_local}&remote={only_remote}&only_media={only_media}&limit=40"
+        url = f"https://{instance_url}/api/v1/timelines/public?local={only_local}&remote={only_remote}&only_media={only_media}&limit={page_size}"
+        url += self._window_params(instance_url, since, until)
 
         while True:      
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
+                self._wait_for_rate_limit(instance_url)
                 
-                response = requests.get(url, timeout=120)
+                response = self.session.get(url, timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
     
                 if response.status_code == 200:
-                    items.extend(response.json())
-                    if 'next' in response.links:
+                    statuses, reached_since = within_window(response.json(), since, until)
+                    items.extend(self._ingest_statuses(statuses, instance_url, fields))
+                    if 'next' in response.links and not reached_since:
                         url = response.links['next']['url']
                         self.logger.info(f"Crawled {len(items)} statuses from timeline of instance {instance_url}")
                     else:
@@ -532,13 +840,14 @@ class Crawler:
                         return items
                 else:
                     self.logger.error(f"Failed to fetch statuses from timeline of instance {instance_url}. Status code: {response.status_code}")
+                    self._endpoint_failed(instance_url, 'timeline', response.status_code)
                     return items
     
             except Exception as e:
                 self.logger.error(f"Error occurred while crawling statuses from timeline of instance {instance_url}: {str(e)}")
                 return items    
 
-    def instance_timeline(self, instance_url, max_limit, only_local=False, only_remote=False, only_media=False):
+    def instance_timeline(self, instance_url, max_limit, only_local=False, only_remote=False, only_media=False, fields=None, since=None, until=None):
 
         # Check if instance_url is a string
         if not isinstance(instance_url, str):
@@ -564,6 +873,26 @@ class Crawler:
         if only_local and only_remote:
             raise ValueError("only_local and only_remote cannot be True at the same time.")
 
+        # Check if since and until are datetimes
+        if (since is not None and not isinstance(since, datetime)) or (until is not None and not isinstance(until, datetime)):
+            raise ValueError("Invalid value for 'since' or 'until'. They must be datetimes.")
+
+        since = to_utc(since) if since is not None else None
+        until = to_utc(until) if until is not None else None
+
+        # Check if since is before until
+        if since is not None and until is not None and since >= until:
+            raise ValueError("Invalid value for 'since'. It must be earlier than 'until'.")
+
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'timeline'):
+            return []
+
+        page_size = self._page_size(instance_url, 'statuses')
+
         only_local = str(only_local).lower()
         only_remote = str(only_remote).lower()
         only_media = str(only_media).lower()
@@ -571,29 +900,23 @@ class Crawler:
         items = []
         items_crawled = 0
         url = f"https://{instance_url}/api/v1/timelines/public?local={only_local}&remote={only_remote}&only_media={only_media}"
+        url += self._window_params(instance_url, since, until)
 
         while items_crawled < max_limit:      
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
-
-                limit = min((max_limit - items_crawled), 40)
-                response = requests.get(f"{url}&limit={limit}", timeout=120)
+                self._wait_for_rate_limit(instance_url)
+
+                limit = min((max_limit - items_crawled), page_size)
+                response = self.session.get(f"{url}&limit={limit}", timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
     
                 if response.status_code == 200:
-                    items.extend(response.json())
-                    items_crawled += len(response.json())
-                    if 'next' in response.links:
+                    statuses, reached_since = within_window(response.json(), since, until)
+                    items.extend(self._ingest_statuses(statuses, instance_url, fields))
+                    items_crawled += len(statuses)
+                    if 'next' in response.links and not reached_since:
                         url = response.links['next']['url']
                         self.logger.info(f"Crawled {len(items)} statuses from timeline of instance {instance_url}")
                     else:
@@ -601,6 +924,7 @@ class Crawler:
                         return items
                 else:
                     self.logger.error(f"Failed to fetch statuses from timeline of instance {instance_url}. Status code: {response.status_code}")
+                    self._endpoint_failed(instance_url, 'timeline', response.status_code)
                     return items
     
             except Exception as e:
@@ -609,6 +933,398 @@ class Crawler:
                 
         return items
                 
+    def instance_timeline_to_file(self, instance_url, output_file, only_local=False, only_remote=False, only_media=False, fields=None, since=None, until=None, queue_size=16):
+
+        # Check if instance_url is a string
+        if not isinstance(instance_url, str):
+            raise ValueError("Invalid value for 'instance_url'. It must be a string.")
+
+        # Check if only_local, only_remote and only_media are booleans
+        if not isinstance(only_local, bool) or not isinstance(only_remote, bool) or not isinstance(only_media, bool):
+            raise ValueError("Invalid value for 'only_local', 'only_remote' or 'only_media'. They must be booleans.")
+
+        # Check if both only_local and only_remote are True
+        if only_local and only_remote:
+            raise ValueError("only_local and only_remote cannot be True at the same time.")
+
+        # Check if since and until are datetimes
+        if (since is not None and not isinstance(since, datetime)) or (until is not None and not isinstance(until, datetime)):
+            raise ValueError("Invalid value for 'since' or 'until'. They must be datetimes.")
+
+        since = to_utc(since) if since is not None else None
+        until = to_utc(until) if until is not None else None
+
+        # Check if since is before until
+        if since is not None and until is not None and since >= until:
+            raise ValueError("Invalid value for 'since'. It must be earlier than 'until'.")
+
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'timeline'):
+            return []
+
+        page_size = self._page_size(instance_url, 'statuses')
+        url = f"https://{instance_url}/api/v1/timelines/public?local={str(only_local).lower()}&remote={str(only_remote).lower()}&only_media={str(only_media).lower()}&limit={page_size}"
+        url += self._window_params(instance_url, since, until)
+
+        return self._pipeline_statuses(url, instance_url, 'timeline', f"timeline of instance {instance_url}", output_file, fields, since, until, queue_size)
+
+    def instance_timeline_sliced(self, instance_url, since, until=None, slices=4, only_local=False, only_remote=False, only_media=False, fields=None, workers=4):
+
+        # Check if instance_url is a string
+        if not isinstance(instance_url, str):
+            raise ValueError("Invalid value for 'instance_url'. It must be a string.")
+
+        # Check if since is a datetime
+        if not isinstance(since, datetime):
+            raise ValueError("Invalid value for 'since'. It must be a datetime.")
+
+        # Check if until is a datetime
+        if until is not None and not isinstance(until, datetime):
+            raise ValueError("Invalid value for 'until'. It must be a datetime.")
+
+        # Check if slices is an integer and positive
+        if not isinstance(slices, int) or slices < 1:
+            raise ValueError("Invalid value for 'slices'. It must be a positive integer.")
+
+        # Check if workers is an integer between 1 and MAX_SLICE_WORKERS
+        if not isinstance(workers, int) or not 1 <= workers <= MAX_SLICE_WORKERS:
+            raise ValueError(f"Invalid value for 'workers'. It must be an integer between 1 and {MAX_SLICE_WORKERS}.")
+
+        # Probe the instance once before the slices run concurrently
+        if not self._supports(instance_url, 'timeline'):
+            return []
+
+        def crawl(window):
+            return self.instance_timeline_all(instance_url, only_local, only_remote, only_media, fields, window[0], window[1])
+
+        items = self._crawl_slices(crawl, self._time_slices(since, until, slices), workers)
+        self.logger.info(f"Crawled {len(items)} statuses from timeline of instance {instance_url} in {slices} time slices")
+        return items
+
+    def instance_timeline_sample(self, instance_url, sample_size, since, until=None, only_local=False, only_remote=False, only_media=False, fields=None, probe_size=None, seed=None):
+
+        # Check if instance_url is a string
+        if not isinstance(instance_url, str):
+            raise ValueError("Invalid value for 'instance_url'. It must be a string.")
+
+        # Check if sample_size is an integer and positive
+        if not isinstance(sample_size, int) or sample_size < 1:
+            raise ValueError("Invalid value for 'sample_size'. It must be a positive integer.")
+
+        # Check if since is a datetime
+        if not isinstance(since, datetime):
+            raise ValueError("Invalid value for 'since'. It must be a datetime.")
+
+        # Check if until is a datetime
+        if until is not None and not isinstance(until, datetime):
+            raise ValueError("Invalid value for 'until'. It must be a datetime.")
+
+        # Check if only_local, only_remote and only_media are booleans
+        if not isinstance(only_local, bool) or not isinstance(only_remote, bool) or not isinstance(only_media, bool):
+            raise ValueError("Invalid value for 'only_local', 'only_remote' or 'only_media'. They must be booleans.")
+
+        # Check if both only_local and only_remote are True
+        if only_local and only_remote:
+            raise ValueError("only_local and only_remote cannot be True at the same time.")
+
+        # Check if probe_size is an integer and positive
+        if probe_size is not None and (not isinstance(probe_size, int) or probe_size < 1):
+            raise ValueError("Invalid value for 'probe_size'. It must be a positive integer.")
+
+        since = to_utc(since)
+        until = to_utc(until) if until is not None else datetime.utcnow()
+
+        # Check if since is before until
+        if since >= until:
+            raise ValueError("Invalid value for 'since'. It must be earlier than 'until'.")
+
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'timeline'):
+            return []
+
+        # Probes are synthetic max_id values, which only work where status IDs encode the creation time
+        capabilities = self.capabilities.get(instance_url)
+        if capabilities is not None and capabilities['software'] not in SNOWFLAKE_ID_SOFTWARE:
+            self.logger.error(f"Cannot sample timeline of instance {instance_url} as {capabilities['software']} does not use time-based status IDs")
+            return []
+
+        page_size = self._page_size(instance_url, 'statuses')
+        probe_size = min(probe_size or page_size, page_size)
+        probes = -(-sample_size // probe_size)
+        window = (until - since).total_seconds()
+        rng = random.Random(seed)
+
+        url = f"https://{instance_url}/api/v1/timelines/public?local={str(only_local).lower()}&remote={str(only_remote).lower()}&only_media={str(only_media).lower()}&limit={probe_size}"
+
+        # One page of the newest statuses before each random time in the window, with the time span the page covers
+        pages = []
+        for _ in range(probes):
+            probe_at = since + timedelta(seconds=rng.uniform(0, window))
+            try:
+                # Check rate limit for this instance
+                self._wait_for_rate_limit(instance_url)
+
+                response = self.session.get(f"{url}&max_id={datetime_to_snowflake(probe_at)}", timeout=self.timeout)
+
+                self._record_rate_limit(instance_url, response)
+
+                if response.status_code == 200:
+                    page = response.json()
+                    statuses, reached_since = within_window(page, since, until)
+
+                    # A short page ran past since (or the start of the timeline), so it covers everything back to since
+                    span = (probe_at - since).total_seconds()
+
+                    # A full page ends at its oldest status; the k-1 statuses after it give an unbiased estimate of the rate
+                    if statuses and len(page) >= probe_size and not reached_since:
+                        span = (probe_at - parse_created_at(statuses[-1]['created_at'])).total_seconds()
+                        if len(statuses) > 1:
+                            span *= len(statuses) / (len(statuses) - 1)
+                    pages.append((statuses, max(span, 0.001)))
+                    self.logger.info(f"Sampled {len(pages)} of {probes} pages from timeline of instance {instance_url}")
+                else:
+                    self.logger.error(f"Failed to fetch statuses from timeline of instance {instance_url}. Status code: {response.status_code}")
+                    self._endpoint_failed(instance_url, 'timeline', response.status_code)
+                    break
+
+            except Exception as e:
+                self.logger.error(f"Error occurred while sampling statuses from timeline of instance {instance_url}: {str(e)}")
+                break
+
+        # A page covering a short span comes from a busy part of the window, so each of its statuses stands for more statuses of the window
+        items = []
+        sampled = {}
+        estimate = 0
+        for statuses, span in pages:
+            weight = window / (len(pages) * span)
+            for status in statuses:
+                estimate += weight
+
+                # A status returned by several probes is kept once with the weights of all of them
+                if status['id'] in sampled:
+                    for item in sampled[status['id']]:
+                        item['sample_weight'] += weight
+                    continue
+
+                sampled[status['id']] = self._ingest_statuses([status], instance_url, fields)
+                for item in sampled[status['id']]:
+                    item['sample_weight'] = weight
+                    items.append(item)
+
+        self.logger.info(f"Sampled {len(items)} statuses with {len(pages)} probes from timeline of instance {instance_url}, an estimated {round(estimate)} statuses in the time window")
+        return items
+
+    def tag_timeline_all(self, instance_url, hashtag, only_local=False, only_media=False, fields=None, since=None, until=None):
+
+        # Check if instance_url is a string
+        if not isinstance(instance_url, str):
+            raise ValueError("Invalid value for 'instance_url'. It must be a string.")
+
+        # Check if hashtag is a non-empty string
+        if not isinstance(hashtag, str) or not hashtag.lstrip('#'):
+            raise ValueError("Invalid value for 'hashtag'. It must be a non-empty string e.g. 'mastodon'.")
+
+        # Check if only_local is a boolean
+        if not isinstance(only_local, bool):
+            raise ValueError("Invalid value for 'only_local'. It must be a boolean.")
+
+        # Check if only_media is a boolean
+        if not isinstance(only_media, bool):
+            raise ValueError("Invalid value for 'only_media'. It must be a boolean.")
+
+        # Check if since and until are datetimes
+        if (since is not None and not isinstance(since, datetime)) or (until is not None and not isinstance(until, datetime)):
+            raise ValueError("Invalid value for 'since' or 'until'. They must be datetimes.")
+
+        since = to_utc(since) if since is not None else None
+        until = to_utc(until) if until is not None else None
+
+        # Check if since is before until
+        if since is not None and until is not None and since >= until:
+            raise ValueError("Invalid value for 'since'. It must be earlier than 'until'.")
+
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'tag'):
+            return []
+
+        page_size = self._page_size(instance_url, 'statuses')
+
+        hashtag = hashtag.lstrip('#')
+        only_local = str(only_local).lower()
+        only_media = str(only_media).lower()
+        
+        items = []
+        url = f"https://{instance_url}/api/v1/timelines/tag/{quote(hashtag)}?local={only_local}&only_media={only_media}&limit={page_size}"
+        url += self._window_params(instance_url, since, until)
+
+        while True:      
+            try:
+                # Check rate limit for this instance
+                self._wait_for_rate_limit(instance_url)
+                
+                response = self.session.get(url, timeout=self.timeout)
+                
+                self._record_rate_limit(instance_url, response)
+    
+                if response.status_code == 200:
+                    statuses, reached_since = within_window(response.json(), since, until)
+                    items.extend(self._ingest_statuses(statuses, instance_url, fields))
+                    if 'next' in response.links and not reached_since:
+                        url = response.links['next']['url']
+                        self.logger.info(f"Crawled {len(items)} statuses tagged #{hashtag} from instance {instance_url}")
+                    else:
+                        self.logger.info(f"Crawled {len(items)} statuses tagged #{hashtag} from instance {instance_url}")
+                        return items
+                else:
+                    self.logger.error(f"Failed to fetch statuses tagged #{hashtag} from instance {instance_url}. Status code: {response.status_code}")
+                    self._endpoint_failed(instance_url, 'tag', response.status_code)
+                    return items
+    
+            except Exception as e:
+                self.logger.error(f"Error occurred while crawling statuses tagged #{hashtag} from instance {instance_url}: {str(e)}")
+                return items    
+
+    def tag_timeline(self, instance_url, hashtag, max_limit, only_local=False, only_media=False, fields=None, since=None, until=None):
+
+        # Check if instance_url is a string
+        if not isinstance(instance_url, str):
+            raise ValueError("Invalid value for 'instance_url'. It must be a string.")
+
+        # Check if hashtag is a non-empty string
+        if not isinstance(hashtag, str) or not hashtag.lstrip('#'):
+            raise ValueError("Invalid value for 'hashtag'. It must be a non-empty string e.g. 'mastodon'.")
+
+        # Check if max_limit is an integer and positive
+        if not isinstance(max_limit, int) or max_limit < 1:
+            raise ValueError("Invalid value for 'max_limit'. It must be a positive integer.")
+
+        # Check if only_local is a boolean
+        if not isinstance(only_local, bool):
+            raise ValueError("Invalid value for 'only_local'. It must be a boolean.")
+
+        # Check if only_media is a boolean
+        if not isinstance(only_media, bool):
+            raise ValueError("Invalid value for 'only_media'. It must be a boolean.")
+
+        # Check if since and until are datetimes
+        if (since is not None and not isinstance(since, datetime)) or (until is not None and not isinstance(until, datetime)):
+            raise ValueError("Invalid value for 'since' or 'until'. They must be datetimes.")
+
+        since = to_utc(since) if since is not None else None
+        until = to_utc(until) if until is not None else None
+
+        # Check if since is before until
+        if since is not None and until is not None and since >= until:
+            raise ValueError("Invalid value for 'since'. It must be earlier than 'until'.")
+
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'tag'):
+            return []
+
+        page_size = self._page_size(instance_url, 'statuses')
+
+        hashtag = hashtag.lstrip('#')
+        only_local = str(only_local).lower()
+        only_media = str(only_media).lower()
+        
+        items = []
+        items_crawled = 0
+        url = f"https://{instance_url}/api/v1/timelines/tag/{quote(hashtag)}?local={only_local}&only_media={only_media}"
+        url += self._window_params(instance_url, since, until)
+
+        while items_crawled < max_limit:      
+            try:
+                # Check rate limit for this instance
+                self._wait_for_rate_limit(instance_url)
+
+                limit = min((max_limit - items_crawled), page_size)
+                response = self.session.get(f"{url}&limit={limit}", timeout=self.timeout)
+                
+                self._record_rate_limit(instance_url, response)
+    
+                if response.status_code == 200:
+                    statuses, reached_since = within_window(response.json(), since, until)
+                    items.extend(self._ingest_statuses(statuses, instance_url, fields))
+                    items_crawled += len(statuses)
+                    if 'next' in response.links and not reached_since:
+                        url = response.links['next']['url']
+                        self.logger.info(f"Crawled {len(items)} statuses tagged #{hashtag} from instance {instance_url}")
+                    else:
+                        self.logger.info(f"Crawled {len(items)} statuses tagged #{hashtag} from instance {instance_url}")
+                        return items
+                else:
+                    self.logger.error(f"Failed to fetch statuses tagged #{hashtag} from instance {instance_url}. Status code: {response.status_code}")
+                    self._endpoint_failed(instance_url, 'tag', response.status_code)
+                    return items
+    
+            except Exception as e:
+                self.logger.error(f"Error occurred while crawling statuses tagged #{hashtag} from instance {instance_url}: {str(e)}")
+                return items
+                
+        return items
+
+    def tag_timeline_instances(self, instance_urls, hashtag, max_limit=None, only_local=False, only_media=False, fields=None, since=None, until=None, workers=16):
+
+        # Check if instance_urls is a list of strings
+        if not isinstance(instance_urls, list) or not all(isinstance(instance_url, str) for instance_url in instance_urls):
+            raise ValueError("Invalid value for 'instance_urls'. It must be a list of strings.")
+
+        # Check if max_limit is an integer and positive
+        if max_limit is not None and (not isinstance(max_limit, int) or max_limit < 1):
+            raise ValueError("Invalid value for 'max_limit'. It must be a positive integer.")
+
+        # Check if workers is an integer and positive
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("Invalid value for 'workers'. It must be a positive integer.")
+
+        # Check if fields is a list of field paths
+        tree = compile_fields(fields)
+
+        # Keep the fields needed to merge and deduplicate until the results are combined
+        crawl_fields = fields + ['uri', 'created_at'] if fields is not None else None
+
+        def crawl(instance_url):
+            if max_limit is not None:
+                return self.tag_timeline(instance_url, hashtag, max_limit, only_local, only_media, crawl_fields, since, until)
+            return self.tag_timeline_all(instance_url, hashtag, only_local, only_media, crawl_fields, since, until)
+
+        # Crawl dead hosts last, so their timeouts do not hold up healthy ones
+        instance_urls = list(dict.fromkeys(instance_urls))
+        order = self.health.prioritize(instance_urls)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(instance_urls)))) as executor:
+            results = dict(zip(order, executor.map(self._bind(crawl), order)))
+
+        # Federated copies of a status share its canonical URI; keep the first copy (in the given order of instances) and order newest first
+        # A reference only stands in for a status seen before when no instance returned the full status in this crawl
+        items = []
+        merged = {}
+        for instance_url in instance_urls:
+            for status in results[instance_url]:
+                uri = status.get('uri')
+                if uri is None:
+                    items.append(status)
+                elif uri not in merged or (merged[uri].get('reference') and not status.get('reference')):
+                    merged[uri] = status
+        items.extend(merged.values())
+
+        items.sort(key=lambda status: status.get('created_at') or '', reverse=True)
+        self.logger.info(f"Crawled {len(items)} distinct statuses tagged #{hashtag.lstrip('#')} from {len(instance_urls)} instances")
+
+        # References are kept as they are, like in the single instance methods
+        return [status if status.get('reference') else project(status, tree) for status in items]
+
     def user_lookup(self, username):
 
         # Check if username is a string
@@ -621,21 +1337,17 @@ class Crawler:
         
         try:
             instance_url = username.split('@')[1]
+
+            # Skip instances that do not provide the Mastodon accounts API
+            if not self._supports(instance_url, 'accounts'):
+                return []
             
             # Check rate limit for this instance
-            remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-            if remaining_requests is not None and remaining_requests < 5:
-                wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                if wait_time > 0:
-                    self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                    time.sleep(wait_time)
+            self._wait_for_rate_limit(instance_url)
     
-            response = requests.get(f"https://{instance_url}/api/v1/accounts/lookup?acct={username}", timeout=120)
+            response = self.session.get(f"https://{instance_url}/api/v1/accounts/lookup?acct={username}", timeout=self.timeout)
                 
-            remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-            reset_time_str = response.headers.get('X-RateLimit-Reset')
-            reset_time = datetime.fromisoformat(reset_time_str[:-1])
-            self.rate_limits[instance_url] = (remaining_requests, reset_time)
+            self._record_rate_limit(instance_url, response)
     
             if response.status_code == 200:
                 self.logger.info(f"Crawled profile of user {username}.")
@@ -648,7 +1360,7 @@ class Crawler:
             self.logger.error(f"Error occurred while crawling profile of user {username}: {str(e)}")
             return []
 
-    def user_statuses_all(self, username, only_media=False, exclude_replies=False, exclude_reblogs=False, only_pinned=False):
+    def user_statuses_all(self, username, only_media=False, exclude_replies=False, exclude_reblogs=False, only_pinned=False, fields=None, since=None, until=None, account_id=None):
 
         # Check if username is a string
         if not isinstance(username, str):
@@ -679,40 +1391,55 @@ class Crawler:
         exclude_reblogs = str(exclude_reblogs).lower()
         only_pinned = str(only_pinned).lower()
         
-        user_profile = self.user_lookup(username)
+        # Check if since and until are datetimes
+        if (since is not None and not isinstance(since, datetime)) or (until is not None and not isinstance(until, datetime)):
+            raise ValueError("Invalid value for 'since' or 'until'. They must be datetimes.")
 
-        user_id = None
+        since = to_utc(since) if since is not None else None
+        until = to_utc(until) if until is not None else None
 
-        if len(user_profile) > 0:
-            user_id = user_profile[0]['id']
-        else:
-            return []
+        # Check if since is before until
+        if since is not None and until is not None and since >= until:
+            raise ValueError("Invalid value for 'since'. It must be earlier than 'until'.")
+
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Check if account_id is a string
+        if account_id is not None and not isinstance(account_id, str):
+            raise ValueError("Invalid value for 'account_id'. It must be a string.")
+
+        user_id = account_id
+
+        # Look up the account unless the caller already knows its ID on the instance
+        if user_id is None:
+            user_profile = self.user_lookup(username)
+
+            if len(user_profile) > 0:
+                user_id = user_profile[0]['id']
+            else:
+                return []
 
         instance_url = username.split('@')[1]
+        page_size = self._page_size(instance_url, 'statuses')
         
         items = []
-        url = f"https://{instance_url}/api/v1/accounts/{user_id}/statuses?only_media={only_media}&exclude_replies={exclude_replies}&exclude_reblogs={exclude_reblogs}&pinned={only_pinned}&limit=40"
+        url = f"https://{instance_url}/api/v1/accounts/{user_id}/statuses?only_media={only_media}&exclude_replies={exclude_replies}&exclude_reblogs={exclude_reblogs}&pinned={only_pinned}&limit={page_size}"
+        url += self._window_params(instance_url, since, until)
 
         while True:      
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
+                self._wait_for_rate_limit(instance_url)
                 
-                response = requests.get(url, timeout=120)
+                response = self.session.get(url, timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
     
                 if response.status_code == 200:
-                    items.extend(response.json())
-                    if 'next' in response.links:
+                    statuses, reached_since = within_window(response.json(), since, until)
+                    items.extend(self._ingest_statuses(statuses, instance_url, fields))
+                    if 'next' in response.links and not reached_since:
                         url = response.links['next']['url']
                         self.logger.info(f"Crawled {len(items)} statuses of user {username}")
                     else:
@@ -726,7 +1453,7 @@ class Crawler:
                 self.logger.error(f"Error occurred while crawling statuses of user {username}: {str(e)}")
                 return items
 
-    def user_statuses(self, username, max_limit, only_media=False, exclude_replies=False, exclude_reblogs=False, only_pinned=False):
+    def user_statuses(self, username, max_limit, only_media=False, exclude_replies=False, exclude_reblogs=False, only_pinned=False, fields=None, since=None, until=None):
 
         # Check if username is a string
         if not isinstance(username, str):
@@ -761,6 +1488,20 @@ class Crawler:
         exclude_reblogs = str(exclude_reblogs).lower()
         only_pinned = str(only_pinned).lower()
         
+        # Check if since and until are datetimes
+        if (since is not None and not isinstance(since, datetime)) or (until is not None and not isinstance(until, datetime)):
+            raise ValueError("Invalid value for 'since' or 'until'. They must be datetimes.")
+
+        since = to_utc(since) if since is not None else None
+        until = to_utc(until) if until is not None else None
+
+        # Check if since is before until
+        if since is not None and until is not None and since >= until:
+            raise ValueError("Invalid value for 'since'. It must be earlier than 'until'.")
+
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
         user_profile = self.user_lookup(username)
 
         user_id = None
@@ -771,33 +1512,28 @@ class Crawler:
             return []
 
         instance_url = username.split('@')[1]
+        page_size = self._page_size(instance_url, 'statuses')
         
         items = []
         items_crawled = 0
         url = f"https://{instance_url}/api/v1/accounts/{user_id}/statuses?only_media={only_media}&exclude_replies={exclude_replies}&exclude_reblogs={exclude_reblogs}&pinned={only_pinned}"
+        url += self._window_params(instance_url, since, until)
 
         while items_crawled < max_limit:      
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
-
-                limit = min((max_limit - items_crawled), 40)
-                response = requests.get(f"{url}&limit={limit}", timeout=120)
+                self._wait_for_rate_limit(instance_url)
+
+                limit = min((max_limit - items_crawled), page_size)
+                response = self.session.get(f"{url}&limit={limit}", timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
     
                 if response.status_code == 200:
-                    items.extend(response.json())
-                    items_crawled += len(response.json())
-                    if 'next' in response.links:
+                    statuses, reached_since = within_window(response.json(), since, until)
+                    items.extend(self._ingest_statuses(statuses, instance_url, fields))
+                    items_crawled += len(statuses)
+                    if 'next' in response.links and not reached_since:
                         url = response.links['next']['url']
                         self.logger.info(f"Crawled {len(items)} statuses of user {username}")
                     else:
@@ -813,7 +1549,85 @@ class Crawler:
                 
         return items
 
-    def user_followers_all(self, username):
+    def user_statuses_to_file(self, username, output_file, only_media=False, exclude_replies=False, exclude_reblogs=False, fields=None, since=None, until=None, queue_size=16):
+
+        # Check if username is a string
+        if not isinstance(username, str):
+            raise ValueError("Invalid value for 'username'. It must be a string.")
+
+        # Check if username follows the format 'user@domain'
+        if '@' not in username or username.count('@') != 1:
+            raise ValueError("Invalid format for 'username'. It must be in the format 'user@domain' e.g. ignactro@mastodon.social")
+
+        # Check if only_media, exclude_replies and exclude_reblogs are booleans
+        if not isinstance(only_media, bool) or not isinstance(exclude_replies, bool) or not isinstance(exclude_reblogs, bool):
+            raise ValueError("Invalid value for 'only_media', 'exclude_replies' or 'exclude_reblogs'. They must be booleans.")
+
+        # Check if since and until are datetimes
+        if (since is not None and not isinstance(since, datetime)) or (until is not None and not isinstance(until, datetime)):
+            raise ValueError("Invalid value for 'since' or 'until'. They must be datetimes.")
+
+        since = to_utc(since) if since is not None else None
+        until = to_utc(until) if until is not None else None
+
+        # Check if since is before until
+        if since is not None and until is not None and since >= until:
+            raise ValueError("Invalid value for 'since'. It must be earlier than 'until'.")
+
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        user_profile = self.user_lookup(username)
+        if len(user_profile) == 0:
+            return []
+
+        instance_url = username.split('@')[1]
+        page_size = self._page_size(instance_url, 'statuses')
+        url = f"https://{instance_url}/api/v1/accounts/{user_profile[0]['id']}/statuses?only_media={str(only_media).lower()}&exclude_replies={str(exclude_replies).lower()}&exclude_reblogs={str(exclude_reblogs).lower()}&limit={page_size}"
+        url += self._window_params(instance_url, since, until)
+
+        return self._pipeline_statuses(url, instance_url, 'statuses', f"statuses of user {username}", output_file, fields, since, until, queue_size)
+
+    def user_statuses_sliced(self, username, since, until=None, slices=4, only_media=False, exclude_replies=False, exclude_reblogs=False, fields=None, workers=4):
+
+        # Check if username is a string
+        if not isinstance(username, str):
+            raise ValueError("Invalid value for 'username'. It must be a string.")
+
+        # Check if username follows the format 'user@domain'
+        if '@' not in username or username.count('@') != 1:
+            raise ValueError("Invalid format for 'username'. It must be in the format 'user@domain' e.g. ignactro@mastodon.social")
+
+        # Check if since is a datetime
+        if not isinstance(since, datetime):
+            raise ValueError("Invalid value for 'since'. It must be a datetime.")
+
+        # Check if until is a datetime
+        if until is not None and not isinstance(until, datetime):
+            raise ValueError("Invalid value for 'until'. It must be a datetime.")
+
+        # Check if slices is an integer and positive
+        if not isinstance(slices, int) or slices < 1:
+            raise ValueError("Invalid value for 'slices'. It must be a positive integer.")
+
+        # Check if workers is an integer between 1 and MAX_SLICE_WORKERS
+        if not isinstance(workers, int) or not 1 <= workers <= MAX_SLICE_WORKERS:
+            raise ValueError(f"Invalid value for 'workers'. It must be an integer between 1 and {MAX_SLICE_WORKERS}.")
+
+        # Probe the instance and look up the account once before the slices run concurrently
+        user_profile = self.user_lookup(username)
+        if len(user_profile) == 0:
+            return []
+        account_id = user_profile[0]['id']
+
+        def crawl(window):
+            return self.user_statuses_all(username, only_media, exclude_replies, exclude_reblogs, False, fields, window[0], window[1], account_id)
+
+        items = self._crawl_slices(crawl, self._time_slices(since, until, slices), workers)
+        self.logger.info(f"Crawled {len(items)} statuses of user {username} in {slices} time slices")
+        return items
+
+    def user_followers_all(self, username, fields=None, edge_store=None):
 
         # Check if username is a string
         if not isinstance(username, str):
@@ -823,6 +1637,21 @@ class Crawler:
         if '@' not in username or username.count('@') != 1:
             raise ValueError("Invalid format for 'username'. It must be in the format 'user@domain' e.g. ignactro@mastodon.social")
         
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Check if edge_store is an EdgeStore or a path
+        if edge_store is not None and not isinstance(edge_store, (EdgeStore, str)):
+            raise ValueError("Invalid value for 'edge_store'. It must be an EdgeStore or a path.")
+
+        # Open the edge store at the given path for this crawl, writing its CSR adjacency at the end
+        if isinstance(edge_store, str):
+            store = EdgeStore(edge_store)
+            try:
+                return self.user_followers_all(username, fields, store)
+            finally:
+                store.close()
+
         user_profile = self.user_lookup(username)
 
         user_id = None
@@ -833,34 +1662,34 @@ class Crawler:
             return []
 
         instance_url = username.split('@')[1]
+        page_size = self._page_size(instance_url, 'accounts')
         
         items = []
-        url = f"https://{instance_url}/api/v1/accounts/{user_id}/followers?limit=80"
+        items_crawled = 0
+        url = f"https://{instance_url}/api/v1/accounts/{user_id}/followers?limit={page_size}"
 
         while True:      
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
+                self._wait_for_rate_limit(instance_url)
                 
-                response = requests.get(url, timeout=120)
+                response = self.session.get(url, timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
     
                 if response.status_code == 200:
-                    items.extend(response.json())
+                    accounts = response.json()
+                    if edge_store is not None:
+                        # Keep only the edges, not the accounts
+                        edge_store.add_accounts(username, accounts, True)
+                    else:
+                        items.extend(project_items(accounts, fields))
+                    items_crawled += len(accounts)
                     if 'next' in response.links:
                         url = response.links['next']['url']
-                        self.logger.info(f"Crawled {len(items)} followers of user {username}")
+                        self.logger.info(f"Crawled {items_crawled} followers of user {username}")
                     else:
-                        self.logger.info(f"Crawled {len(items)} followers of user {username}")
+                        self.logger.info(f"Crawled {items_crawled} followers of user {username}")
                         return items
                 else:
                     self.logger.error(f"Failed to fetch followers of user {username}. Status code: {response.status_code}")
@@ -870,7 +1699,7 @@ class Crawler:
                 self.logger.error(f"Error occurred while crawling followers of user {username}: {str(e)}")
                 return items
 
-    def user_followers(self, username, max_limit):
+    def user_followers(self, username, max_limit, fields=None, edge_store=None):
 
         # Check if username is a string
         if not isinstance(username, str):
@@ -884,6 +1713,21 @@ class Crawler:
         if not isinstance(max_limit, int) or max_limit < 1:
             raise ValueError("Invalid value for 'max_limit'. It must be a positive integer.")
         
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Check if edge_store is an EdgeStore or a path
+        if edge_store is not None and not isinstance(edge_store, (EdgeStore, str)):
+            raise ValueError("Invalid value for 'edge_store'. It must be an EdgeStore or a path.")
+
+        # Open the edge store at the given path for this crawl, writing its CSR adjacency at the end
+        if isinstance(edge_store, str):
+            store = EdgeStore(edge_store)
+            try:
+                return self.user_followers(username, max_limit, fields, store)
+            finally:
+                store.close()
+
         user_profile = self.user_lookup(username)
 
         user_id = None
@@ -894,6 +1738,7 @@ class Crawler:
             return []
 
         instance_url = username.split('@')[1]
+        page_size = self._page_size(instance_url, 'accounts')
         
         items = []
         items_crawled = 0
@@ -902,29 +1747,26 @@ class Crawler:
         while items_crawled < max_limit:      
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
-
-                limit = min((max_limit - items_crawled), 80)
-                response = requests.get(f"{url}&limit={limit}", timeout=120)
+                self._wait_for_rate_limit(instance_url)
+
+                limit = min((max_limit - items_crawled), page_size)
+                response = self.session.get(f"{url}&limit={limit}", timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
     
                 if response.status_code == 200:
-                    items.extend(response.json())
-                    items_crawled += len(response.json())
+                    accounts = response.json()
+                    if edge_store is not None:
+                        # Keep only the edges, not the accounts
+                        edge_store.add_accounts(username, accounts, True)
+                    else:
+                        items.extend(project_items(accounts, fields))
+                    items_crawled += len(accounts)
                     if 'next' in response.links:
                         url = response.links['next']['url']
-                        self.logger.info(f"Crawled {len(items)} followers of user {username}")
+                        self.logger.info(f"Crawled {items_crawled} followers of user {username}")
                     else:
-                        self.logger.info(f"Crawled {len(items)} followers of user {username}")
+                        self.logger.info(f"Crawled {items_crawled} followers of user {username}")
                         return items
                 else:
                     self.logger.error(f"Failed to fetch followers of user {username}. Status code: {response.status_code}")
@@ -936,7 +1778,7 @@ class Crawler:
                 
         return items
 
-    def user_following_all(self, username):
+    def user_following_all(self, username, fields=None, edge_store=None):
 
         # Check if username is a string
         if not isinstance(username, str):
@@ -946,6 +1788,21 @@ class Crawler:
         if '@' not in username or username.count('@') != 1:
             raise ValueError("Invalid format for 'username'. It must be in the format 'user@domain' e.g. ignactro@mastodon.social")
         
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Check if edge_store is an EdgeStore or a path
+        if edge_store is not None and not isinstance(edge_store, (EdgeStore, str)):
+            raise ValueError("Invalid value for 'edge_store'. It must be an EdgeStore or a path.")
+
+        # Open the edge store at the given path for this crawl, writing its CSR adjacency at the end
+        if isinstance(edge_store, str):
+            store = EdgeStore(edge_store)
+            try:
+                return self.user_following_all(username, fields, store)
+            finally:
+                store.close()
+
         user_profile = self.user_lookup(username)
 
         user_id = None
@@ -956,34 +1813,34 @@ class Crawler:
             return []
 
         instance_url = username.split('@')[1]
+        page_size = self._page_size(instance_url, 'accounts')
         
         items = []
-        url = f"https://{instance_url}/api/v1/accounts/{user_id}/following?limit=80"
+        items_crawled = 0
+        url = f"https://{instance_url}/api/v1/accounts/{user_id}/following?limit={page_size}"
 
         while True:      
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
+                self._wait_for_rate_limit(instance_url)
                 
-                response = requests.get(url, timeout=120)
+                response = self.session.get(url, timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
     
                 if response.status_code == 200:
-                    items.extend(response.json())
+                    accounts = response.json()
+                    if edge_store is not None:
+                        # Keep only the edges, not the accounts
+                        edge_store.add_accounts(username, accounts, False)
+                    else:
+                        items.extend(project_items(accounts, fields))
+                    items_crawled += len(accounts)
                     if 'next' in response.links:
                         url = response.links['next']['url']
-                        self.logger.info(f"Crawled {len(items)} followees of user {username}")
+                        self.logger.info(f"Crawled {items_crawled} followees of user {username}")
                     else:
-                        self.logger.info(f"Crawled {len(items)} followees of user {username}")
+                        self.logger.info(f"Crawled {items_crawled} followees of user {username}")
                         return items
                 else:
                     self.logger.error(f"Failed to fetch followees of user {username}. Status code: {response.status_code}")
@@ -993,7 +1850,7 @@ class Crawler:
                 self.logger.error(f"Error occurred while crawling followees of user {username}: {str(e)}")
                 return items
 
-    def user_following(self, username, max_limit):
+    def user_following(self, username, max_limit, fields=None, edge_store=None):
 
         # Check if username is a string
         if not isinstance(username, str):
@@ -1007,6 +1864,21 @@ class Crawler:
         if not isinstance(max_limit, int) or max_limit < 1:
             raise ValueError("Invalid value for 'max_limit'. It must be a positive integer.")
         
+        # Check if fields is a list of field paths
+        fields = compile_fields(fields)
+
+        # Check if edge_store is an EdgeStore or a path
+        if edge_store is not None and not isinstance(edge_store, (EdgeStore, str)):
+            raise ValueError("Invalid value for 'edge_store'. It must be an EdgeStore or a path.")
+
+        # Open the edge store at the given path for this crawl, writing its CSR adjacency at the end
+        if isinstance(edge_store, str):
+            store = EdgeStore(edge_store)
+            try:
+                return self.user_following(username, max_limit, fields, store)
+            finally:
+                store.close()
+
         user_profile = self.user_lookup(username)
 
         user_id = None
@@ -1017,6 +1889,7 @@ class Crawler:
             return []
 
         instance_url = username.split('@')[1]
+        page_size = self._page_size(instance_url, 'accounts')
         
         items = []
         items_crawled = 0
@@ -1025,29 +1898,26 @@ class Crawler:
         while items_crawled < max_limit:      
             try:
                 # Check rate limit for this instance
-                remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-                if remaining_requests is not None and remaining_requests < 5:
-                    wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                    if wait_time > 0:
-                        self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                        time.sleep(wait_time)
-
-                limit = min((max_limit - items_crawled), 80)
-                response = requests.get(f"{url}&limit={limit}", timeout=120)
+                self._wait_for_rate_limit(instance_url)
+
+                limit = min((max_limit - items_crawled), page_size)
+                response = self.session.get(f"{url}&limit={limit}", timeout=self.timeout)
                 
-                remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time_str = response.headers.get('X-RateLimit-Reset')
-                reset_time = datetime.fromisoformat(reset_time_str[:-1])
-                self.rate_limits[instance_url] = (remaining_requests, reset_time)
+                self._record_rate_limit(instance_url, response)
     
                 if response.status_code == 200:
-                    items.extend(response.json())
-                    items_crawled += len(response.json())
+                    accounts = response.json()
+                    if edge_store is not None:
+                        # Keep only the edges, not the accounts
+                        edge_store.add_accounts(username, accounts, False)
+                    else:
+                        items.extend(project_items(accounts, fields))
+                    items_crawled += len(accounts)
                     if 'next' in response.links:
                         url = response.links['next']['url']
-                        self.logger.info(f"Crawled {len(items)} followees of user {username}")
+                        self.logger.info(f"Crawled {items_crawled} followees of user {username}")
                     else:
-                        self.logger.info(f"Crawled {len(items)} followees of user {username}")
+                        self.logger.info(f"Crawled {items_crawled} followees of user {username}")
                         return items
                 else:
                     self.logger.error(f"Failed to fetch followees of user {username}. Status code: {response.status_code}")
@@ -1069,21 +1939,17 @@ class Crawler:
         if not isinstance(status_id, str):
             raise ValueError("Invalid value for 'status_id'. It must be a string.")
         
+        # Skip endpoints the instance does not support
+        if not self._supports(instance_url, 'statuses'):
+            return []
+
         try:            
             # Check rate limit for this instance
-            remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
-            if remaining_requests is not None and remaining_requests < 5:
-                wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
-                if wait_time > 0:
-                    self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
-                    time.sleep(wait_time)
+            self._wait_for_rate_limit(instance_url)
     
-            response = requests.get(f"https://{instance_url}/api/v1/statuses/{status_id}", timeout=120)
+            response = self.session.get(f"https://{instance_url}/api/v1/statuses/{status_id}", timeout=self.timeout)
                 
-            remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-            reset_time_str = response.headers.get('X-RateLimit-Reset')
-            reset_time = datetime.fromisoformat(reset_time_str[:-1])
-            self.rate_limits[instance_url] = (remaining_requests, reset_time)
+            self._record_rate_limit(instance_url, response)
     
             if response.status_code == 200:
                 self.logger.info(f"Crawled information of status {status_id} from instance {instance_url}.")
@@ -1094,4 +1960,276 @@ class Crawler:
     
         except Exception as e:
             self.logger.error(f"Error occurred while crawling information of status {status_id} from instance {instance_url}: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    def map(self, method, inputs, workers=8, per_host=2, **kwargs):
+
+        # Check if method is the name of a public Crawler method
+        if not isinstance(method, str) or method.startswith('_') or method == 'map' or not callable(getattr(Crawler, method, None)):
+            raise ValueError(f"Invalid value for 'method'. Unknown method '{method}'.")
+
+        # Check if workers is an integer and positive
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("Invalid value for 'workers'. It must be a positive integer.")
+
+        # Check if per_host is an integer between 1 and MAX_SLICE_WORKERS
+        if not isinstance(per_host, int) or not 1 <= per_host <= MAX_SLICE_WORKERS:
+            raise ValueError(f"Invalid value for 'per_host'. It must be an integer between 1 and {MAX_SLICE_WORKERS}.")
+
+        # Each input is the first argument of the method (an instance URL or a username) or a list of its arguments
+        queues = {}
+        for arguments in inputs:
+            arguments = list(arguments) if isinstance(arguments, (list, tuple)) else [arguments]
+
+            # Check if the first argument is a string
+            if not arguments or not isinstance(arguments[0], str):
+                raise ValueError("Invalid value for 'inputs'. Each input must start with an instance URL or a username.")
+
+            host = arguments[0].split('@')[-1].lower()
+            queues.setdefault(host, deque()).append(arguments)
+
+        # Arguments are checked when called; the calls run as the results are iterated
+        return self._map(method, queues, workers, per_host, kwargs)
+
+    def _map(self, method, queues, workers, per_host, kwargs):
+        @self._bind
+        def call(arguments):
+            return list(getattr(self, method)(*arguments, **kwargs))
+
+        # One entry per free slot of a host with queued inputs, so hosts take turns and none gets more than per_host calls at once. Dead hosts start last
+        ready = deque(host for host in self.health.prioritize(list(queues)) for _ in range(min(per_host, len(queues[host]))))
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while ready or running:
+                while ready and len(running) < workers:
+                    host = ready.popleft()
+                    if not queues[host]:
+                        continue
+                    arguments = queues[host].popleft()
+                    running[executor.submit(call, arguments)] = (host, arguments)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host, arguments = running.pop(future)
+                    if queues[host]:
+                        ready.append(host)
+
+                    try:
+                        items = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Error occurred while running {method} for {arguments[0]}: {str(e)}")
+                        items = []
+
+                    yield {'input': arguments[0] if len(arguments) == 1 else arguments, 'items': items}
+
+    def _bind(self, function):
+        # Statuses ingested by worker threads count towards the status index batch of the job that started them
+        if self.status_index is None:
+            return function
+        return self.status_index.bind(function)
+
+    def _ingest_statuses(self, statuses, instance_url, fields=None):
+        kept = []
+        for status in statuses:
+            # Drop statuses the filter rejects before they are recorded as seen or their media is downloaded
+            if self.status_filter is not None and not self.status_filter.matches(status):
+                continue
+
+            uri = status.get('uri')
+
+            # Skip (or keep a reference to) statuses already seen in this or an earlier run
+            if self.status_index is not None and uri is not None and not self.status_index.add(uri):
+                if self.status_references:
+                    kept.append({'id': status.get('id'), 'uri': uri, 'instance': instance_url, 'reference': True})
+                continue
+
+            if self.media is not None:
+                self.media.submit_status(status)
+
+            kept.append(project(status, fields))
+
+        return kept
+
+    def _pipeline_statuses(self, url, instance_url, endpoint, description, output_file, fields, since, until, queue_size):
+
+        # Decode stage: parse a page, keep the statuses in the time window and project them
+        def decode(statuses, pipeline):
+            statuses, reached_since = within_window(statuses, since, until)
+            if reached_since:
+                pipeline.stop()
+            return self._ingest_statuses(statuses, instance_url, fields)
+
+        try:
+            with Pipeline(output_file, self._bind(decode), queue_size) as pipeline:
+                pages = self._fetch_pages(url, instance_url, endpoint, description, pipeline, since)
+        except Exception as e:
+            self.logger.error(f"Error occurred while saving {description} to {output_file}: {str(e)}")
+            return []
+
+        self.logger.info(f"Saved {pipeline.count} statuses ({pages} pages of {description}) to {output_file}")
+        return [{'output_file': output_file, 'pages': pages, 'count': pipeline.count}]
+
+    def _fetch_pages(self, url, instance_url, endpoint, description, pipeline, since=None):
+        # Fetch stage: follow the next links and hand raw pages to the pipeline until it stops
+        pages = 0
+
+        while not pipeline.stopped.is_set():
+            try:
+                # Check rate limit for this instance
+                self._wait_for_rate_limit(instance_url)
+
+                response = self.session.get(url, timeout=self.timeout)
+
+                self._record_rate_limit(instance_url, response)
+
+                if response.status_code == 200:
+                    # The tracer decodes (and times) the body of every traced response: hand over that page rather than decoding it twice
+                    pipeline.put(response.json() if self.tracer is not None else response.content)
+                    pages += 1
+                    self.logger.info(f"Fetched {pages} pages of {description}")
+                    if 'next' in response.links:
+                        url = response.links['next']['url']
+
+                        # Stop as soon as a page reaches back past since, instead of fetching until the decoder catches up
+                        if since is not None and self._passed_since(instance_url, url, since):
+                            return pages
+                    else:
+                        return pages
+                else:
+                    self.logger.error(f"Failed to fetch {description}. Status code: {response.status_code}")
+                    self._endpoint_failed(instance_url, endpoint, response.status_code)
+                    return pages
+
+            except Exception as e:
+                self.logger.error(f"Error occurred while crawling {description}: {str(e)}")
+                return pages
+
+        return pages
+
+    def _time_slices(self, since, until, slices):
+        # Split [since, until) into equal windows, newest first to match timeline order
+        since = to_utc(since)
+        until = to_utc(until) if until is not None else datetime.utcnow()
+
+        # Check if since is before until
+        if since >= until:
+            raise ValueError("Invalid value for 'since'. It must be earlier than 'until'.")
+
+        step = (until - since) / slices
+        bounds = [since + step * i for i in range(slices)] + [until]
+        return [(bounds[i], bounds[i + 1]) for i in reversed(range(slices))]
+
+    def _crawl_slices(self, crawl, windows, workers):
+        with ThreadPoolExecutor(max_workers=min(workers, len(windows))) as executor:
+            results = list(executor.map(self._bind(crawl), windows))
+
+        # Merge in window order and drop statuses that appear on both sides of a boundary
+        items = []
+        seen_ids = set()
+        for result in results:
+            for item in result:
+                item_id = item.get('id')
+                if item_id is not None:
+                    if item_id in seen_ids:
+                        continue
+                    seen_ids.add(item_id)
+                items.append(item)
+
+        return items
+
+    def _passed_since(self, instance_url, next_url, since):
+        # The max_id of the next link is the oldest status of the page, its creation time where the server uses snowflake IDs
+        capabilities = self.capabilities.get(instance_url)
+        if capabilities is not None and capabilities['software'] not in SNOWFLAKE_ID_SOFTWARE:
+            return False
+
+        max_id = parse_qs(urlsplit(next_url).query).get('max_id')
+        try:
+            return snowflake_to_datetime(max_id[0]) < since
+        except (TypeError, ValueError, OverflowError, OSError):
+            return False
+
+    def _window_params(self, instance_url, since, until):
+        # Jump straight to the time window with synthetic snowflake IDs where the server uses them
+        capabilities = self.capabilities.get(instance_url)
+        if capabilities is not None and capabilities['software'] not in SNOWFLAKE_ID_SOFTWARE:
+            return ''
+
+        params = ''
+        if until is not None:
+            params += f"&max_id={datetime_to_snowflake(until)}"
+        if since is not None:
+            params += f"&since_id={datetime_to_snowflake(since)}"
+        return params
+
+    def _wait_for_rate_limit(self, instance_url):
+        # Reserve a request from the instance's remaining budget so concurrent threads cannot overshoot it together
+        with self.lock:
+            remaining_requests, reset_time = self.rate_limits.get(instance_url, (None, None))
+            if remaining_requests is None:
+                return
+            if remaining_requests >= 5:
+                self.rate_limits[instance_url] = (remaining_requests - 1, reset_time)
+                return
+            wait_time = (reset_time - datetime.utcnow()).total_seconds() + 1
+
+        if wait_time > 0:
+            self.logger.info(f"Waiting for {wait_time} seconds to reset rate limit for instance {instance_url}")
+            self._sleep(wait_time)
+
+    def _record_rate_limit(self, instance_url, response):
+        remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
+        reset_time_str = response.headers.get('X-RateLimit-Reset')
+        reset_time = datetime.fromisoformat(reset_time_str[:-1])
+
+        with self.lock:
+            previous = self.rate_limits.get(instance_url)
+
+            # Responses can arrive out of order: ignore ones from an earlier window, and within a window keep the lower count
+            if previous is not None and previous[1] > reset_time:
+                return
+            if previous is not None and previous[1] == reset_time:
+                remaining_requests = min(remaining_requests, previous[0])
+
+            self.rate_limits[instance_url] = (remaining_requests, reset_time)
+
+    def _sleep(self, seconds):
+        time.sleep(seconds)
+
+        # Attribute the rate-limit wait to the next traced request
+        if self.tracer is not None:
+            self.tracer.add_wait(seconds)
+
+    def _supports(self, instance_url, endpoint, probe=True):
+        # Without a probe only capabilities already known (probed, or learnt from failed endpoints) are checked
+        if self.probe_capabilities and probe:
+            capabilities = self.instance_capabilities(instance_url)[0]
+        else:
+            capabilities = self.capabilities.get(instance_url)
+
+        if capabilities is not None and endpoint in capabilities['unsupported']:
+            self.logger.info(f"Skipping {endpoint} of instance {instance_url} as it is not supported by {capabilities['software']} {capabilities['version']}")
+            return False
+
+        return True
+
+    def _page_size(self, instance_url, family):
+        capabilities = self.capabilities.get(instance_url)
+        if capabilities is None:
+            return DEFAULT_PAGE_SIZES[family]
+        return capabilities['page_sizes'][family]
+
+    def _endpoint_failed(self, instance_url, endpoint, status_code):
+        # Remember endpoints the instance does not provide (or hides from unauthenticated users) so later calls skip them
+        if status_code not in (401, 404, 410, 422):
+            return
+
+        with self.lock:
+            capabilities = self.capabilities.get(instance_url)
+            if capabilities is None:
+                capabilities = build_capabilities()
+                self.capabilities[instance_url] = capabilities
+
+            if endpoint not in capabilities['unsupported']:
+                capabilities['unsupported'] = sorted(capabilities['unsupported'] + [endpoint])
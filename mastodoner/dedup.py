@@ -0,0 +1,128 @@
+import atexit
+import contextlib
+import contextvars
+import hashlib
+import os
+import sqlite3
+import threading
+from mastodoner.bloom import BloomFilter
+
+class StatusIndex:
+    def __init__(self, index_file, bloom_capacity=10000000, error_rate=0.01):
+
+        # Check if index_file is a string
+        if not isinstance(index_file, str):
+            raise ValueError("Invalid value for 'index_file'. It must be a string.")
+
+        # Check if bloom_capacity is an integer and positive
+        if not isinstance(bloom_capacity, int) or bloom_capacity < 1:
+            raise ValueError("Invalid value for 'bloom_capacity'. It must be a positive integer.")
+
+        self.index_file = index_file
+        self.bloom_file = f"{index_file}.bloom"
+
+        # 16-byte hashes of canonical status URIs, shared across runs and instances
+        self.connection = sqlite3.connect(index_file, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS statuses (hash BLOB PRIMARY KEY) WITHOUT ROWID")
+
+        # The Bloom filter must cover every stored hash. It is removed while the index is open, so after a crash it is rebuilt from the table
+        if os.path.exists(self.bloom_file):
+            self.bloom = BloomFilter.load(self.bloom_file)
+            os.remove(self.bloom_file)
+        else:
+            self.bloom = BloomFilter(bloom_capacity, error_rate)
+            for (key,) in self.connection.execute("SELECT hash FROM statuses"):
+                self.bloom.add(key)
+
+        # New hashes are only stored by flush(), once the statuses they stand for have been saved. Hashes still pending when the index is closed (e.g. the crawl was interrupted) are dropped so those statuses are crawled again
+        self.pending = set()
+        self.lock = threading.Lock()
+
+        # Hashes added by each job of a daemon or scheduler, so a job that saved its statuses commits only its own
+        self.batch_var = contextvars.ContextVar(f"status_batch_{id(self)}", default=None)
+
+        atexit.register(self.close)
+
+    def _key(self, uri):
+        return hashlib.blake2b(uri.encode('utf-8'), digest_size=16).digest()
+
+    def _stored(self, key):
+        if key not in self.bloom:
+            return False
+        if key in self.pending:
+            return True
+        return self.connection.execute("SELECT 1 FROM statuses WHERE hash = ?", (key,)).fetchone() is not None
+
+    def __contains__(self, uri):
+        key = self._key(uri)
+        with self.lock:
+            return self._stored(key)
+
+    def add(self, uri):
+        # Returns True if the status had not been seen before
+        key = self._key(uri)
+
+        with self.lock:
+            if self._stored(key):
+                return False
+
+            self.bloom.add(key)
+            self.pending.add(key)
+
+            batch = self.batch_var.get()
+            if batch is not None:
+                batch.add(key)
+
+        return True
+
+    @contextlib.contextmanager
+    def batch(self):
+        # Collects the hashes added in this context (and in functions wrapped with bind) for flush(batch) or discard(batch)
+        batch = set()
+        token = self.batch_var.set(batch)
+        try:
+            yield batch
+        finally:
+            self.batch_var.reset(token)
+
+    def bind(self, function):
+        # Worker threads do not inherit the batch of the thread that starts them
+        batch = self.batch_var.get()
+        if batch is None:
+            return function
+
+        def run(*args, **kwargs):
+            token = self.batch_var.set(batch)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.batch_var.reset(token)
+
+        return run
+
+    def flush(self, batch=None):
+        # Store the pending hashes, or only those of the given batch
+        with self.lock:
+            keys = self.pending if batch is None else self.pending & batch
+            if keys:
+                self.connection.executemany("INSERT OR IGNORE INTO statuses (hash) VALUES (?)", [(key,) for key in keys])
+                self.connection.commit()
+                self.pending -= keys
+
+    def discard(self, batch=None):
+        # Forget the pending hashes, or only those of the given batch, e.g. when their statuses could not be saved
+        with self.lock:
+            if batch is None:
+                self.pending.clear()
+            else:
+                self.pending -= batch
+
+    def close(self):
+        with self.lock:
+            if self.connection is None:
+                return
+
+            self.pending.clear()
+            self.connection.close()
+            self.connection = None
+            self.bloom.save(self.bloom_file)
@@ -0,0 +1,61 @@
+import re
+from mastodoner.bloom import BloomFilter
+
+DOMAIN_PATTERN = re.compile(r'^(?=.{4,253}$)([a-z0-9_]([a-z0-9_-]{0,61}[a-z0-9])?\.)+[a-z0-9-]{2,63}$')
+
+def normalize_domain(domain):
+    # Lowercase, strip scheme, path, port and trailing dot, and convert to punycode
+    if not isinstance(domain, str):
+        return None
+
+    domain = domain.strip().lower()
+    domain = domain.split('://', 1)[-1].split('/', 1)[0].split(':', 1)[0].rstrip('.')
+
+    try:
+        domain = domain.encode('idna').decode('ascii')
+    except UnicodeError:
+        return None
+
+    if not DOMAIN_PATTERN.match(domain):
+        return None
+
+    return domain
+
+class DomainSet:
+    def __init__(self, bloom_capacity=0, error_rate=0.001):
+
+        # Check if bloom_capacity is an integer and non-negative
+        if not isinstance(bloom_capacity, int) or bloom_capacity < 0:
+            raise ValueError("Invalid value for 'bloom_capacity'. It must be a non-negative integer.")
+
+        # With a Bloom filter only a fixed-size bit array is kept, at the cost of rarely skipping an unseen domain
+        self.bloom = BloomFilter(bloom_capacity, error_rate) if bloom_capacity > 0 else None
+
+        # Otherwise domains are kept exactly, as bytes which are smaller than str objects
+        self.domains = set() if self.bloom is None else None
+        self.count = 0
+
+    def add(self, domain):
+        # Returns True if the domain had not been seen before
+        key = domain.encode('ascii')
+
+        if self.bloom is not None:
+            added = self.bloom.add(key)
+        else:
+            added = key not in self.domains
+            if added:
+                self.domains.add(key)
+
+        if added:
+            self.count += 1
+
+        return added
+
+    def __contains__(self, domain):
+        key = domain.encode('ascii')
+        if self.bloom is not None:
+            return key in self.bloom
+        return key in self.domains
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,217 @@
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+# CSR file layout: header, node_count + 1 uint64 offsets, edge_count uint32 targets (native byte order)
+CSR_MAGIC = b'MDNCSR01'
+CSR_HEADER = struct.Struct('<8sQQ')
+
+def _native_array(typecode, data):
+    # Typed arrays are written in native byte order so the CSR file can be cast in place
+    values = array(typecode, data)
+    if values.itemsize != {'I': 4, 'Q': 8}[typecode]:
+        raise ValueError(f"Unsupported platform: array typecode '{typecode}' is {values.itemsize} bytes.")
+    return values
+
+class EdgeStore:
+    def __init__(self, path, batch_size=1000000):
+
+        # Check if path is a string
+        if not isinstance(path, str):
+            raise ValueError("Invalid value for 'path'. It must be a string.")
+
+        # Check if batch_size is an integer and positive
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("Invalid value for 'batch_size'. It must be a positive integer.")
+
+        self.path = path
+        self.nodes_file = f"{path}.nodes"
+        self.edges_file = f"{path}.edges"
+        self.batch_size = batch_size
+
+        # Each account (as user@domain) is interned to an integer ID, its line number in the nodes file
+        self.ids = {}
+        if os.path.exists(self.nodes_file):
+            with open(self.nodes_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self.ids[line.rstrip('\n')] = len(self.ids)
+
+        # Edges are buffered in typed arrays and appended to the edges file as (source, target) uint32 pairs
+        self.pending = _native_array('I', [])
+        self.new_nodes = []
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _intern(self, acct):
+        node_id = self.ids.get(acct)
+        if node_id is None:
+            node_id = len(self.ids)
+            self.ids[acct] = node_id
+            self.new_nodes.append(acct)
+        return node_id
+
+    def add(self, source, target):
+        # source follows target, both as user@domain
+        with self.lock:
+            self.pending.append(self._intern(source))
+            self.pending.append(self._intern(target))
+
+            if len(self.pending) >= 2 * self.batch_size:
+                self._flush()
+
+    def add_accounts(self, username, accounts, followers):
+        # Accounts of a followers (or following) page of username; local accounts carry no domain
+        domain = username.split('@')[1]
+        with self.lock:
+            user_id = self._intern(username)
+            for account in accounts:
+                acct = account['acct'] if '@' in account['acct'] else f"{account['acct']}@{domain}"
+                account_id = self._intern(acct)
+                self.pending.extend((account_id, user_id) if followers else (user_id, account_id))
+
+            if len(self.pending) >= 2 * self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        # Nodes are written before the edges that refer to them
+        if self.new_nodes:
+            with open(self.nodes_file, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{acct}\n" for acct in self.new_nodes))
+            self.new_nodes = []
+
+        if self.pending:
+            with open(self.edges_file, 'ab') as f:
+                self.pending.tofile(f)
+            self.pending = _native_array('I', [])
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        # Write the CSR adjacency of every edge collected so far (including earlier runs)
+        with self.lock:
+            self._flush()
+            write_csr(self.edges_file, self.path, len(self.ids), self.batch_size)
+
+def write_csr(edges_file, path, node_count, batch_size=1000000):
+    edge_count = os.path.getsize(edges_file) // 8 if os.path.exists(edges_file) else 0
+
+    # First pass: out-degree of every node
+    offsets = _native_array('Q', bytes(8 * (node_count + 1)))
+    for batch in _read_edges(edges_file, batch_size):
+        for i in range(0, len(batch), 2):
+            offsets[batch[i] + 1] += 1
+    for node_id in range(node_count):
+        offsets[node_id + 1] += offsets[node_id]
+
+    temp_path = f"{path}.tmp"
+    targets_start = CSR_HEADER.size + offsets.itemsize * len(offsets)
+    with open(temp_path, 'wb') as f:
+        f.write(CSR_HEADER.pack(CSR_MAGIC, node_count, edge_count))
+        offsets.tofile(f)
+        f.truncate(targets_start + 4 * edge_count)
+
+    # Second pass: place each target at its source's next free slot, directly in the mapped file
+    if edge_count > 0:
+        with open(temp_path, 'r+b') as f, mmap.mmap(f.fileno(), 0) as mapped:
+            targets = memoryview(mapped)[targets_start:].cast('I')
+            cursor = array('Q', offsets)
+            for batch in _read_edges(edges_file, batch_size):
+                for i in range(0, len(batch), 2):
+                    source = batch[i]
+                    targets[cursor[source]] = batch[i + 1]
+                    cursor[source] += 1
+
+            # Re-crawls append the same edges again: sort and deduplicate each row, compacting the targets in place
+            unique_count = 0
+            bounds = array('Q', offsets)
+            for node_id in range(node_count):
+                row = array('I', sorted(set(targets[bounds[node_id]:bounds[node_id + 1]])))
+                targets[unique_count:unique_count + len(row)] = row
+                unique_count += len(row)
+                offsets[node_id + 1] = unique_count
+            targets.release()
+
+        with open(temp_path, 'r+b') as f:
+            f.write(CSR_HEADER.pack(CSR_MAGIC, node_count, unique_count))
+            offsets.tofile(f)
+            f.truncate(targets_start + 4 * unique_count)
+
+    os.replace(temp_path, path)
+
+def _read_edges(edges_file, batch_size):
+    if not os.path.exists(edges_file):
+        return
+    with open(edges_file, 'rb') as f:
+        while True:
+            batch = array('I')
+            try:
+                batch.fromfile(f, 2 * batch_size)
+            except EOFError:
+                pass
+            if not batch:
+                return
+            yield batch
+
+class EdgeGraph:
+    def __init__(self, path):
+
+        # Check if path is a string
+        if not isinstance(path, str):
+            raise ValueError("Invalid value for 'path'. It must be a string.")
+
+        self.path = path
+        self.nodes_file = f"{path}.nodes"
+
+        # Map the CSR file read-only; offsets and targets are views over the mapping, nothing is copied
+        with open(path, 'rb') as f:
+            self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.node_count, self.edge_count = CSR_HEADER.unpack_from(self.mapped)
+        if magic != CSR_MAGIC:
+            self.mapped.close()
+            raise ValueError(f"Invalid edge store file {path}.")
+
+        view = memoryview(self.mapped)
+        targets_start = CSR_HEADER.size + 8 * (self.node_count + 1)
+        self.offsets = view[CSR_HEADER.size:targets_start].cast('Q')
+        self.targets = view[targets_start:targets_start + 4 * self.edge_count].cast('I')
+        view.release()
+
+        self._nodes = None
+        self._ids = None
+
+    def __len__(self):
+        return self.node_count
+
+    def following(self, node_id):
+        # IDs of the accounts node_id follows, sorted. A copy of the row, so the graph can be closed while it is in use
+        return array('I', self.targets[self.offsets[node_id]:self.offsets[node_id + 1]])
+
+    def out_degree(self, node_id):
+        return self.offsets[node_id + 1] - self.offsets[node_id]
+
+    @property
+    def nodes(self):
+        # user@domain of every node, loaded on first use
+        if self._nodes is None and not os.path.exists(self.nodes_file):
+            self._nodes = []
+        elif self._nodes is None:
+            with open(self.nodes_file, 'r', encoding='utf-8') as f:
+                self._nodes = [line.rstrip('\n') for _, line in zip(range(self.node_count), f)]
+        return self._nodes
+
+    def node_id(self, acct):
+        if self._ids is None:
+            self._ids = {acct: node_id for node_id, acct in enumerate(self.nodes)}
+        return self._ids.get(acct)
+
+    def close(self):
+        self.offsets.release()
+        self.targets.release()
+        self.mapped.close()
@@ -0,0 +1,132 @@
+import html
+import re
+from collections import deque
+
+_TAG = re.compile(r'<[^>]+>')
+
+def strip_html(content):
+    # Tags become spaces so words of adjacent paragraphs and links do not run together
+    return html.unescape(_TAG.sub(' ', content))
+
+class KeywordMatcher:
+    def __init__(self, keywords, whole_words=True):
+
+        # Check if keywords is a list of strings
+        if not isinstance(keywords, (list, tuple, set)) or not all(isinstance(keyword, str) for keyword in keywords):
+            raise ValueError("Invalid value for 'keywords'. It must be a list of strings.")
+
+        # Check if whole_words is a boolean
+        if not isinstance(whole_words, bool):
+            raise ValueError("Invalid value for 'whole_words'. It must be a boolean.")
+
+        self.whole_words = whole_words
+
+        # Aho-Corasick automaton over the lowercased keywords: trie transitions, failure links and the lengths of the keywords ending at each node
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+
+        for keyword in keywords:
+            keyword = keyword.strip().lower()
+            if not keyword:
+                continue
+
+            node = 0
+            for char in keyword:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                    self.goto[node][char] = child
+                node = child
+
+            if len(keyword) not in self.output[node]:
+                self.output[node] += (len(keyword),)
+
+        # Failure links breadth-first, so the longest proper suffix of a node is always linked before the node
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+
+                suffix = self.fail[node]
+                while suffix and char not in self.goto[suffix]:
+                    suffix = self.fail[suffix]
+                self.fail[child] = self.goto[suffix].get(char, 0)
+
+                # Keywords ending at the suffix also end here
+                self.output[child] += self.output[self.fail[child]]
+
+    def __len__(self):
+        return len(self.goto) - 1
+
+    def search(self, text):
+        # True if any keyword occurs in text, in a single pass over it
+        text = text.lower()
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            for length in output[node]:
+                if not self.whole_words:
+                    return True
+
+                # Whole words only: no letters or digits right before or after the match
+                start = end - length
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    return True
+
+        return False
+
+class StatusFilter:
+    def __init__(self, keywords=None, languages=None, with_media=False, visibility=None, whole_words=True):
+
+        # Check if languages is a list of strings
+        if languages is not None and (not isinstance(languages, (list, tuple, set)) or not all(isinstance(language, str) for language in languages)):
+            raise ValueError("Invalid value for 'languages'. It must be a list of language codes.")
+
+        # Check if with_media is a boolean
+        if not isinstance(with_media, bool):
+            raise ValueError("Invalid value for 'with_media'. It must be a boolean.")
+
+        # Check if visibility is a list of strings
+        if visibility is not None and (not isinstance(visibility, (list, tuple, set)) or not all(isinstance(value, str) for value in visibility)):
+            raise ValueError("Invalid value for 'visibility'. It must be a list of visibilities e.g. ['public', 'unlisted'].")
+
+        self.matcher = KeywordMatcher(keywords, whole_words) if keywords else None
+        self.languages = {language.lower() for language in languages} if languages else None
+        self.with_media = with_media
+        self.visibility = set(visibility) if visibility else None
+
+    def matches(self, status):
+        # Boosts are judged by the boosted status
+        source = status['reblog'] if isinstance(status.get('reblog'), dict) else status
+
+        # Cheap predicates first, the keyword scan last
+        if self.languages is not None:
+            language = (source.get('language') or '').lower()
+            if language not in self.languages and language.split('-')[0] not in self.languages:
+                return False
+
+        if self.visibility is not None and status.get('visibility') not in self.visibility:
+            return False
+
+        if self.with_media and not source.get('media_attachments'):
+            return False
+
+        if self.matcher is not None:
+            text = strip_html(source.get('content') or '')
+            if source.get('spoiler_text'):
+                text = f"{source['spoiler_text']}\n{text}"
+            return self.matcher.search(text)
+
+        return True
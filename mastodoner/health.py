@@ -0,0 +1,154 @@
+import atexit
+import json
+import os
+import threading
+import time
+import requests
+from urllib.parse import urlsplit
+
+# Status codes that indicate the host (or its proxy) is unhealthy rather than the request being wrong
+UNHEALTHY_STATUS_CODES = (502, 503, 504, 520, 521, 522, 523, 524)
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    pass
+
+class HostHealth:
+    def __init__(self, health_file=None, failure_threshold=3, recovery_timeout=300):
+
+        # Check if health_file is a string
+        if health_file is not None and not isinstance(health_file, str):
+            raise ValueError("Invalid value for 'health_file'. It must be a string.")
+
+        # Check if failure_threshold is an integer and positive
+        if not isinstance(failure_threshold, int) or failure_threshold < 1:
+            raise ValueError("Invalid value for 'failure_threshold'. It must be a positive integer.")
+
+        # Check if recovery_timeout is a number and non-negative
+        if not isinstance(recovery_timeout, (int, float)) or recovery_timeout < 0:
+            raise ValueError("Invalid value for 'recovery_timeout'. It must be a non-negative number.")
+
+        self.health_file = health_file
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        # State of each host: closed (healthy), open (dead, requests rejected) or half_open (one trial request allowed)
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+        if health_file is not None:
+            if os.path.exists(health_file):
+                with open(health_file, 'r', encoding='utf-8') as f:
+                    self.hosts = json.load(f)
+            atexit.register(self.save)
+
+    def allow(self, host):
+        with self.lock:
+            entry = self.hosts.get(host)
+
+            if entry is None or entry['state'] == 'closed':
+                return True
+
+            # Let a single trial request through once the host has been dead for recovery_timeout seconds
+            if entry['state'] == 'open' and time.time() - entry['opened_at'] >= self.recovery_timeout:
+                entry['state'] = 'half_open'
+                entry['trial_at'] = time.time()
+                return True
+
+            # A trial that never reported a result (e.g. its body could not be read) expires, and another one is let through
+            if entry['state'] == 'half_open' and time.time() - (entry.get('trial_at') or 0) >= self.recovery_timeout:
+                entry['trial_at'] = time.time()
+                return True
+
+            return False
+
+    def record_success(self, host):
+        with self.lock:
+            entry = self.hosts.get(host)
+
+            if entry is None:
+                return
+
+            entry['state'] = 'closed'
+            entry['failures'] = 0
+            entry['last_success'] = time.time()
+
+    def record_failure(self, host):
+        with self.lock:
+            entry = self.hosts.setdefault(host, {'state': 'closed', 'failures': 0, 'opened_at': None, 'last_failure': None, 'last_success': None})
+
+            entry['failures'] += 1
+            entry['last_failure'] = time.time()
+
+            # A failed trial request re-opens the circuit straight away
+            if entry['state'] == 'half_open' or entry['failures'] >= self.failure_threshold:
+                entry['state'] = 'open'
+                entry['opened_at'] = entry['last_failure']
+
+    def in_trial(self, host):
+        with self.lock:
+            entry = self.hosts.get(host)
+            return entry is not None and entry['state'] == 'half_open'
+
+    def _opened_at(self, host):
+        # When the circuit of a dead host opened, None for healthy and unknown hosts. Callers hold the lock
+        entry = self.hosts.get(host.lower())
+        if entry is None or entry['state'] == 'closed':
+            return None
+        return entry['opened_at'] or 0
+
+    def is_dead(self, host):
+        with self.lock:
+            return self._opened_at(host) is not None
+
+    def prioritize(self, hosts):
+        # Healthy and unknown hosts first (in their original order), then dead hosts starting with the longest dead
+        with self.lock:
+            opened_at = {host: self._opened_at(host) for host in hosts}
+
+        alive = [host for host in hosts if opened_at[host] is None]
+        dead = sorted((host for host in hosts if opened_at[host] is not None), key=lambda host: opened_at[host])
+        return alive + dead
+
+    def save(self):
+        if self.health_file is None:
+            return
+
+        # A trial cannot outlive the process: hosts in one are saved as dead since they were first opened
+        temp_file = f"{self.health_file}.tmp"
+        with self.lock, open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({host: dict(entry, state='open') if entry['state'] == 'half_open' else entry for host, entry in self.hosts.items()}, f)
+        os.replace(temp_file, self.health_file)
+
+class HealthCheckedSession(requests.Session):
+    def __init__(self, health, tracer=None):
+        super().__init__()
+        self.health = health
+        self.tracer = tracer
+
+    def request(self, method, url, *args, **kwargs):
+        host = urlsplit(url).hostname
+
+        if not self.health.allow(host):
+            raise CircuitOpenError(f"Circuit open for host {host} after repeated failures")
+
+        span = self.tracer.start(method, url) if self.tracer is not None else None
+
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception as e:
+            # Any failure of a trial request counts, otherwise the host would stay in its trial
+            if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)) or self.health.in_trial(host):
+                self.health.record_failure(host)
+            if span is not None:
+                self.tracer.finish(span, error=e)
+            raise
+
+        if response.status_code in UNHEALTHY_STATUS_CODES:
+            self.health.record_failure(host)
+        else:
+            self.health.record_success(host)
+
+        if span is not None:
+            self.tracer.finish(span, response, decode=not kwargs.get('stream', False))
+
+        return response
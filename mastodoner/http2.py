@@ -0,0 +1,78 @@
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# HTTP/2 support is optional: pip install mastodoner[http2]
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+def _convert_error(e, request):
+    # requests only translates urllib3 errors, so httpx errors are mapped to the requests exceptions callers already handle
+    if isinstance(e, httpx.ConnectTimeout):
+        return requests.exceptions.ConnectTimeout(e, request=request)
+    if isinstance(e, httpx.TimeoutException):
+        return requests.exceptions.ReadTimeout(e, request=request)
+    if isinstance(e, httpx.DecodingError):
+        return requests.exceptions.ContentDecodingError(e, request=request)
+    if isinstance(e, httpx.InvalidURL):
+        return requests.exceptions.InvalidURL(e, request=request)
+    return requests.exceptions.ConnectionError(e, request=request)
+
+class _ResponseBody:
+    # Minimal stand-in for the urllib3 response requests reads the body from
+    def __init__(self, response, request):
+        self.response = response
+        self.request = request
+
+    def stream(self, chunk_size=None, decode_content=True):
+        try:
+            yield from self.response.iter_bytes(chunk_size)
+        except (httpx.HTTPError, httpx.StreamError, httpx.InvalidURL) as e:
+            raise _convert_error(e, self.request)
+        finally:
+            self.response.close()
+
+    def read(self, amt=None, decode_content=True):
+        return b''.join(self.stream(amt))
+
+    def close(self):
+        self.response.close()
+
+    def release_conn(self):
+        self.response.close()
+
+class HTTP2Adapter(BaseAdapter):
+    def __init__(self, max_connections=100):
+        super().__init__()
+
+        if httpx is None:
+            raise ImportError("HTTP/2 requires the optional 'httpx[http2]' dependency.")
+
+        # One connection per host carries all concurrent requests; hosts without HTTP/2 are negotiated down to HTTP/1.1
+        self.client = httpx.Client(http2=True, limits=httpx.Limits(max_connections=max_connections), follow_redirects=False)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+
+        try:
+            http2_request = self.client.build_request(request.method, request.url, headers=dict(request.headers), content=request.body, timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+            http2_response = self.client.send(http2_request, stream=True)
+        except (httpx.HTTPError, httpx.StreamError, httpx.InvalidURL) as e:
+            raise _convert_error(e, request)
+
+        response = requests.Response()
+        response.status_code = http2_response.status_code
+        response.reason = http2_response.reason_phrase
+        response.headers = CaseInsensitiveDict(http2_response.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _ResponseBody(http2_response, request)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+CHUNK_SIZE = 64 * 1024
+
+class BandwidthLimiter:
+    def __init__(self, bytes_per_second):
+        self.bytes_per_second = bytes_per_second
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def consume(self, size):
+        # Reserve a time slot for the chunk, shared by all download threads
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + size / self.bytes_per_second
+
+        if start > now:
+            time.sleep(start - now)
+
+class MediaDownloader:
+    def __init__(self, media_dir, session, timeout, workers=8, bandwidth_limit=None):
+        self.logger = logging.getLogger(__name__)
+
+        # Check if media_dir is a string
+        if not isinstance(media_dir, str):
+            raise ValueError("Invalid value for 'media_dir'. It must be a string.")
+
+        # Check if workers is an integer and positive
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("Invalid value for 'workers'. It must be a positive integer.")
+
+        # Check if bandwidth_limit is a positive number (bytes per second)
+        if bandwidth_limit is not None and (not isinstance(bandwidth_limit, (int, float)) or bandwidth_limit <= 0):
+            raise ValueError("Invalid value for 'bandwidth_limit'. It must be a positive number of bytes per second.")
+
+        self.media_dir = media_dir
+        self.partial_dir = os.path.join(media_dir, 'partial')
+        self.index_file = os.path.join(media_dir, 'index.jsonl')
+        os.makedirs(self.partial_dir, exist_ok=True)
+
+        self.session = session
+        self.timeout = timeout
+        self.limiter = BandwidthLimiter(bandwidth_limit) if bandwidth_limit is not None else None
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+
+        # Content hash of every URL downloaded so far, so the same attachment (e.g. in boosts) is fetched once
+        self.hashes = {}
+        self.pending = set()
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.hashes[record['url']] = record['sha256']
+
+    def submit_status(self, status):
+        attachments = list(status.get('media_attachments') or [])
+        if status.get('reblog'):
+            attachments.extend(status['reblog'].get('media_attachments') or [])
+
+        for attachment in attachments:
+            url = attachment.get('url') or attachment.get('remote_url')
+            if url:
+                self.submit(url)
+
+    def submit(self, url):
+        with self.lock:
+            if url in self.hashes or url in self.pending:
+                return
+            self.pending.add(url)
+
+        self.executor.submit(self._download, url)
+
+    def path_for(self, sha256, extension=''):
+        # Spread files over 256 directories e.g. media/ab/ab12...ef.jpg
+        return os.path.join(self.media_dir, sha256[:2], sha256 + extension)
+
+    def _download(self, url):
+        partial_file = os.path.join(self.partial_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.part')
+        extension = os.path.splitext(urlsplit(url).path)[1].lower()
+        extension = extension if len(extension) <= 6 else ''
+
+        try:
+            # Resume a partial download left by an earlier run
+            hasher = hashlib.sha256()
+            offset = 0
+            if os.path.exists(partial_file):
+                with open(partial_file, 'rb') as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                        hasher.update(chunk)
+                        offset += len(chunk)
+
+            headers = {'Range': f"bytes={offset}-"} if offset > 0 else {}
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+
+                if response.status_code == 416:
+                    # The partial file already holds the whole file
+                    pass
+                elif response.status_code == 200 and offset > 0:
+                    # The server ignored the range, start over
+                    hasher = hashlib.sha256()
+                    offset = 0
+                elif response.status_code not in (200, 206):
+                    self.logger.error(f"Failed to download media {url}. Status code: {response.status_code}")
+                    return
+
+                if response.status_code != 416:
+                    with open(partial_file, 'ab' if offset > 0 else 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            if self.limiter is not None:
+                                self.limiter.consume(len(chunk))
+                            hasher.update(chunk)
+                            f.write(chunk)
+                            offset += len(chunk)
+
+            sha256 = hasher.hexdigest()
+            path = self.path_for(sha256, extension)
+
+            # Identical content is stored once
+            if os.path.exists(path):
+                os.remove(partial_file)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(partial_file, path)
+
+            with self.lock:
+                self.hashes[url] = sha256
+                with open(self.index_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'url': url, 'sha256': sha256, 'size': offset, 'path': os.path.relpath(path, self.media_dir)}) + '\n')
+
+            self.logger.info(f"Downloaded media {url} ({offset} bytes)")
+
+        except Exception as e:
+            self.logger.error(f"Error occurred while downloading media {url}: {str(e)}")
+
+        finally:
+            with self.lock:
+                self.pending.discard(url)
+
+    def close(self):
+        # Wait for queued downloads to finish
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,62 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+class StatusNormalizer:
+    def __init__(self, cache_size=100000):
+
+        # Check if cache_size is an integer and positive
+        if not isinstance(cache_size, int) or cache_size < 1:
+            raise ValueError("Invalid value for 'cache_size'. It must be a positive integer.")
+
+        self.cache_size = cache_size
+
+        # Fingerprint of the last emitted version of recently seen accounts and boosted statuses, least recently used first
+        self.accounts = OrderedDict()
+        self.reblogs = OrderedDict()
+
+    def _changed(self, cache, key, value):
+        # True if value differs from the version last emitted under key (or was evicted since)
+        fingerprint = hashlib.blake2b(json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8'), digest_size=8).digest()
+
+        changed = cache.get(key) != fingerprint
+        cache[key] = fingerprint
+        cache.move_to_end(key)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+        return changed
+
+    def _status(self, status, statuses, accounts, reblogged=False):
+        normalized = {}
+        for field, value in status.items():
+            # Embedded accounts are replaced by their ID and emitted once
+            if field == 'account' and isinstance(value, dict) and 'id' in value:
+                if self._changed(self.accounts, str(value['id']), value):
+                    accounts.append(value)
+                normalized['account_id'] = value['id']
+
+            # Boosted statuses are flattened the same way, emitted before the boost
+            elif field == 'reblog' and isinstance(value, dict) and 'id' in value:
+                self._status(value, statuses, accounts, True)
+                normalized['reblog_id'] = value['id']
+
+            else:
+                normalized[field] = value
+
+        if not reblogged or self._changed(self.reblogs, str(status['id']), normalized):
+            statuses.append(normalized)
+
+    def normalize(self, status):
+        # Returns the normalized statuses (the boosted one first) and the accounts not emitted before
+        statuses = []
+        accounts = []
+        self._status(status, statuses, accounts)
+        return statuses, accounts
+
+    def normalize_items(self, items):
+        statuses = []
+        accounts = []
+        for item in items:
+            self._status(item, statuses, accounts)
+        return statuses, accounts
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+# Index layout: header, then entries sorted by key: 8-byte hash of (host, id), byte offset and length of the line
+INDEX_MAGIC = b'MDNIDX01'
+INDEX_HEADER = struct.Struct('<8sQQ')
+INDEX_ENTRY = struct.Struct('<8sQI')
+
+def _key(host, item_id):
+    return hashlib.blake2b(f"{host}\0{item_id}".encode('utf-8'), digest_size=8).digest()
+
+def record_host(record, host):
+    # References and snapshot summaries name their instance, other records belong to the crawled host, None if it is not known.
+    # Not the host of the record's URI: that is the server the status or account comes from, while its ID is local to the crawled one
+    return record.get('instance') or host or None
+
+def build_offset_index(jsonl_file, index_file=None, host=None):
+
+    # Check if jsonl_file is a string
+    if not isinstance(jsonl_file, str):
+        raise ValueError("Invalid value for 'jsonl_file'. It must be a string.")
+
+    index_file = index_file or f"{jsonl_file}.idx"
+    entries = []
+
+    with open(jsonl_file, 'rb') as f:
+        offset = 0
+        for line in f:
+            record = json.loads(line)
+            if isinstance(record, dict) and 'id' in record:
+                entries.append((_key(record_host(record, host) or '', record['id']), offset, len(line)))
+            offset += len(line)
+
+    entries.sort()
+
+    temp_file = f"{index_file}.tmp"
+    with open(temp_file, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(entries), offset))
+        for entry in entries:
+            f.write(INDEX_ENTRY.pack(*entry))
+    os.replace(temp_file, index_file)
+
+    return len(entries)
+
+class OffsetIndexReader:
+    def __init__(self, jsonl_file, index_file=None, host=None):
+
+        # Check if jsonl_file is a string
+        if not isinstance(jsonl_file, str):
+            raise ValueError("Invalid value for 'jsonl_file'. It must be a string.")
+
+        self.host = host
+        index_file = index_file or f"{jsonl_file}.idx"
+
+        with open(index_file, 'rb') as f:
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count, size = INDEX_HEADER.unpack_from(self.index)
+        if magic != INDEX_MAGIC:
+            self.index.close()
+            raise ValueError(f"Invalid offset index file {index_file}.")
+
+        # An index built before the JSON Lines file was rewritten would point at the wrong lines
+        if os.path.getsize(jsonl_file) != size:
+            self.index.close()
+            raise ValueError(f"Offset index {index_file} is stale. Rebuild it for {jsonl_file}.")
+
+        with open(jsonl_file, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else b''
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, position):
+        return INDEX_ENTRY.unpack_from(self.index, INDEX_HEADER.size + position * INDEX_ENTRY.size)
+
+    def get(self, item_id, host=None):
+        # Records with the given ID on the given host; only the matching lines are parsed
+        host = (host if host is not None else self.host) or ''
+        key = _key(host, item_id)
+
+        # Binary search for the first entry with the key
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        items = []
+        while low < self.count:
+            entry_key, offset, length = self._entry(low)
+            if entry_key != key:
+                break
+
+            # Hashes can collide, so check the record itself
+            record = json.loads(self.data[offset:offset + length])
+            if str(record.get('id')) == str(item_id) and (record_host(record, host) or '') == host:
+                items.append(record)
+            low += 1
+
+        return items
+
+    def __contains__(self, item_id):
+        return len(self.get(item_id)) > 0
+
+    def close(self):
+        self.index.close()
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
@@ -0,0 +1,103 @@
+import gzip
+import json
+import logging
+import queue
+import threading
+
+# Marks the end of a stage's input
+_DONE = object()
+
+class Pipeline:
+    def __init__(self, output_file, decode, queue_size=16):
+        self.logger = logging.getLogger(__name__)
+
+        # Check if output_file is a string
+        if not isinstance(output_file, str):
+            raise ValueError("Invalid value for 'output_file'. It must be a string.")
+
+        # Check if queue_size is an integer and positive
+        if not isinstance(queue_size, int) or queue_size < 1:
+            raise ValueError("Invalid value for 'queue_size'. It must be a positive integer.")
+
+        self.output_file = output_file
+        self.decode = decode
+        self.count = 0
+        self.error = None
+
+        # Bounded queues between the stages: the fetcher blocks when decoding falls behind, the decoder when writing does
+        self.pages = queue.Queue(maxsize=queue_size)
+        self.records = queue.Queue(maxsize=queue_size)
+
+        # Set by a later stage to tell the fetcher no more pages are needed (e.g. the time window was passed)
+        self.stopped = threading.Event()
+
+        self.decoder = threading.Thread(target=self._decode_stage, daemon=True)
+        self.writer = threading.Thread(target=self._write_stage, daemon=True)
+        self.decoder.start()
+        self.writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def put(self, body):
+        # Raw page body from the fetch stage, or the page itself when the fetch stage already decoded it
+        self.pages.put(body)
+
+    def stop(self):
+        self.stopped.set()
+
+    def _decode_stage(self):
+        while True:
+            body = self.pages.get()
+            if body is _DONE:
+                self.records.put(_DONE)
+                return
+
+            # After an error keep draining so the fetcher never blocks
+            if self.error is not None:
+                continue
+
+            try:
+                items = self.decode(json.loads(body) if isinstance(body, (bytes, str)) else body, self)
+                if items:
+                    self.records.put(items)
+            except Exception as e:
+                self.error = e
+                self.stop()
+
+    def _write_stage(self):
+        try:
+            f = gzip.open(self.output_file, 'wt', encoding='utf-8') if self.output_file.endswith('.gz') else open(self.output_file, 'w', encoding='utf-8')
+        except Exception as e:
+            self.error = e
+            self.stop()
+            f = None
+
+        while True:
+            items = self.records.get()
+            if items is _DONE:
+                break
+            if f is None or self.error is not None:
+                continue
+
+            try:
+                f.write(''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in items))
+                self.count += len(items)
+            except Exception as e:
+                self.error = e
+                self.stop()
+
+        if f is not None:
+            f.close()
+
+    def close(self):
+        # Wait for the decode and write stages to drain
+        self.pages.put(_DONE)
+        self.decoder.join()
+        self.writer.join()
+
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,40 @@
+def compile_fields(fields):
+    # Turn field paths e.g. ['id', 'account.acct', 'media_attachments.url'] into a tree {'id': None, 'account': {'acct': None}, ...}
+    if fields is None:
+        return None
+
+    # Check if fields is a non-empty list of strings
+    if not isinstance(fields, list) or not fields or not all(isinstance(field, str) and field for field in fields):
+        raise ValueError("Invalid value for 'fields'. It must be a non-empty list of field paths e.g. ['id', 'account.acct'].")
+
+    tree = {}
+    for field in fields:
+        node = tree
+        parts = field.split('.')
+        for part in parts[:-1]:
+            if node.get(part, {}) is None:
+                # A parent path was already selected as a whole
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+
+    return tree
+
+def project(value, tree):
+    # Keep only the selected fields, applying the same selection to every element of lists
+    if tree is None:
+        return value
+
+    if isinstance(value, list):
+        return [project(element, tree) for element in value]
+
+    if isinstance(value, dict):
+        return {key: project(value[key], subtree) for key, subtree in tree.items() if key in value}
+
+    return value
+
+def project_items(items, tree):
+    if tree is None:
+        return items
+    return [project(item, tree) for item in items]
@@ -0,0 +1,138 @@
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from mastodoner.trace import add_phase
+
+class Resolver:
+    def __init__(self, positive_ttl=3600, negative_ttl=600):
+
+        # Check if positive_ttl is a number and non-negative
+        if not isinstance(positive_ttl, (int, float)) or positive_ttl < 0:
+            raise ValueError("Invalid value for 'positive_ttl'. It must be a non-negative number.")
+
+        # Check if negative_ttl is a number and non-negative
+        if not isinstance(negative_ttl, (int, float)) or negative_ttl < 0:
+            raise ValueError("Invalid value for 'negative_ttl'. It must be a non-negative number.")
+
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+
+        # Addresses of each host (empty list for unresolvable hosts) and when the answer expires
+        self.cache = {}
+
+    def _lookup(self, host):
+        try:
+            infos = socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+            return list(dict.fromkeys(info[4][0] for info in infos))
+        except (socket.gaierror, UnicodeError):
+            return []
+
+    def _store(self, host, addresses):
+        ttl = self.positive_ttl if addresses else self.negative_ttl
+        self.cache[host] = (addresses, time.time() + ttl)
+
+    def cached(self, host):
+        addresses, expires_at = self.cache.get(host.lower().rstrip('.'), (None, 0))
+        if time.time() >= expires_at:
+            return None
+        return addresses
+
+    def evict(self, host):
+        self.cache.pop(host.lower().rstrip('.'), None)
+
+    def resolve(self, host):
+        host = host.lower().rstrip('.')
+
+        addresses = self.cached(host)
+        if addresses is None:
+            addresses = self._lookup(host)
+            self._store(host, addresses)
+
+        return addresses
+
+    def resolve_many(self, hosts, workers=64, timeout=None):
+
+        # Check if workers is an integer and positive
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("Invalid value for 'workers'. It must be a positive integer.")
+
+        # Check if timeout is a number and positive
+        if timeout is not None and (not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise ValueError("Invalid value for 'timeout'. It must be a positive number.")
+
+        hosts = list(dict.fromkeys(host.lower().rstrip('.') for host in hosts))
+        pending = [host for host in hosts if self.cached(host) is None]
+
+        if pending:
+            executor = ThreadPoolExecutor(max_workers=min(workers, len(pending)))
+            futures = {executor.submit(self._lookup, host): host for host in pending}
+            done, not_done = wait(futures, timeout=timeout)
+
+            for future in done:
+                self._store(futures[future], future.result())
+
+            # Hosts that did not answer within the timeout are treated as unresolvable
+            for future in not_done:
+                future.cancel()
+                self._store(futures[future], [])
+
+            executor.shutdown(wait=False)
+
+        return {host: self.cached(host) for host in hosts}
+
+def _resolving_pool_class(pool_class, connection_class, resolver):
+
+    class ResolvingConnection(connection_class):
+        def connect(self):
+            self._dns_time = 0.0
+            started = time.perf_counter()
+            super().connect()
+
+            # Traced separately: the DNS lookup, and the TCP (and TLS) handshake
+            add_phase('dns', self._dns_time)
+            add_phase('connect', time.perf_counter() - started - self._dns_time)
+
+        def _new_conn(self):
+            started = time.perf_counter()
+            addresses = resolver.resolve(self.host)
+            self._dns_time = time.perf_counter() - started
+            if not addresses:
+                raise NewConnectionError(self, f"Failed to resolve host {self.host} (cached)")
+
+            # Try each cached address in turn, as socket.create_connection does
+            host = self._dns_host
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError as e:
+                    # NewConnectionError is a ConnectTimeoutError too
+                    error = e
+                finally:
+                    # The host property reads _dns_host: restore the hostname for SNI and the Host header
+                    self._dns_host = host
+
+            # None of the addresses is reachable: they may be stale, resolve the host again next time
+            resolver.evict(host)
+            raise error
+
+    class ResolvingConnectionPool(pool_class):
+        ConnectionCls = ResolvingConnection
+
+    return ResolvingConnectionPool
+
+class ResolvingAdapter(HTTPAdapter):
+    def __init__(self, resolver, *args, **kwargs):
+        self.resolver = resolver
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _resolving_pool_class(HTTPConnectionPool, HTTPConnection, self.resolver),
+            'https': _resolving_pool_class(HTTPSConnectionPool, HTTPSConnection, self.resolver),
+        }
@@ -0,0 +1,184 @@
+import contextlib
+import heapq
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from mastodoner.crawler import Crawler
+
+# Keyword arguments of crawler methods that take datetimes
+DATETIME_KWARGS = ['since', 'until']
+
+class Scheduler:
+    def __init__(self, specs, crawler=None, workers=4, host_spacing=5, jitter=0.1):
+        self.logger = logging.getLogger(__name__)
+
+        # Check if specs is a non-empty list of dicts
+        if not isinstance(specs, list) or not specs or not all(isinstance(spec, dict) for spec in specs):
+            raise ValueError("Invalid value for 'specs'. It must be a non-empty list of crawl specs.")
+
+        # Check if workers is an integer and positive
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("Invalid value for 'workers'. It must be a positive integer.")
+
+        # Check if host_spacing is a number and non-negative
+        if not isinstance(host_spacing, (int, float)) or host_spacing < 0:
+            raise ValueError("Invalid value for 'host_spacing'. It must be a non-negative number.")
+
+        # Check if jitter is a number between 0 and 1
+        if not isinstance(jitter, (int, float)) or not 0 <= jitter < 1:
+            raise ValueError("Invalid value for 'jitter'. It must be a number between 0 and 1 (fraction of the interval).")
+
+        self.specs = [self._check_spec(spec, i) for i, spec in enumerate(specs)]
+
+        # One warm crawler (connections, DNS cache, rate-limit state) for every run
+        self.crawler = crawler if crawler is not None else Crawler()
+        self.workers = workers
+        self.host_spacing = host_spacing
+        self.jitter = jitter
+
+        self.lock = threading.Lock()
+        self.active = set()
+        self.host_last_start = {}
+        self.stopped = threading.Event()
+
+    def _check_spec(self, spec, index):
+        # e.g. {"method": "instance_trends_all", "args": ["mastodon.social"], "interval": 3600, "output_file": "trends-{run_at:%Y%m%d}.jsonl"}
+        method = spec.get('method')
+        if not isinstance(method, str) or method.startswith('_') or not callable(getattr(Crawler, method, None)):
+            raise ValueError(f"Invalid crawl spec {index}: unknown method '{method}'.")
+
+        interval = spec.get('interval')
+        if not isinstance(interval, (int, float)) or interval <= 0:
+            raise ValueError(f"Invalid crawl spec {index}: 'interval' must be a positive number of seconds.")
+
+        args = spec.get('args', [])
+        kwargs = spec.get('kwargs', {})
+        if not isinstance(args, list) or not isinstance(kwargs, dict):
+            raise ValueError(f"Invalid crawl spec {index}: 'args' must be a list and 'kwargs' a dict.")
+
+        # Runs on the same host are spaced apart; the host is the instance URL or the domain of a username
+        host = spec.get('host')
+        if host is None and args and isinstance(args[0], str):
+            host = args[0].split('@')[-1].lower()
+
+        # Specs of the same method and arguments may differ only in their keyword arguments
+        arguments = [str(arg) for arg in args] + [f"{key}={kwargs[key]}" for key in sorted(kwargs)]
+
+        # JSON has no datetimes: since and until are given in ISO format e.g. 2024-05-01 or 2024-05-01T12:00:00Z (naive values are UTC)
+        kwargs = dict(kwargs)
+        for key in DATETIME_KWARGS:
+            if isinstance(kwargs.get(key), str):
+                value = kwargs[key]
+                try:
+                    kwargs[key] = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+                except ValueError:
+                    raise ValueError(f"Invalid crawl spec {index}: '{key}' must be in ISO format e.g. 2024-05-01 or 2024-05-01T12:00:00.")
+
+        return {
+            'index': index,
+            'name': spec.get('name') or f"{method}({', '.join(arguments)})",
+            'method': method,
+            'args': args,
+            'kwargs': kwargs,
+            'interval': interval,
+            'host': host,
+            'output_file': spec.get('output_file'),
+        }
+
+    def _next_run(self, scheduled_at, interval):
+        # Jitter keeps runs with the same interval from drifting into lockstep
+        return scheduled_at + interval + random.uniform(-self.jitter, self.jitter) * interval
+
+    def _run(self, spec):
+        index = self.crawler.status_index
+
+        # Statuses of this run are recorded as seen once saved, independently of other runs. After a failed run they are crawled again
+        with index.batch() if index is not None else contextlib.nullcontext() as batch:
+            saved = self._crawl(spec)
+            if batch is not None:
+                if saved:
+                    index.flush(batch)
+                else:
+                    index.discard(batch)
+
+    def _crawl(self, spec):
+        # Returns True once the items of the run have been saved
+        run_at = datetime.utcnow()
+        try:
+            items = list(getattr(self.crawler, spec['method'])(*spec['args'], **spec['kwargs']))
+
+            if spec['output_file'] and len(items) > 0:
+                output_file = spec['output_file'].format(run_at=run_at)
+                directory = os.path.dirname(output_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(output_file, 'a', encoding='utf-8') as f:
+                    for item in items:
+                        f.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+            self.logger.info(f"Scheduled run {spec['name']} finished with {len(items)} items")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error occurred in scheduled run {spec['name']}: {str(e)}")
+            return False
+
+        finally:
+            with self.lock:
+                self.active.discard(spec['index'])
+
+    def run(self, duration=None):
+        # Runs the specs until stop() is called (or for duration seconds)
+        now = time.monotonic()
+        deadline = now + duration if duration is not None else None
+
+        # Entries are (due, scheduled_at, spec index): a run held back by host spacing becomes due later but keeps its schedule
+        # First runs are spread over each spec's interval instead of all starting at once
+        queue = []
+        for i, spec in enumerate(self.specs):
+            scheduled_at = now + random.uniform(0, spec['interval'])
+            queue.append((scheduled_at, scheduled_at, i))
+        heapq.heapify(queue)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while not self.stopped.is_set():
+                due, scheduled_at, i = queue[0]
+                spec = self.specs[i]
+
+                now = time.monotonic()
+                if deadline is not None and due >= deadline:
+                    break
+                if due > now:
+                    self.stopped.wait(due - now)
+                    continue
+
+                # Respect the spacing between runs on the same host, without holding up runs on other hosts
+                if spec['host'] is not None:
+                    start_at = self.host_last_start.get(spec['host'], float('-inf')) + self.host_spacing
+                    if start_at > now:
+                        heapq.heapreplace(queue, (start_at, scheduled_at, i))
+                        continue
+
+                next_run = self._next_run(scheduled_at, spec['interval'])
+                heapq.heapreplace(queue, (next_run, next_run, i))
+
+                # Skip the run if the previous one is still going
+                with self.lock:
+                    if i in self.active:
+                        self.logger.warning(f"Skipping scheduled run {spec['name']} as its previous run is still active")
+                        continue
+                    self.active.add(i)
+
+                if spec['host'] is not None:
+                    self.host_last_start[spec['host']] = now
+
+                self.logger.info(f"Starting scheduled run {spec['name']}")
+                executor.submit(self._run, spec)
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,103 @@
+import contextlib
+import json
+import os
+import socketserver
+from mastodoner.client import DEFAULT_SOCKET_PATH, decode_value
+from mastodoner.crawler import Crawler
+
+class CrawlRequestHandler(socketserver.StreamRequestHandler):
+
+    def send(self, message):
+        self.wfile.write((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+
+    def handle(self):
+        crawler = self.server.crawler
+        index = crawler.status_index
+
+        # Statuses of this job are recorded as seen once they reached the client, independently of other jobs. After a failure they are crawled again
+        with index.batch() if index is not None else contextlib.nullcontext() as batch:
+            saved = self.run_job(crawler)
+            if batch is not None:
+                if saved:
+                    index.flush(batch)
+                else:
+                    index.discard(batch)
+
+    def run_job(self, crawler):
+        # Returns True once every item has been sent
+        saved = False
+
+        try:
+            job = json.loads(self.rfile.readline(), object_hook=decode_value)
+            method = job['method']
+            args = job.get('args', [])
+            kwargs = job.get('kwargs', {})
+
+            # Only expose public Crawler methods
+            if not isinstance(method, str) or method.startswith('_') or not callable(getattr(Crawler, method, None)):
+                raise ValueError(f"Unknown method '{method}'.")
+
+            crawler.logger.info(f"Running job {method} submitted to daemon")
+            items = getattr(crawler, method)(*args, **kwargs)
+
+            count = 0
+            for item in items:
+                self.send({'item': item})
+                count += 1
+
+            self.send({'done': True, 'count': count})
+            saved = True
+
+        except (ValueError, TypeError, KeyError) as e:
+            crawler.logger.error(f"Rejected job submitted to daemon: {str(e)}")
+            self.send({'error': str(e)})
+
+        except (BrokenPipeError, ConnectionResetError):
+            crawler.logger.warning("Client disconnected before job finished")
+
+        except Exception as e:
+            # Any other failure is reported to the client instead of closing the connection without an answer
+            crawler.logger.error(f"Job submitted to daemon failed: {str(e)}")
+            try:
+                self.send({'error': str(e)})
+            except OSError:
+                pass
+
+        return saved
+
+class CrawlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, crawler=None):
+
+        # Check if socket_path is a string
+        if not isinstance(socket_path, str):
+            raise ValueError("Invalid value for 'socket_path'. It must be a string.")
+
+        # Jobs run concurrently on one warm Crawler, which shares its rate-limit state between them
+        self.crawler = crawler if crawler is not None else Crawler()
+        self.socket_path = socket_path
+
+        # Remove stale socket left behind by a previous daemon
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        # Create the socket readable and writable by its owner only, leaving no window in which others can connect
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, CrawlRequestHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+def serve(socket_path=DEFAULT_SOCKET_PATH, crawler=None):
+    server = CrawlServer(socket_path, crawler)
+    server.crawler.logger.info(f"mastodoner daemon listening on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+from datetime import date as Date, datetime
+
+# Instance endpoints whose responses are snapshotted, and how they are stored
+SNAPSHOT_KINDS = ['peers', 'blocks', 'activity']
+
+def _key(entry):
+    # Entries are compared by their canonical JSON e.g. a domain, or a block with its severity and comment
+    return json.dumps(entry, sort_keys=True, ensure_ascii=False)
+
+class SnapshotStore:
+    def __init__(self, snapshot_dir, rebase_every=30):
+
+        # Check if snapshot_dir is a string
+        if not isinstance(snapshot_dir, str):
+            raise ValueError("Invalid value for 'snapshot_dir'. It must be a string.")
+
+        # Check if rebase_every is an integer and positive
+        if not isinstance(rebase_every, int) or rebase_every < 1:
+            raise ValueError("Invalid value for 'rebase_every'. It must be a positive integer.")
+
+        self.snapshot_dir = snapshot_dir
+        self.rebase_every = rebase_every
+        self.lock = threading.Lock()
+
+    def _path(self, kind, host):
+        # Check if kind is a valid snapshot kind
+        if kind not in SNAPSHOT_KINDS:
+            raise ValueError(f"Invalid value for 'kind'. It must be one of {', '.join(SNAPSHOT_KINDS)}.")
+
+        return os.path.join(self.snapshot_dir, kind, f"{host.lower()}.jsonl")
+
+    def _date(self, value):
+        if value is None:
+            return datetime.utcnow().date().isoformat()
+        if isinstance(value, (Date, datetime)):
+            return value.strftime('%Y-%m-%d')
+
+        # Check if date is an ISO date
+        try:
+            return Date.fromisoformat(value).isoformat()
+        except (TypeError, ValueError):
+            raise ValueError("Invalid value for 'date'. It must be a date or an ISO date string e.g. 2024-05-01.")
+
+    def _records(self, path):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def _replay(self, path, until=None):
+        # Entries (keyed by canonical JSON, in insertion order) as of the last snapshot on or before until
+        entries = None
+        deltas = 0
+        for record in self._records(path):
+            if until is not None and record['date'] > until:
+                break
+            if 'base' in record:
+                entries = {_key(entry): entry for entry in record['base']}
+                deltas = 0
+            else:
+                for entry in record['removed']:
+                    entries.pop(_key(entry), None)
+                for entry in record['added']:
+                    entries[_key(entry)] = entry
+                deltas += 1
+        return entries, deltas
+
+    def save(self, kind, host, entries, date=None):
+        # Appends the snapshot of host for date, as a full base or only the entries added and removed since the last one
+        path = self._path(kind, host)
+        date = self._date(date)
+
+        with self.lock:
+            previous, deltas = self._replay(path)
+            current = {_key(entry): entry for entry in entries}
+
+            previous = previous if previous is not None else {}
+            added = [entry for key, entry in current.items() if key not in previous]
+            removed = [entry for key, entry in previous.items() if key not in current]
+
+            # A full base is written for the first snapshot and every rebase_every deltas, bounding the replay needed to rebuild
+            if not previous or deltas >= self.rebase_every:
+                record = {'date': date, 'base': list(current.values())}
+            else:
+                record = {'date': date, 'added': added, 'removed': removed}
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        return {'instance': host, 'kind': kind, 'date': date, 'size': len(current), 'added': len(added), 'removed': len(removed)}
+
+    def load(self, kind, host, date=None):
+        # Rebuilds the full list as of date (default: latest snapshot)
+        path = self._path(kind, host)
+        until = self._date(date) if date is not None else None
+
+        with self.lock:
+            entries, _ = self._replay(path, until)
+
+        return list(entries.values()) if entries is not None else []
+
+    def dates(self, kind, host):
+        path = self._path(kind, host)
+        with self.lock:
+            return [record['date'] for record in self._records(path)]
@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+# Mastodon status IDs are the creation time in milliseconds since the epoch shifted left by 16 bits (the low bits are a sequence)
+SEQUENCE_BITS = 16
+
+def to_utc(value):
+    # Normalize to a naive UTC datetime, the representation used throughout the crawler
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def datetime_to_snowflake(value):
+    milliseconds = int(to_utc(value).replace(tzinfo=timezone.utc).timestamp() * 1000)
+    return str(milliseconds << SEQUENCE_BITS)
+
+def snowflake_to_datetime(status_id):
+    milliseconds = int(status_id) >> SEQUENCE_BITS
+    return datetime.fromtimestamp(milliseconds / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+def parse_created_at(created_at):
+    # e.g. '2024-05-01T12:34:56.000Z'
+    if created_at.endswith('Z'):
+        created_at = created_at[:-1] + '+00:00'
+    return to_utc(datetime.fromisoformat(created_at))
+
+def within_window(statuses, since=None, until=None):
+    # Keep statuses created in [since, until) and report whether the page reached back past since
+    if since is None and until is None:
+        return statuses, False
+
+    kept = []
+    reached_since = False
+    for status in statuses:
+        created_at = parse_created_at(status['created_at'])
+        if since is not None and created_at < since:
+            reached_since = True
+        elif until is None or created_at < until:
+            kept.append(status)
+
+    return kept, reached_since
@@ -0,0 +1,240 @@
+import json
+import math
+from datetime import datetime, timezone
+
+# Summaries are computed with NumPy, which is optional: pip install mastodoner[summary]
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PERCENTILES = [50, 90, 99]
+
+# Columns of weekly activity records, and per-instance metrics of nodeinfo and instance information records
+ACTIVITY_COLUMNS = ['statuses', 'logins', 'registrations']
+INSTANCE_METRICS = ['users', 'active_month', 'active_halfyear', 'local_posts', 'open_registrations']
+
+def _number(value):
+    # Missing or malformed values become NaN and are left out of the aggregates
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def _instance_metrics(record):
+    # Source ('nodeinfo' or 'instance'), host (None if the record does not name it) and metrics of a record
+    usage = record.get('usage') if isinstance(record.get('usage'), dict) else {}
+    users = usage.get('users') if isinstance(usage.get('users'), dict) else {}
+
+    # Nodeinfo names the software but not the host, instance information (api/v2/instance) names its domain
+    if isinstance(record.get('software'), dict):
+        host = record.get('instance')
+        return 'nodeinfo', host.lower() if isinstance(host, str) else None, [users.get('total'), users.get('activeMonth'), users.get('activeHalfyear'), usage.get('localPosts'), record.get('openRegistrations')]
+
+    registrations = record.get('registrations') if isinstance(record.get('registrations'), dict) else {}
+    host = record.get('domain')
+    return 'instance', host.lower() if isinstance(host, str) else None, [None, users.get('active_month'), None, None, registrations.get('enabled')]
+
+def _merge_metrics(sources):
+    # Nodeinfo metrics of an instance first, instance information only fills in what nodeinfo lacks
+    nodeinfo = sources.get('nodeinfo') or [None] * len(INSTANCE_METRICS)
+    instance = sources.get('instance') or [None] * len(INSTANCE_METRICS)
+    return [value if value is not None else fallback for value, fallback in zip(nodeinfo, instance)]
+
+class _Columns:
+    # Rows are buffered as Python lists and moved into a NumPy array every chunk_size rows
+    def __init__(self, width, chunk_size):
+        self.width = width
+        self.chunk_size = chunk_size
+        self.rows = []
+        self.chunks = []
+
+    def append(self, row):
+        self.rows.append([_number(value) for value in row])
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.chunks.append(np.array(self.rows, dtype=np.float64))
+            self.rows = []
+
+    def array(self):
+        self.flush()
+        return np.concatenate(self.chunks) if self.chunks else np.empty((0, self.width))
+
+def _grouped_stats(groups, values, group_count):
+    # Count, sum, mean, percentiles and maximum of the values of each group, ignoring NaN
+    valid = ~np.isnan(values)
+    groups = groups[valid]
+    values = values[valid]
+
+    counts = np.bincount(groups, minlength=group_count)
+    sums = np.bincount(groups, weights=values, minlength=group_count)
+    nonempty = counts > 0
+
+    # Sorted by group, then value: the values of each group form a sorted run
+    values = values[np.lexsort((values, groups))]
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    stats = {'instances': counts, 'sum': sums, 'mean': np.full(group_count, np.nan)}
+    stats['mean'][nonempty] = sums[nonempty] / counts[nonempty]
+
+    for q in PERCENTILES:
+        # Linear interpolation between the closest ranks, as numpy.percentile does
+        position = starts[nonempty] + (counts[nonempty] - 1) * q / 100
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        stats[f"p{q}"] = np.full(group_count, np.nan)
+        stats[f"p{q}"][nonempty] = values[low] + (values[high] - values[low]) * (position - low)
+
+    stats['max'] = np.full(group_count, np.nan)
+    stats['max'][nonempty] = values[ends[nonempty] - 1]
+    return stats
+
+def _value(value):
+    # JSON-friendly Python number, None for NaN
+    value = float(value)
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else round(value, 3)
+
+def summarize_outputs(input_files, chunk_size=100000):
+
+    if np is None:
+        raise ImportError("Summaries require the optional 'numpy' dependency (pip install mastodoner[summary]).")
+
+    # Check if input_files is a non-empty list of strings
+    if not isinstance(input_files, list) or not input_files or not all(isinstance(input_file, str) for input_file in input_files):
+        raise ValueError("Invalid value for 'input_files'. It must be a non-empty list of strings.")
+
+    # Check if chunk_size is an integer and positive
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError("Invalid value for 'chunk_size'. It must be a positive integer.")
+
+    activity = _Columns(1 + len(ACTIVITY_COLUMNS), chunk_size)
+    instances = _Columns(len(INSTANCE_METRICS), chunk_size)
+    sources = {}
+    software = []
+    software_counts = {}
+
+    def count_software():
+        # Counted a chunk at a time so only the distinct (software, version) pairs are kept
+        if software:
+            keys, counts = np.unique(np.array(software), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                software_counts[key] = software_counts.get(key, 0) + count
+            software.clear()
+
+    # Activity, nodeinfo and instance information records can be mixed in any of the files
+    for input_file in input_files:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    continue
+
+                if 'week' in record:
+                    activity.append([record['week']] + [record.get(column) for column in ACTIVITY_COLUMNS])
+
+                elif isinstance(record.get('usage'), dict):
+                    source, host, metrics = _instance_metrics(record)
+
+                    # Both kinds of record can describe the same instance: merge them by host, a later record of a kind replacing an earlier one
+                    if host is not None:
+                        sources.setdefault(host, {})[source] = metrics
+                    else:
+                        sources.setdefault(None, {}).setdefault(source, []).append(metrics)
+
+                    if isinstance(record.get('software'), dict):
+                        software.append(f"{record['software'].get('name') or ''}\t{record['software'].get('version') or ''}")
+                        if len(software) >= chunk_size:
+                            count_software()
+
+    count_software()
+
+    # Records that do not name their host cannot be matched to records of the other kind, and would count their instance twice
+    unnamed = sources.pop(None, {})
+    if len(unnamed) > 1 or (unnamed and any(set(known) - set(unnamed) for known in sources.values())):
+        raise ValueError("Cannot match node information records, which do not name their instance, to instance information records. Summarize them separately.")
+
+    for known in sources.values():
+        instances.append(_merge_metrics(known))
+    for rows in unnamed.values():
+        for metrics in rows:
+            instances.append(metrics)
+
+    summary = {'activity': [], 'instances': [], 'software': []}
+
+    # Weekly totals and the distribution over instances, newest week first
+    weeks = activity.array()
+    weeks = weeks[~np.isnan(weeks[:, 0])]
+    if len(weeks) > 0:
+        week_starts, groups = np.unique(weeks[:, 0], return_inverse=True)
+        columns = {column: _grouped_stats(groups, weeks[:, i + 1], len(week_starts)) for i, column in enumerate(ACTIVITY_COLUMNS)}
+        instance_counts = np.bincount(groups, minlength=len(week_starts))
+
+        for g in reversed(range(len(week_starts))):
+            row = {'week': datetime.fromtimestamp(week_starts[g], tz=timezone.utc).strftime('%Y-%m-%d'), 'instances': int(instance_counts[g])}
+            for column, stats in columns.items():
+                row[column] = _value(stats['sum'][g])
+                for statistic in [f"p{q}" for q in PERCENTILES] + ['max']:
+                    row[f"{column}_{statistic}"] = _value(stats[statistic][g])
+            summary['activity'].append(row)
+
+    # Distribution of each metric over instances
+    metrics = instances.array()
+    if len(metrics) > 0:
+        groups = np.zeros(len(metrics), dtype=np.int64)
+        for i, metric in enumerate(INSTANCE_METRICS):
+            stats = _grouped_stats(groups, metrics[:, i], 1)
+            if stats['instances'][0] > 0:
+                summary['instances'].append({'metric': metric, **{statistic: _value(values[0]) for statistic, values in stats.items()}})
+
+    total = sum(software_counts.values())
+    for key, count in sorted(software_counts.items(), key=lambda item: (-item[1], item[0])):
+        name, version = key.split('\t')
+        summary['software'].append({'software': name, 'version': version, 'instances': count, 'share': round(count / total, 4)})
+
+    return summary
+
+def _cell(value):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:.3f}" if abs(value) < 10 else f"{value:.1f}"
+    return str(value)
+
+def format_tables(summary, top=20):
+    lines = []
+
+    if summary['activity']:
+        statistics = ['', '_p50', '_p90']
+        columns = ['instances'] + [f"{column}{suffix}" for column in ACTIVITY_COLUMNS for suffix in statistics]
+        lines.append('Weekly activity (sum over instances and percentiles per instance)')
+
+        # Headers grouped by metric: the metric spans its sum and percentile columns
+        width = 14 * len(statistics)
+        lines.append(f"  {'':<12}{'':>14}" + ''.join(f"    {' ' + column + ' ':-^{width - 4}}" for column in ACTIVITY_COLUMNS))
+        lines.append(f"  {'week':<12}{'instances':>14}" + ''.join(f"{suffix.lstrip('_') or 'sum':>14}" for _ in ACTIVITY_COLUMNS for suffix in statistics))
+        for row in summary['activity']:
+            lines.append(f"  {row['week']:<12}" + ''.join(f"{_cell(row[column]):>14}" for column in columns))
+        lines.append('')
+
+    if summary['instances']:
+        columns = ['instances', 'sum', 'mean'] + [f"p{q}" for q in PERCENTILES] + ['max']
+        lines.append('Instances')
+        lines.append(f"  {'metric':<20}" + ''.join(f"{column:>14}" for column in columns))
+        for row in summary['instances']:
+            lines.append(f"  {row['metric']:<20}" + ''.join(f"{_cell(row[column]):>14}" for column in columns))
+        lines.append('')
+
+    if summary['software']:
+        lines.append(f"Software versions (top {min(top, len(summary['software']))} of {len(summary['software'])})")
+        lines.append(f"  {'software':<20}{'version':<30}{'instances':>12}{'share':>10}")
+        for row in summary['software'][:top]:
+            lines.append(f"  {row['software'][:19]:<20}{row['version'][:29]:<30}{row['instances']:>12}{row['share']:>10.1%}")
+        lines.append('')
+
+    return '\n'.join(lines)
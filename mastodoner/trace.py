@@ -0,0 +1,136 @@
+import atexit
+import json
+import math
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Phases of a request, in the order they happen (milliseconds in the trace file)
+PHASES = ['wait', 'dns', 'connect', 'ttfb', 'body', 'decode', 'total']
+
+PERCENTILES = [50, 90, 99]
+
+# The span of the request in flight on each thread, so connection hooks can add to it
+_local = threading.local()
+
+def add_phase(phase, seconds):
+    span = getattr(_local, 'span', None)
+    if span is not None:
+        span[phase] = span.get(phase, 0.0) + seconds
+
+def endpoint_of(url):
+    # Collapse IDs and hashtags so requests to the same endpoint are grouped e.g. /api/v1/accounts/:id/statuses
+    path = urlsplit(url).path
+    path = re.sub(r'/timelines/tag/[^/]+', '/timelines/tag/:tag', path)
+    return re.sub(r'/\d+(?=/|$)', '/:id', path)
+
+class Tracer:
+    def __init__(self, trace_file):
+
+        # Check if trace_file is a string
+        if not isinstance(trace_file, str):
+            raise ValueError("Invalid value for 'trace_file'. It must be a string.")
+
+        self.trace_file = trace_file
+        self.file = open(trace_file, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+
+        atexit.register(self.close)
+
+    def add_wait(self, seconds):
+        # Rate-limit waits are attributed to the next request of the same thread
+        _local.wait = getattr(_local, 'wait', 0.0) + seconds
+
+    def start(self, method, url):
+        span = {
+            'ts': round(time.time(), 3),
+            'host': urlsplit(url).hostname,
+            'endpoint': endpoint_of(url),
+            'method': method.upper(),
+            'wait': getattr(_local, 'wait', 0.0),
+            'started': time.perf_counter(),
+        }
+        _local.wait = 0.0
+        _local.span = span
+        return span
+
+    def finish(self, span, response=None, error=None, decode=True):
+        _local.span = None
+        total = time.perf_counter() - span.pop('started')
+
+        if response is not None:
+            span['status'] = response.status_code
+
+            # requests times the adapter up to the response headers; the body of non-streamed responses is read after
+            elapsed = response.elapsed.total_seconds()
+            span['ttfb'] = max(0.0, elapsed - span.get('dns', 0.0) - span.get('connect', 0.0))
+            span['body'] = max(0.0, total - elapsed)
+
+            # Decode the JSON body here so its cost is part of the span; the response then returns the decoded value
+            if decode and 'json' in response.headers.get('Content-Type', ''):
+                started = time.perf_counter()
+                try:
+                    value = response.json()
+                except ValueError:
+                    pass
+                else:
+                    response.json = lambda **kwargs: value
+                    span['items'] = len(value) if isinstance(value, list) else 1
+                span['decode'] = time.perf_counter() - started
+                total += span['decode']
+
+        if error is not None:
+            span['error'] = type(error).__name__
+
+        span['total'] = total
+        for phase in PHASES:
+            if phase in span:
+                span[phase] = round(span[phase] * 1000, 1)
+
+        with self.lock:
+            if not self.file.closed:
+                self.file.write(json.dumps(span, separators=(',', ':')) + '\n')
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+def percentile(values, q):
+    # Nearest-rank percentile of sorted values
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+def summarize_trace(trace_file):
+    groups = {}
+    with open(trace_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            span = json.loads(line)
+            group = groups.setdefault((span['host'], span['endpoint']), {'requests': 0, 'items': 0, 'errors': 0, 'phases': {phase: [] for phase in PHASES}})
+            group['requests'] += 1
+            group['items'] += span.get('items', 0)
+            if 'error' in span or span.get('status', 200) >= 400:
+                group['errors'] += 1
+            for phase in PHASES:
+                group['phases'][phase].append(span.get(phase, 0.0))
+
+    summary = []
+    for (host, endpoint), group in sorted(groups.items(), key=lambda item: -sum(item[1]['phases']['total'])):
+        phases = {}
+        for phase, values in group['phases'].items():
+            values.sort()
+            phases[phase] = {f"p{q}": percentile(values, q) for q in PERCENTILES}
+            phases[phase]['max'] = values[-1]
+            phases[phase]['sum'] = round(sum(values), 1)
+        summary.append({'host': host, 'endpoint': endpoint, 'requests': group['requests'], 'items': group['items'], 'errors': group['errors'], 'phases': phases})
+
+    return summary
+
+def format_summary(summary):
+    lines = []
+    for group in summary:
+        lines.append(f"{group['host']} {group['endpoint']}  requests={group['requests']} items={group['items']} errors={group['errors']}")
+        lines.append(f"  {'phase (ms)':<12}" + ''.join(f"{column:>10}" for column in [f"p{q}" for q in PERCENTILES] + ['max', 'sum']))
+        for phase, stats in group['phases'].items():
+            lines.append(f"  {phase:<12}" + ''.join(f"{value:>10.1f}" for value in stats.values()))
+        lines.append('')
+    return '\n'.join(lines)
@@ -38,4 +38,8 @@ setup(
     install_requires=[
         'requests',
     ],
+    extras_require={
+        'http2': ['httpx[http2]'],
+        'summary': ['numpy'],
+    },
 )
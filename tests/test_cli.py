@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from mastodoner import cli
+from mastodoner.crawler import Crawler
+from mastodoner.server import CrawlServer
+
+class SocketCommandTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, 'mastodoner.sock')
+        self.output_file = os.path.join(self.directory, 'peers.jsonl')
+        self.crawler = Crawler(probe_capabilities=False, snapshot_dir=os.path.join(self.directory, 'snapshots'))
+        self.server = CrawlServer(self.socket_path, self.crawler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def run_cli(self, *arguments):
+        # Exit code of the command, 0 if it returned without exiting
+        with mock.patch.object(sys, 'argv', ['mastodoner', '--socket', self.socket_path] + list(arguments)):
+            try:
+                cli.main()
+            except SystemExit as e:
+                return e.code
+        return 0
+
+    def test_snapshot_uses_store_of_daemon(self):
+        self.crawler.instance_peers = lambda instance_url, probe=True: [{'peers': ['b.example.org', 'c.example.org']}]
+
+        self.assertEqual(self.run_cli('instance', '--instance-url', 'a.example.org', '--peers', '--snapshot', self.output_file), 0)
+        with open(self.output_file, 'r', encoding='utf-8') as f:
+            summary = json.loads(f.readline())
+        self.assertEqual(summary['instance'], 'a.example.org')
+        self.assertEqual(summary['added'], 2)
+
+    def test_missing_store_of_daemon_is_reported(self):
+        self.crawler.snapshots = None
+        with self.assertRaisesRegex(ValueError, 'snapshot directory'):
+            self.run_cli('instance', '--instance-url', 'a.example.org', '--peers', '--snapshot', self.output_file)
+
+    def test_options_of_daemon_are_rejected(self):
+        with mock.patch.object(sys, 'stderr'):
+            self.assertEqual(self.run_cli('--snapshot-dir', self.directory, 'instance', '--instance-url', 'a.example.org', '--peers', '--snapshot', self.output_file), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+from mastodoner.compact import compact_outputs
+from mastodoner.offsets import OffsetIndexReader, build_offset_index
+
+def write_jsonl(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+def read_shards(shards):
+    records = []
+    for shard in shards:
+        with open(shard, 'r', encoding='utf-8') as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+class CompactTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.first = os.path.join(self.directory, 'first.jsonl')
+        self.second = os.path.join(self.directory, 'second.jsonl')
+        self.prefix = os.path.join(self.directory, 'compacted')
+
+    def test_newest_record_wins(self):
+        write_jsonl(self.first, [{'id': '100', 'content': 'old'}, {'id': '9', 'content': 'kept'}])
+        write_jsonl(self.second, [{'id': '100', 'content': 'new'}])
+
+        summary = compact_outputs([self.first, self.second], self.prefix, 'mastodon.online', chunk_size=1)
+        self.assertEqual(summary['unique'], 2)
+        self.assertEqual(read_shards(summary['shards']), [{'id': '9', 'content': 'kept'}, {'id': '100', 'content': 'new'}])
+
+    def test_same_id_from_different_instances_is_kept(self):
+        # Remote statuses from one origin server, crawled from two instances that gave them the same local ID
+        write_jsonl(self.first, [{'id': '100', 'uri': 'https://origin.example.org/statuses/1'}])
+        write_jsonl(self.second, [{'id': '100', 'uri': 'https://origin.example.org/statuses/2'}])
+
+        summary = compact_outputs([self.first, self.second], self.prefix, {self.first: 'a.example.org', self.second: 'b.example.org'})
+        self.assertEqual(summary['unique'], 2)
+
+    def test_unknown_instance_is_refused(self):
+        # The host of the URI is the origin server, not the crawled instance
+        write_jsonl(self.first, [{'id': '100', 'uri': 'https://origin.example.org/statuses/1'}])
+        write_jsonl(self.second, [{'id': '100', 'uri': 'https://origin.example.org/statuses/2'}])
+
+        with self.assertRaises(ValueError):
+            compact_outputs([self.first, self.second], self.prefix)
+
+    def test_records_naming_their_instance(self):
+        write_jsonl(self.first, [{'id': '100', 'instance': 'a.example.org', 'reference': True}])
+        write_jsonl(self.second, [{'id': '100', 'instance': 'b.example.org', 'reference': True}])
+
+        summary = compact_outputs([self.first, self.second], self.prefix)
+        self.assertEqual(summary['unique'], 2)
+
+class OffsetIndexTest(unittest.TestCase):
+
+    def test_lookup_by_host_and_id(self):
+        jsonl_file = os.path.join(tempfile.mkdtemp(), 'timeline.jsonl')
+        write_jsonl(jsonl_file, [{'id': '1', 'content': 'local'}, {'id': '1', 'instance': 'b.example.org', 'reference': True}, {'id': '2'}])
+        self.assertEqual(build_offset_index(jsonl_file, host='a.example.org'), 3)
+
+        reader = OffsetIndexReader(jsonl_file, host='a.example.org')
+        self.assertEqual(reader.get('1'), [{'id': '1', 'content': 'local'}])
+        self.assertEqual(reader.get('1', host='b.example.org'), [{'id': '1', 'instance': 'b.example.org', 'reference': True}])
+        self.assertIn('2', reader)
+        self.assertNotIn('3', reader)
+        reader.close()
+
+if __name__ == '__main__':
+    unittest.main()
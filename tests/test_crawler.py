@@ -0,0 +1,70 @@
+import os
+import tempfile
+import threading
+import unittest
+from mastodoner.client import CrawlClient
+from mastodoner.crawler import Crawler
+from mastodoner.projection import compile_fields
+
+class ArgumentCheckTest(unittest.TestCase):
+
+    def setUp(self):
+        self.crawler = Crawler(probe_capabilities=False)
+
+    def test_generators_check_arguments_when_called(self):
+        # Bad arguments raise straight away, not once the results are iterated
+        with self.assertRaises(ValueError):
+            self.crawler.instance_endpoints('a.example.org', endpoints=['unknown'])
+        with self.assertRaises(ValueError):
+            self.crawler.instance_endpoints('a.example.org', max_limit=0)
+        with self.assertRaises(ValueError):
+            self.crawler.map('instance_rules', ['a.example.org'], per_host=0)
+        with self.assertRaises(ValueError):
+            self.crawler.map('_sleep', ['a.example.org'])
+        with self.assertRaises(ValueError):
+            self.crawler.discover_instances_via_peers(['a.example.org'], max_depth=0)
+        with self.assertRaises(ValueError):
+            self.crawler.discover_instances_via_peers(['a.example.org'], bloom_capacity=-1)
+        with self.assertRaises(ValueError):
+            CrawlClient('/nonexistent.sock').submit('_sleep', 1)
+
+    def test_map_yields_results_per_input(self):
+        self.crawler.instance_rules = lambda instance_url: [{'id': '1', 'text': instance_url}]
+        results = list(self.crawler.map('instance_rules', ['a.example.org', 'b.example.org']))
+        self.assertEqual(sorted(result['input'] for result in results), ['a.example.org', 'b.example.org'])
+        self.assertTrue(all(result['items'] == [{'id': '1', 'text': result['input']}] for result in results))
+
+class TagTimelineInstancesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.crawler = Crawler(probe_capabilities=False, status_index_file=os.path.join(tempfile.mkdtemp(), 'statuses.sqlite'), status_references=True)
+
+    def tearDown(self):
+        self.crawler.status_index.close()
+
+    def status(self, host, id, uri):
+        return {'id': id, 'uri': uri, 'created_at': f"2024-05-0{id}T00:00:00.000Z", 'content': host, 'account': {'acct': 'alice'}}
+
+    def test_references_are_kept_and_full_copies_preferred(self):
+        # A status saved in an earlier run
+        self.crawler.status_index.add('https://c.example.org/statuses/1')
+        self.crawler.status_index.flush()
+
+        # a.example.org ingests the shared status first, so b.example.org only gets a reference to it
+        ingested = threading.Event()
+        statuses = {'a.example.org': [self.status('a.example.org', '2', 'https://c.example.org/statuses/2')], 'b.example.org': [self.status('b.example.org', '1', 'https://c.example.org/statuses/1'), self.status('b.example.org', '2', 'https://c.example.org/statuses/2')]}
+
+        def tag_timeline(instance_url, hashtag, max_limit, only_local, only_media, fields, since, until):
+            if instance_url == 'b.example.org':
+                ingested.wait(5)
+            items = self.crawler._ingest_statuses(statuses[instance_url], instance_url, compile_fields(fields))
+            ingested.set()
+            return items
+
+        self.crawler.tag_timeline = tag_timeline
+        items = self.crawler.tag_timeline_instances(['b.example.org', 'a.example.org'], 'python', max_limit=10, fields=['id', 'content'])
+
+        self.assertEqual(items, [{'id': '2', 'content': 'a.example.org'}, {'id': '1', 'uri': 'https://c.example.org/statuses/1', 'instance': 'b.example.org', 'reference': True}])
+
+if __name__ == '__main__':
+    unittest.main()
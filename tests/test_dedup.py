@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+import unittest
+from mastodoner.bloom import BloomFilter
+from mastodoner.dedup import StatusIndex
+
+class BloomFilterTest(unittest.TestCase):
+
+    def test_added_keys_are_present_after_reload(self):
+        bloom = BloomFilter(1000, 0.01)
+        self.assertTrue(bloom.add('https://a.example.org/statuses/1'))
+        self.assertFalse(bloom.add('https://a.example.org/statuses/1'))
+
+        path = os.path.join(tempfile.mkdtemp(), 'filter.bloom')
+        bloom.save(path)
+        loaded = BloomFilter.load(path)
+        self.assertIn('https://a.example.org/statuses/1', loaded)
+        self.assertNotIn('https://a.example.org/statuses/2', loaded)
+
+class StatusIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index_file = os.path.join(tempfile.mkdtemp(), 'statuses.sqlite')
+        self.index = StatusIndex(self.index_file, bloom_capacity=1000)
+
+    def reopen(self):
+        self.index.close()
+        self.index = StatusIndex(self.index_file, bloom_capacity=1000)
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_only_flushed_statuses_are_kept(self):
+        self.assertTrue(self.index.add('https://a.example.org/statuses/1'))
+        self.assertFalse(self.index.add('https://a.example.org/statuses/1'))
+        self.index.flush()
+        self.index.add('https://a.example.org/statuses/2')
+        self.reopen()
+
+        self.assertIn('https://a.example.org/statuses/1', self.index)
+        self.assertNotIn('https://a.example.org/statuses/2', self.index)
+
+    def test_batches_are_flushed_and_discarded_separately(self):
+        with self.index.batch() as saved:
+            self.index.add('https://a.example.org/statuses/1')
+
+            # Worker threads of the job add to its batch
+            worker = threading.Thread(target=self.index.bind(lambda: self.index.add('https://a.example.org/statuses/2')))
+            worker.start()
+            worker.join()
+
+        with self.index.batch() as failed:
+            self.index.add('https://a.example.org/statuses/3')
+
+        with self.index.batch() as running:
+            self.index.add('https://a.example.org/statuses/4')
+
+        self.assertEqual(len(saved), 2)
+        self.index.flush(saved)
+        self.index.discard(failed)
+
+        # Statuses of the failed job can be crawled again, those of the running job are still seen
+        self.assertTrue(self.index.add('https://a.example.org/statuses/3'))
+        self.assertFalse(self.index.add('https://a.example.org/statuses/4'))
+        self.reopen()
+
+        self.assertIn('https://a.example.org/statuses/1', self.index)
+        self.assertIn('https://a.example.org/statuses/2', self.index)
+        self.assertNotIn('https://a.example.org/statuses/4', self.index)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from mastodoner.filters import KeywordMatcher, StatusFilter
+
+class KeywordMatcherTest(unittest.TestCase):
+
+    def test_whole_words(self):
+        matcher = KeywordMatcher(['cat', 'Open Source'])
+        self.assertTrue(matcher.search('My cat sleeps'))
+        self.assertTrue(matcher.search('cat'))
+        self.assertTrue(matcher.search('All about OPEN SOURCE.'))
+        self.assertFalse(matcher.search('concatenate'))
+        self.assertFalse(matcher.search('open sourcery'))
+
+    def test_overlapping_keywords(self):
+        # Keywords found through failure links, and a whole word found after a match inside a word
+        matcher = KeywordMatcher(['he', 'she', 'hers'])
+        self.assertTrue(matcher.search('ushers he'))
+        self.assertFalse(matcher.search('ushers'))
+        self.assertTrue(KeywordMatcher(['he', 'she', 'hers'], whole_words=False).search('ushers'))
+
+    def test_invalid_keywords_are_rejected(self):
+        with self.assertRaises(ValueError):
+            KeywordMatcher('cat')
+        with self.assertRaises(ValueError):
+            KeywordMatcher(['cat'], whole_words='yes')
+
+class StatusFilterTest(unittest.TestCase):
+
+    def test_predicates(self):
+        status_filter = StatusFilter(keywords=['python'], languages=['en'], with_media=True, visibility=['public'])
+        status = {'content': '<p>Learning <a href="#">Python</a></p>', 'language': 'en-GB', 'visibility': 'public', 'media_attachments': [{'id': '1'}]}
+        self.assertTrue(status_filter.matches(status))
+        self.assertFalse(status_filter.matches(dict(status, language='de')))
+        self.assertFalse(status_filter.matches(dict(status, visibility='unlisted')))
+        self.assertFalse(status_filter.matches(dict(status, media_attachments=[])))
+        self.assertFalse(status_filter.matches(dict(status, content='<p>Learning Rust</p>')))
+
+    def test_boosts_are_judged_by_boosted_status(self):
+        status_filter = StatusFilter(keywords=['python'])
+        self.assertTrue(status_filter.matches({'content': '', 'reblog': {'content': '', 'spoiler_text': 'Python tips'}}))
+        self.assertFalse(status_filter.matches({'content': 'python', 'reblog': {'content': 'rust'}}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import time
+import unittest
+import requests
+from requests.adapters import BaseAdapter
+from mastodoner.health import CircuitOpenError, HealthCheckedSession, HostHealth
+
+class FailingAdapter(BaseAdapter):
+    # Fails every request with the given exception
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+    def send(self, request, **kwargs):
+        raise self.error
+
+    def close(self):
+        pass
+
+class HostHealthTest(unittest.TestCase):
+
+    def open_circuit(self, health, host):
+        for _ in range(health.failure_threshold):
+            health.record_failure(host)
+
+    def test_circuit_opens_after_threshold(self):
+        health = HostHealth(failure_threshold=2, recovery_timeout=60)
+        health.record_failure('a.example.org')
+        self.assertTrue(health.allow('a.example.org'))
+        health.record_failure('a.example.org')
+        self.assertFalse(health.allow('a.example.org'))
+        self.assertEqual(health.prioritize(['a.example.org', 'b.example.org']), ['b.example.org', 'a.example.org'])
+
+    def test_single_trial_after_recovery_timeout(self):
+        health = HostHealth(failure_threshold=1, recovery_timeout=0.05)
+        self.open_circuit(health, 'a.example.org')
+        time.sleep(0.06)
+        self.assertTrue(health.allow('a.example.org'))
+        self.assertFalse(health.allow('a.example.org'))
+        health.record_success('a.example.org')
+        self.assertTrue(health.allow('a.example.org'))
+        self.assertFalse(health.is_dead('a.example.org'))
+
+    def test_unfinished_trial_expires(self):
+        health = HostHealth(failure_threshold=1, recovery_timeout=0.05)
+        self.open_circuit(health, 'a.example.org')
+        time.sleep(0.06)
+        self.assertTrue(health.allow('a.example.org'))
+
+        # No result is recorded for the trial, another one is let through after recovery_timeout
+        time.sleep(0.06)
+        self.assertTrue(health.allow('a.example.org'))
+
+    def test_trial_is_saved_as_open(self):
+        health_file = os.path.join(tempfile.mkdtemp(), 'health.json')
+        health = HostHealth(health_file, failure_threshold=1, recovery_timeout=0.05)
+        self.open_circuit(health, 'a.example.org')
+        opened_at = health.hosts['a.example.org']['opened_at']
+        time.sleep(0.06)
+        self.assertTrue(health.allow('a.example.org'))
+        health.save()
+
+        reloaded = HostHealth(health_file, failure_threshold=1, recovery_timeout=0.05)
+        self.assertEqual(reloaded.hosts['a.example.org']['state'], 'open')
+        self.assertEqual(reloaded.hosts['a.example.org']['opened_at'], opened_at)
+        self.assertTrue(reloaded.allow('a.example.org'))
+
+    def test_any_error_of_a_trial_counts_as_failure(self):
+        health = HostHealth(failure_threshold=1, recovery_timeout=0.05)
+        session = HealthCheckedSession(health)
+        session.mount('https://', FailingAdapter(requests.exceptions.ChunkedEncodingError('truncated body')))
+        self.open_circuit(health, 'a.example.org')
+        time.sleep(0.06)
+
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            session.get('https://a.example.org/api/v1/instance')
+        self.assertEqual(health.hosts['a.example.org']['state'], 'open')
+        with self.assertRaises(CircuitOpenError):
+            session.get('https://a.example.org/api/v1/instance')
+
+    def test_other_errors_of_healthy_hosts_are_not_counted(self):
+        health = HostHealth(failure_threshold=1)
+        session = HealthCheckedSession(health)
+        session.mount('https://', FailingAdapter(requests.exceptions.ChunkedEncodingError('truncated body')))
+
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            session.get('https://a.example.org/api/v1/instance')
+        self.assertFalse(health.is_dead('a.example.org'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import requests
+
+try:
+    import httpx
+    from mastodoner.http2 import HTTP2Adapter
+except ImportError:
+    httpx = None
+
+class FailingStream(httpx.SyncByteStream if httpx is not None else object):
+    # Body that breaks off after its first chunk
+    def __init__(self, error):
+        self.error = error
+
+    def __iter__(self):
+        yield b'['
+        raise self.error
+
+@unittest.skipIf(httpx is None, "HTTP/2 requires httpx")
+class HTTP2AdapterTest(unittest.TestCase):
+
+    def session(self, handler):
+        adapter = HTTP2Adapter()
+        adapter.client.close()
+        adapter.client = httpx.Client(transport=httpx.MockTransport(handler))
+        session = requests.Session()
+        session.mount('https://', adapter)
+        return session
+
+    def test_body_is_read(self):
+        session = self.session(lambda request: httpx.Response(200, json=[{'id': '1'}]))
+        self.assertEqual(session.get('https://a.example.org/api/v1/timelines/public').json(), [{'id': '1'}])
+
+    def test_errors_are_raised_as_requests_exceptions(self):
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.session(handler).get('https://a.example.org/api/v1/timelines/public')
+
+    def test_errors_while_reading_body_are_raised_as_requests_exceptions(self):
+        errors = [(httpx.ReadTimeout("timed out"), requests.exceptions.ReadTimeout), (httpx.RemoteProtocolError("reset"), requests.exceptions.ConnectionError), (httpx.DecodingError("bad gzip"), requests.exceptions.ContentDecodingError)]
+        for error, expected in errors:
+            session = self.session(lambda request: httpx.Response(200, stream=FailingStream(error)))
+            with self.assertRaises(expected):
+                session.get('https://a.example.org/api/v1/timelines/public')
+
+            # Streamed bodies fail the same way once they are read
+            response = session.get('https://a.example.org/api/v1/timelines/public', stream=True)
+            with self.assertRaises(expected):
+                response.content
+
+if __name__ == '__main__':
+    unittest.main()
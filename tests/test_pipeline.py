@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+import requests
+from requests.adapters import BaseAdapter
+from mastodoner import pipeline
+from mastodoner.crawler import Crawler
+from mastodoner.snowflake import datetime_to_snowflake
+
+RATE_LIMIT_HEADERS = {'X-RateLimit-Remaining': '300', 'X-RateLimit-Reset': '2030-01-01T00:00:00.000Z'}
+
+class FakeResponse:
+    def __init__(self, statuses, next_url=None):
+        self.status_code = 200
+        self.headers = RATE_LIMIT_HEADERS
+        self.content = json.dumps(statuses).encode('utf-8')
+        self.links = {'next': {'url': next_url}} if next_url else {}
+
+    def json(self):
+        return json.loads(self.content)
+
+class FakeTimeline:
+    # Pages of one status per hour, newest first, each linking to the next with the max_id of its oldest status
+    def __init__(self, newest, pages, page_size=4):
+        self.requests = []
+        self.statuses = []
+        for i in range(pages * page_size):
+            created_at = newest - timedelta(hours=i)
+            self.statuses.append({'id': datetime_to_snowflake(created_at), 'uri': f"https://a.example.org/statuses/{i}", 'created_at': created_at.strftime('%Y-%m-%dT%H:%M:%S.000Z')})
+        self.page_size = page_size
+
+    def page(self, url):
+        self.requests.append(url)
+        max_id = parse_qs(urlsplit(url).query).get('max_id')
+        statuses = [status for status in self.statuses if max_id is None or int(status['id']) < int(max_id[0])][:self.page_size]
+        more = len(statuses) == self.page_size and statuses[-1] is not self.statuses[-1]
+        return statuses, f"https://a.example.org/api/v1/timelines/public?limit=4&max_id={statuses[-1]['id']}" if more else None
+
+    def get(self, url, **kwargs):
+        return FakeResponse(*self.page(url))
+
+class TimelineAdapter(BaseAdapter):
+    # Serves the fake timeline through the crawler's session, so tracing sees every response
+    def __init__(self, timeline):
+        super().__init__()
+        self.timeline = timeline
+
+    def send(self, request, **kwargs):
+        statuses, next_url = self.timeline.page(request.url)
+        response = requests.Response()
+        response.status_code = 200
+        response.headers.update(RATE_LIMIT_HEADERS)
+        response.headers['Content-Type'] = 'application/json'
+        if next_url:
+            response.headers['Link'] = f'<{next_url}>; rel="next"'
+        response._content = json.dumps(statuses).encode('utf-8')
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+class PipelineTest(unittest.TestCase):
+
+    def test_fetching_stops_at_since(self):
+        newest = datetime(2024, 5, 8)
+        timeline = FakeTimeline(newest, pages=20)
+        crawler = Crawler(probe_capabilities=False)
+        crawler.session.get = timeline.get
+        output_file = os.path.join(tempfile.mkdtemp(), 'timeline.jsonl')
+
+        # 10 statuses in the window: the third page reaches back past since
+        result = crawler.instance_timeline_to_file('a.example.org', output_file, since=newest - timedelta(hours=9, minutes=30), queue_size=16)
+        self.assertEqual(result[0]['count'], 10)
+        self.assertEqual(len(timeline.requests), 3)
+
+    def test_traced_pages_are_decoded_once(self):
+        newest = datetime(2024, 5, 8)
+        timeline = FakeTimeline(newest, pages=3)
+        directory = tempfile.mkdtemp()
+        crawler = Crawler(probe_capabilities=False, trace_file=os.path.join(directory, 'trace.jsonl'))
+        crawler.session.mount('https://', TimelineAdapter(timeline))
+
+        decoded = []
+        loads = json.loads
+        with mock.patch.object(requests.models.complexjson, 'loads', lambda *args, **kwargs: decoded.append(1) or loads(*args, **kwargs)), mock.patch.object(pipeline.json, 'loads', lambda *args, **kwargs: decoded.append(1) or loads(*args, **kwargs)):
+            result = crawler.instance_timeline_to_file('a.example.org', os.path.join(directory, 'timeline.jsonl'))
+
+        self.assertEqual(result[0]['count'], 12)
+        self.assertEqual(len(decoded), len(timeline.requests))
+
+if __name__ == '__main__':
+    unittest.main()
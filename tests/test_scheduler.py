@@ -0,0 +1,29 @@
+import unittest
+from datetime import datetime, timezone
+from mastodoner.crawler import Crawler
+from mastodoner.scheduler import Scheduler
+
+class SchedulerSpecTest(unittest.TestCase):
+
+    def setUp(self):
+        self.crawler = Crawler(probe_capabilities=False)
+
+    def test_datetimes_are_parsed(self):
+        calls = []
+        self.crawler.instance_timeline_all = lambda instance_url, **kwargs: calls.append(kwargs) or []
+        scheduler = Scheduler([{'method': 'instance_timeline_all', 'args': ['a.example.org'], 'kwargs': {'since': '2024-05-01', 'until': '2024-05-02T12:00:00Z'}, 'interval': 3600}], self.crawler)
+
+        scheduler._run(scheduler.specs[0])
+        self.assertEqual(calls, [{'since': datetime(2024, 5, 1), 'until': datetime(2024, 5, 2, 12, tzinfo=timezone.utc)}])
+        self.assertEqual(scheduler.specs[0]['name'], 'instance_timeline_all(a.example.org, since=2024-05-01, until=2024-05-02T12:00:00Z)')
+
+    def test_invalid_specs_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "'since' must be in ISO format"):
+            Scheduler([{'method': 'instance_timeline_all', 'args': ['a.example.org'], 'kwargs': {'since': 'yesterday'}, 'interval': 3600}], self.crawler)
+        with self.assertRaisesRegex(ValueError, "unknown method"):
+            Scheduler([{'method': '_sleep', 'interval': 3600}], self.crawler)
+        with self.assertRaisesRegex(ValueError, "'interval'"):
+            Scheduler([{'method': 'instance_timeline_all', 'args': ['a.example.org'], 'interval': 0}], self.crawler)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+from mastodoner.snapshots import SnapshotStore
+
+class SnapshotStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = SnapshotStore(tempfile.mkdtemp(), rebase_every=2)
+
+    def records(self):
+        with open(self.store._path('peers', 'a.example.org'), 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_snapshots_are_loaded_as_of_a_date(self):
+        self.store.save('peers', 'a.example.org', ['b.example.org', 'c.example.org'], date(2024, 5, 1))
+        summary = self.store.save('peers', 'a.example.org', ['b.example.org', 'd.example.org'], '2024-05-03')
+        self.assertEqual(summary['added'], 1)
+        self.assertEqual(summary['removed'], 1)
+
+        self.assertEqual(self.store.load('peers', 'a.example.org'), ['b.example.org', 'd.example.org'])
+        self.assertEqual(self.store.load('peers', 'a.example.org', '2024-05-02'), ['b.example.org', 'c.example.org'])
+        self.assertEqual(self.store.load('peers', 'a.example.org', '2024-04-30'), [])
+        self.assertEqual(self.store.dates('peers', 'a.example.org'), ['2024-05-01', '2024-05-03'])
+
+    def test_deltas_are_rebased(self):
+        for day, peers in enumerate([['b.example.org'], ['c.example.org'], ['d.example.org'], ['e.example.org']], 1):
+            self.store.save('peers', 'a.example.org', peers, date(2024, 5, day))
+
+        self.assertEqual(['base' in record for record in self.records()], [True, False, False, True])
+        self.assertEqual(self.store.load('peers', 'a.example.org', '2024-05-03'), ['d.example.org'])
+
+    def test_invalid_arguments_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.store.save('followers', 'a.example.org', [])
+        with self.assertRaises(ValueError):
+            self.store.load('peers', 'a.example.org', 'yesterday')
+        self.assertFalse(os.path.exists(os.path.join(self.store.snapshot_dir, 'followers')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, datetime, timezone
+from mastodoner.client import CrawlClient
+from mastodoner.crawler import Crawler
+from mastodoner.server import CrawlServer
+
+class SocketRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.socket_path = os.path.join(tempfile.mkdtemp(), 'mastodoner.sock')
+        self.crawler = Crawler(probe_capabilities=False)
+        self.server = CrawlServer(self.socket_path, self.crawler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_datetimes_round_trip(self):
+        received = {}
+
+        def instance_timeline_sliced(instance_url, since, until=None, slices=4, **kwargs):
+            received.update(since=since, until=until, slices=slices)
+            return [{'id': '1'}]
+
+        def instance_snapshot_at(instance_url, kind, date=None):
+            received.update(date=date)
+            return []
+
+        self.crawler.instance_timeline_sliced = instance_timeline_sliced
+        self.crawler.instance_snapshot_at = instance_snapshot_at
+        client = CrawlClient(self.socket_path)
+
+        since = datetime(2024, 5, 1)
+        until = datetime(2024, 5, 8, 12, 30, tzinfo=timezone.utc)
+        self.assertEqual(client.instance_timeline_sliced('mastodon.social', since, until, 2), [{'id': '1'}])
+        self.assertEqual(received, {'since': since, 'until': until, 'slices': 2})
+
+        client.instance_snapshot_at('mastodon.social', 'peers', date(2024, 5, 3))
+        self.assertEqual(received['date'], date(2024, 5, 3))
+
+    def test_errors_are_reported(self):
+        with self.assertRaises(ValueError):
+            CrawlClient(self.socket_path).instance_rules()
+
+    def test_failed_jobs_are_reported(self):
+        def instance_rules(instance_url):
+            raise RuntimeError('instance rules failed')
+
+        self.crawler.instance_rules = instance_rules
+        with self.assertRaisesRegex(ValueError, 'instance rules failed'):
+            CrawlClient(self.socket_path).instance_rules('mastodon.social')
+
+    def test_socket_is_private(self):
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+
+class StatusIndexJobTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(directory, 'mastodoner.sock')
+        self.crawler = Crawler(probe_capabilities=False, status_index_file=os.path.join(directory, 'statuses.sqlite'))
+        self.server = CrawlServer(self.socket_path, self.crawler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.crawler.status_index.close()
+
+    def recorded(self, count):
+        # Jobs are recorded just after their last item reached the client
+        for _ in range(50):
+            if self.crawler.status_index.connection.execute("SELECT COUNT(*) FROM statuses").fetchone()[0] == count:
+                return True
+            time.sleep(0.1)
+        return False
+
+    def test_jobs_are_recorded_while_others_run(self):
+        release = threading.Event()
+
+        def instance_timeline(instance_url, max_limit):
+            if instance_url == 'slow.example.org':
+                release.wait(5)
+            return self.crawler._ingest_statuses([{'id': '1', 'uri': f"https://{instance_url}/statuses/1"}], instance_url)
+
+        self.crawler.instance_timeline = instance_timeline
+        slow = threading.Thread(target=lambda: CrawlClient(self.socket_path).instance_timeline('slow.example.org', 1))
+        slow.start()
+
+        self.assertEqual(len(CrawlClient(self.socket_path).instance_timeline('fast.example.org', 1)), 1)
+        self.assertTrue(self.recorded(1))
+
+        release.set()
+        slow.join()
+        self.assertTrue(self.recorded(2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from mastodoner.summary import format_tables, summarize_outputs
+
+NODEINFO = {'software': {'name': 'mastodon', 'version': '4.2.0'}, 'usage': {'users': {'total': 500, 'activeMonth': 100, 'activeHalfyear': 200}, 'localPosts': 10000}, 'openRegistrations': True}
+INSTANCE = {'domain': 'a.example.org', 'usage': {'users': {'active_month': 100}}, 'registrations': {'enabled': True}}
+
+@unittest.skipIf(numpy is None, "summaries require numpy")
+class SummaryTest(unittest.TestCase):
+
+    def write(self, *records):
+        path = os.path.join(tempfile.mkdtemp(), 'records.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        return path
+
+    def metric(self, summary, name):
+        return next(row for row in summary['instances'] if row['metric'] == name)
+
+    def test_weekly_activity(self):
+        summary = summarize_outputs([self.write({'week': 1714953600, 'statuses': 10, 'logins': 1, 'registrations': 0}, {'week': 1714953600, 'statuses': 30, 'logins': 3, 'registrations': 2})])
+        self.assertEqual(summary['activity'][0]['week'], '2024-05-06')
+        self.assertEqual(summary['activity'][0]['instances'], 2)
+        self.assertEqual(summary['activity'][0]['statuses'], 40)
+        self.assertEqual(summary['activity'][0]['statuses_p50'], 20)
+        self.assertIn('statuses', format_tables(summary))
+
+    def test_both_records_of_one_instance_are_counted_once(self):
+        summary = summarize_outputs([self.write(dict(NODEINFO, instance='a.example.org'), INSTANCE)])
+        self.assertEqual(self.metric(summary, 'active_month')['instances'], 1)
+        self.assertEqual(self.metric(summary, 'active_month')['sum'], 100)
+        self.assertEqual(self.metric(summary, 'users')['sum'], 500)
+        self.assertEqual(summary['software'], [{'software': 'mastodon', 'version': '4.2.0', 'instances': 1, 'share': 1.0}])
+
+    def test_recrawled_instance_is_counted_once(self):
+        summary = summarize_outputs([self.write(INSTANCE, dict(INSTANCE, usage={'users': {'active_month': 150}}))])
+        self.assertEqual(self.metric(summary, 'active_month')['instances'], 1)
+        self.assertEqual(self.metric(summary, 'active_month')['sum'], 150)
+
+    def test_unmatched_mixed_records_are_refused(self):
+        with self.assertRaises(ValueError):
+            summarize_outputs([self.write(NODEINFO, INSTANCE)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from datetime import datetime, timedelta
+from mastodoner.crawler import Crawler
+from test_pipeline import FakeTimeline
+
+class SlicedTimelineTest(unittest.TestCase):
+
+    def test_slices_are_merged_newest_first(self):
+        newest = datetime(2024, 5, 8)
+        timeline = FakeTimeline(newest, pages=20)
+        crawler = Crawler(probe_capabilities=False)
+        crawler.session.get = timeline.get
+
+        items = crawler.instance_timeline_sliced('a.example.org', newest - timedelta(hours=30), newest + timedelta(minutes=30), slices=4)
+        self.assertEqual([item['uri'] for item in items], [f"https://a.example.org/statuses/{i}" for i in range(31)])
+
+    def test_invalid_arguments_are_rejected(self):
+        crawler = Crawler(probe_capabilities=False)
+        with self.assertRaises(ValueError):
+            crawler.instance_timeline_sliced('a.example.org', datetime(2024, 5, 8), datetime(2024, 5, 1))
+        with self.assertRaises(ValueError):
+            crawler.instance_timeline_sliced('a.example.org', datetime(2024, 5, 1), slices=0)
+
+class SampledTimelineTest(unittest.TestCase):
+
+    def test_sample_estimates_statuses_in_window(self):
+        # 100 statuses in the window, one per hour
+        newest = datetime(2024, 5, 8)
+        timeline = FakeTimeline(newest, pages=50)
+        crawler = Crawler(probe_capabilities=False)
+        crawler.session.get = timeline.get
+        since = newest - timedelta(hours=100)
+
+        items = crawler.instance_timeline_sample('a.example.org', 40, since, newest, probe_size=4, seed=1)
+        self.assertEqual(len(timeline.requests), 10)
+        self.assertEqual(len({item['id'] for item in items}), len(items))
+        self.assertTrue(all(item['sample_weight'] > 0 and item['created_at'] >= since.strftime('%Y-%m-%dT%H:%M:%S') for item in items))
+        self.assertTrue(70 <= sum(item['sample_weight'] for item in items) <= 130)
+
+    def test_non_snowflake_software_is_not_sampled(self):
+        crawler = Crawler(probe_capabilities=False)
+        crawler.capabilities['a.example.org'] = {'software': 'misskey', 'version': '13.0.0', 'unsupported': []}
+        self.assertEqual(crawler.instance_timeline_sample('a.example.org', 10, datetime(2024, 5, 1), datetime(2024, 5, 8)), [])
+
+if __name__ == '__main__':
+    unittest.main()